@@ -0,0 +1,80 @@
+from array import array
+from datetime import date
+
+# --- Indicadores de Ocupação e Receita ---
+# Os relatórios partem do resumo diário (tabela ocupacao_diaria), já agregado
+# por dia no SQL. Aqui as séries são montadas como arrays densos (um valor por
+# dia do período) e os indicadores são calculados por fatias desses arrays,
+# sem percorrer reservas nem noites individualmente em Python.
+#
+#   Taxa de ocupação = noites vendidas / noites disponíveis
+#   ADR (diária média) = receita / noites vendidas
+#   RevPAR = receita / noites disponíveis
+
+def serie_diaria(linhas, inicio, fim):
+    """
+    Converte [(data, noites, receita)] (apenas dias com vendas) em dois
+    arrays densos com um valor por dia, para inicio <= dia < fim.
+    """
+    dias = (fim - inicio).days
+    noites = array('d', bytes(8 * dias))
+    receita = array('d', bytes(8 * dias))
+    base = inicio.toordinal()
+    for data, noites_dia, receita_dia in linhas:
+        i = date.fromisoformat(data).toordinal() - base
+        noites[i] = noites_dia
+        receita[i] = receita_dia
+    return noites, receita
+
+def indicadores(noites_vendidas, receita, noites_disponiveis):
+    """Calcula os indicadores de um período a partir dos totais."""
+    return {
+        'noites_vendidas': noites_vendidas,
+        'noites_disponiveis': noites_disponiveis,
+        'receita': receita,
+        'ocupacao': noites_vendidas / noites_disponiveis if noites_disponiveis else 0.0,
+        'adr': receita / noites_vendidas if noites_vendidas else 0.0,
+        'revpar': receita / noites_disponiveis if noites_disponiveis else 0.0,
+    }
+
+def limites_mensais(inicio, fim):
+    """Retorna [(mes 'AAAA-MM', posição inicial, posição final)] das fatias de cada mês."""
+    limites = []
+    pos = 0
+    atual = inicio
+    while atual < fim:
+        proximo = date(atual.year + atual.month // 12, atual.month % 12 + 1, 1)
+        fim_mes = min(proximo, fim)
+        tamanho = (fim_mes - atual).days
+        limites.append((atual.strftime('%Y-%m'), pos, pos + tamanho))
+        pos += tamanho
+        atual = fim_mes
+    return limites
+
+def relatorio_periodo(linhas_por_dia, linhas_por_quarto, total_quartos, inicio, fim, detalhar_dias=True):
+    """
+    Monta o relatório do período: totais, por mês, por quarto e (opcional) por dia.
+    linhas_por_dia: [(data, noites, receita)]; linhas_por_quarto: [(quarto, noites, receita)].
+    """
+    noites, receita = serie_diaria(linhas_por_dia, inicio, fim)
+    dias = len(noites)
+
+    relatorio = {
+        'total': indicadores(sum(noites), sum(receita), total_quartos * dias),
+        'por_mes': [
+            dict(mes=mes, **indicadores(sum(noites[a:b]), sum(receita[a:b]), total_quartos * (b - a)))
+            for mes, a, b in limites_mensais(inicio, fim)
+        ],
+        'por_quarto': [
+            dict(numero_quarto=numero_quarto, **indicadores(noites_quarto, receita_quarto, dias))
+            for numero_quarto, noites_quarto, receita_quarto in linhas_por_quarto
+        ],
+        'por_dia': None,
+    }
+    if detalhar_dias:
+        base = inicio.toordinal()
+        relatorio['por_dia'] = [
+            dict(data=date.fromordinal(base + i).isoformat(), **indicadores(noites[i], receita[i], total_quartos))
+            for i in range(dias)
+        ]
+    return relatorio
@@ -0,0 +1,220 @@
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+from flask import Blueprint, current_app, jsonify, request, session
+from werkzeug.datastructures import MultiDict
+from controller import (
+    validate_periodo,
+    handle_room_availability,
+    get_reservas_data,
+    get_quartos_data,
+    get_reservas_hospede,
+    get_calendario_data,
+    validate_periodo_calendario,
+    handle_status_reserva,
+    get_historico_reserva_data,
+    reserva_existe,
+    get_busca_quartos_filtros,
+    handle_create_bloco
+)
+from availability import calendario_para_texto
+from model import get_table_versions, sincronizar_cache_quartos, get_database, get_propriedades
+
+# --- API JSON (v1) ---
+# Endpoints compactos para painéis e tablets que consultam os dados com
+# frequência. Cada resposta leva um ETag (e Last-Modified) derivado dos
+# contadores de alteração das tabelas envolvidas; se nada mudou desde a
+# última consulta, a resposta é 304 sem executar a consulta principal.
+
+api = Blueprint('api', __name__, url_prefix='/api/v1')
+
+@api.before_request
+def api_login_required():
+    """Exige login em toda a API, respondendo em JSON em vez de redirecionar."""
+    if not session.get('logged_in'):
+        return jsonify({'erro': 'Autenticação necessária.'}), 401
+
+def api_profile_required(allowed_profiles):
+    """Equivalente ao profile_required para a API (responde 403 em JSON)."""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if session.get('profile_id') not in allowed_profiles:
+                return jsonify({'erro': 'Acesso negado para este perfil.'}), 403
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+def conditional_json(tabelas, gerar_dados, por_usuario=False, bancos=None):
+    """
+    Responde gerar_dados() em JSON com ETag/Last-Modified baseados nas versões
+    das tabelas. Retorna 304 quando o cliente já possui a versão atual.
+    bancos: arquivos cujas versões entram no ETag (padrão: o da requisição).
+    """
+    bancos = bancos or [get_database()]
+    versoes = {banco: get_table_versions(tabelas, banco) for banco in bancos}
+    atuais = versoes.get(get_database(), {})
+    if 'quartos' in atuais:
+        # O ETag reflete a versão atual; o catálogo em cache precisa acompanhá-la
+        sincronizar_cache_quartos(atuais['quartos'][0])
+    # As versões são de cada banco: o arquivo da propriedade também entra no ETag
+    partes = [request.full_path]
+    for banco in bancos:
+        partes += [banco] + [f"{t}:{versoes[banco][t][0]}" for t in sorted(versoes[banco])]
+    if por_usuario:
+        partes.append(f"usuario:{session.get('user_id')}")
+    etag = hashlib.sha1('|'.join(partes).encode('utf-8')).hexdigest()[:20]
+    last_modified = max(
+        datetime.strptime(alterada_em, '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc)
+        for versoes_banco in versoes.values() for _, alterada_em in versoes_banco.values()
+    )
+
+    # If-None-Match tem precedência sobre If-Modified-Since
+    if request.if_none_match:
+        # Comparação fraca: a versão comprimida da resposta leva o mesmo ETag como W/"..."
+        nao_modificado = request.if_none_match.contains_weak(etag)
+    else:
+        nao_modificado = bool(request.if_modified_since and request.if_modified_since >= last_modified)
+
+    if nao_modificado:
+        response = current_app.response_class(status=304)
+    else:
+        response = jsonify(gerar_dados())
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    # Os clientes podem guardar a resposta, mas devem revalidar a cada uso
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+@api.route('/quartos')
+@api_profile_required([1, 2, 3])
+def api_quartos():
+    """Lista os quartos com capacidade, preço e status de limpeza."""
+    return conditional_json(('quartos',), lambda: {'quartos': get_quartos_data()})
+
+@api.route('/disponibilidade')
+@api_profile_required([1, 2])
+def api_disponibilidade():
+    """
+    Quartos livres entre ?checkin=AAAA-MM-DD e ?checkout=AAAA-MM-DD; aceita
+    também ?hospedes=N, ?preco_max=X e ?atributo=... (repetível).
+    """
+    checkin = request.args.get('checkin', '')
+    checkout = request.args.get('checkout', '')
+    busca, error_msg = get_busca_quartos_filtros(request.args)
+    error_msg = error_msg or validate_periodo(checkin, checkout)
+    if error_msg:
+        return jsonify({'erro': error_msg}), 400
+    return conditional_json(
+        ('quartos', 'reservas', 'regras_tarifa'),
+        lambda: {'checkin': checkin, 'checkout': checkout, 'quartos': handle_room_availability(checkin, checkout, **busca)[0]}
+    )
+
+@api.route('/reservas')
+@api_profile_required([1, 2])
+def api_reservas():
+    """Uma página de reservas; aceita os mesmos filtros e cursor de /reservar."""
+    def gerar():
+        reservas, proximo_cursor = get_reservas_data(request.args)
+        return {'reservas': reservas, 'proximo_cursor': proximo_cursor}
+    return conditional_json(('reservas',), gerar)
+
+# Tipo de erro da reserva em bloco (model.ERROS_BLOCO) -> status HTTP
+STATUS_ERRO_BLOCO = {'invalido': 400, 'conflito': 409, 'ocupado': 503}
+
+@api.route('/reservas/bloco', methods=['POST'])
+@api_profile_required([1, 2])
+def api_reservas_bloco():
+    """
+    Reserva em bloco, tudo ou nada: {"nome_hospede", "data_checkin", "data_checkout",
+    "email_hospede"?} com "quartos": [...] ou "quantidade" e os filtros
+    "hospedes", "preco_max" e "atributos": [...].
+    """
+    dados = request.get_json(silent=True)
+    if not isinstance(dados, dict):
+        return jsonify({'erro': 'Envie os dados do bloco em JSON.'}), 400
+    for campo in ('nome_hospede', 'data_checkin', 'data_checkout', 'email_hospede'):
+        if dados.get(campo) is not None and not isinstance(dados[campo], str):
+            return jsonify({'erro': f"'{campo}' deve ser um texto."}), 400
+    quartos = dados.get('quartos')
+    if quartos is not None and not isinstance(quartos, list):
+        return jsonify({'erro': "'quartos' deve ser uma lista."}), 400
+    atributos = dados.get('atributos') or []
+    if not isinstance(atributos, list):
+        return jsonify({'erro': "'atributos' deve ser uma lista."}), 400
+    # Mesmos filtros (e validações) da busca de quartos
+    args = MultiDict([('atributo', str(atributo)) for atributo in atributos])
+    for campo in ('hospedes', 'preco_max'):
+        if dados.get(campo) is not None:
+            args[campo] = str(dados[campo])
+    busca, error_msg = get_busca_quartos_filtros(args)
+    if error_msg:
+        return jsonify({'erro': error_msg}), 400
+
+    success, message, reservas, erro = handle_create_bloco(
+        dados.get('nome_hospede'), dados.get('data_checkin') or '', dados.get('data_checkout') or '',
+        quartos=quartos, quantidade=dados.get('quantidade'), busca=busca,
+        email_hospede=dados.get('email_hospede') or ''
+    )
+    if not success:
+        return jsonify({'erro': message}), STATUS_ERRO_BLOCO[erro]
+    return jsonify({
+        'mensagem': message,
+        'reservas': reservas,
+        'valor_total': round(sum(reserva['valor_total'] for reserva in reservas), 2),
+    }), 201
+
+@api.route('/reservas/<int:reserva_id>/status', methods=['POST'])
+@api_profile_required([1, 2])
+def api_status_reserva(reserva_id):
+    """Transição de status: {"status": "Check-in" | "Check-out" | "Cancelada", "observacao": "..."}."""
+    dados = request.get_json(silent=True) or {}
+    success, message = handle_status_reserva(reserva_id, dados.get('status', ''), dados.get('observacao', ''))
+    if not success:
+        return jsonify({'erro': message}), 404 if message == "Reserva não encontrada." else 409
+    reserva, _ = get_historico_reserva_data(reserva_id)
+    return jsonify({'mensagem': message, 'reserva': reserva})
+
+@api.route('/reservas/<int:reserva_id>/historico')
+@api_profile_required([1, 2])
+def api_historico_reserva(reserva_id):
+    """Trilha de auditoria das mudanças de status da reserva."""
+    if not reserva_existe(reserva_id):
+        return jsonify({'erro': 'Reserva não encontrada.'}), 404
+
+    def gerar():
+        reserva, historico = get_historico_reserva_data(reserva_id)
+        return {'reserva': reserva, 'historico': historico}
+    # Toda entrada no histórico acompanha uma escrita em reservas; o histórico
+    # só é lido quando a resposta não for 304
+    return conditional_json(('reservas',), gerar)
+
+@api.route('/minhas_reservas')
+@api_profile_required([4])
+def api_minhas_reservas():
+    """Uma página de reservas do hóspede logado, de todas as propriedades."""
+    def gerar():
+        reservas, proximo_cursor = get_reservas_hospede(session.get('user_id'), cursor=request.args.get('cursor'))
+        return {'reservas': reservas, 'proximo_cursor': proximo_cursor}
+    bancos = [propriedade['database'] for propriedade in get_propriedades().values()]
+    return conditional_json(('reservas',), gerar, por_usuario=True, bancos=bancos)
+
+@api.route('/calendario')
+@api_profile_required([1, 2])
+def api_calendario():
+    """Ocupação quarto x noite: uma string por quarto, '1' para noite ocupada."""
+    inicio = request.args.get('inicio', '')
+    fim = request.args.get('fim', '')
+    # Validado antes do ETag: um período recusado não pode virar resposta em cache
+    error_msg = validate_periodo_calendario(inicio, fim)
+    if error_msg:
+        return jsonify({'erro': error_msg}), 400
+
+    def gerar():
+        _, linhas, _ = get_calendario_data(inicio, fim)
+        return {
+            'inicio': inicio,
+            'fim': fim,
+            'quartos': {numero_quarto: calendario_para_texto(grade) for numero_quarto, grade in linhas},
+        }
+    return conditional_json(('quartos', 'reservas'), gerar)
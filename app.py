@@ -1,5 +1,11 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash
-from flask_session import Session # Para gerenciar sessões no servidor
+from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, Response, stream_with_context, abort
+import functools
+import os
+import sqlite3
+import click
+from sessions import init_session # Para gerenciar sessões no servidor
+from metrics import init_metrics
+from assets import init_assets, versoes_tabelas
 from controller import (
     authenticate_user, 
     logout_user, 
@@ -13,23 +19,162 @@ from controller import (
     handle_room_availability,
     get_reservas_hospede,
     get_quartos_data,
-    handle_update_quarto_status
+    handle_update_quarto_status,
+    handle_update_quartos_lote,
+    parse_quartos_lote_form,
+    get_relatorio_ocupacao,
+    get_calendario_data,
+    get_regras_tarifa_data,
+    handle_create_regra_tarifa,
+    handle_delete_regra_tarifa,
+    handle_status_reserva,
+    get_historico_reserva_data,
+    get_busca_quartos_filtros,
+    get_atributos_quartos,
+    get_tipos_evento,
+    parse_last_event_id,
+    handle_create_bloco,
+    get_propriedades_data,
+    handle_trocar_propriedade,
+    get_relatorio_rede
 )
+from controller import STATUS_LIMPEZA, TIPOS_REGRA_TARIFA, STATUS_RESERVA, TRANSICOES_RESERVA
+from model import release_connection, get_schema_version, rebuild_ocupacao_diaria, update_quarto_atributos
+from model import init_db_propriedades, criar_propriedade, get_database_propriedade, get_database, usar_banco, PROPRIEDADE_PRINCIPAL
+from events import get_difusor
+from data_transfer import FORMATOS, IMPORT_LOTE, exportar, importar_reservas
 from datetime import datetime,timedelta
 
 # --- Configuração do App Flask ---
 app = Flask(__name__, template_folder='templates', static_folder='static')
 app.secret_key = 'uma_chave_secreta_muito_forte_e_aleatoria' # Necessário para Session
 
-# Configuração da Sessão no Servidor (pode ser o Flask-Session simples)
-# Usando o padrão Flask-Session para simplificar o exemplo, mas a sessão 
-# já usa cookies criptografados.
-app.config['SESSION_TYPE'] = 'filesystem' # Armazena sessão em um arquivo
+# Configuração da Sessão no Servidor
+# 'sqlite' (padrão): sessões em um banco SQLite próprio, compartilhável entre workers.
+# 'cookie': cookie assinado sem estado no servidor. 'filesystem': Flask-Session.
+app.config['SESSION_BACKEND'] = 'sqlite'
+app.config['SESSION_SQLITE_PATH'] = 'sessoes.db'
+app.config['SESSION_TYPE'] = 'filesystem' # Usado apenas pelo backend 'filesystem'
 app.config['SESSION_PERMANENT'] = False
 app.config['SESSION_USE_SIGNER'] = True
 app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(hours=1) # Tempo de vida da sessão
 
-Session(app)
+init_session(app)
+
+# Métricas (/metrics): latência por rota e consultas SQL por requisição
+app.config['METRICS_SQL_LENTA'] = 0.1 # Segundos; comandos mais lentos são logados
+app.config['METRICS_DEBUG_HEADER'] = False # True: cabeçalho X-Debug-Timing em cada resposta
+# /metrics exige "Authorization: Bearer <token>"; sem HOTEL_METRICS_TOKEN no ambiente, responde 404
+app.config['METRICS_TOKEN'] = os.environ.get('HOTEL_METRICS_TOKEN')
+init_metrics(app)
+
+# Estáticos com hash na URL (cache imutável), compressão gzip/brotli e cache de fragmentos
+app.config['ASSETS_COMPRESSAO_MINIMO'] = 1024 # Bytes; respostas menores seguem sem compressão
+init_assets(app)
+
+# Servidor ASGI de produção (asgi.py): "uvicorn asgi:application --workers 4"
+app.config['ASGI_THREADS'] = 16 # Threads por processo executando as views (SQLite, bcrypt)
+app.config['ASGI_MAX_CORPO'] = 10 * 1024 * 1024 # Bytes aceitos no corpo de uma requisição
+
+# API JSON (/api/v1) com respostas condicionais (ETag/304)
+from api import api
+app.register_blueprint(api)
+
+# Cada propriedade (hotel) tem o próprio banco: a requisição usa o da
+# propriedade do usuário logado (session['propriedade_id'], definida no login).
+@app.before_request
+def selecionar_banco():
+    usar_banco(get_database_propriedade(session.get('propriedade_id', PROPRIEDADE_PRINCIPAL)))
+
+@app.teardown_request
+def liberar_banco(exception=None):
+    usar_banco(None)
+
+# Devolve as conexões SQLite da thread ao final de cada requisição
+app.teardown_appcontext(release_connection)
+
+# Garante o esquema dos bancos (não faz nada além de uma consulta por banco se já estiverem atuais).
+# Em produção, prefira rodar "flask --app app init-db" no deploy. O banco de uma
+# propriedade com problema é informado e pulado, para que o app (e a CLI) ainda iniciem.
+init_db_propriedades(ignorar_falhas=True)
+
+def opcao_propriedade(comando):
+    """Opção --propriedade dos comandos que operam os dados de um hotel."""
+    @click.option('--propriedade', type=int, default=PROPRIEDADE_PRINCIPAL, show_default=True, help='Id da propriedade (hotel).')
+    @functools.wraps(comando)
+    def executar(propriedade, *args, **kwargs):
+        database = get_database_propriedade(propriedade)
+        if database is None:
+            raise click.BadParameter(f"Propriedade {propriedade} não encontrada.", param_hint='--propriedade')
+        usar_banco(database)
+        return comando(*args, **kwargs)
+    return executar
+
+@app.cli.command('init-db')
+def init_db_command():
+    """Cria ou atualiza o esquema do banco principal e dos bancos das propriedades."""
+    for database, aplicadas in init_db_propriedades(ignorar_falhas=True).items():
+        if aplicadas:
+            print(f"{database}: migrações aplicadas: {aplicadas}")
+        print(f"{database}: esquema na versão {get_schema_version(database)}.")
+
+@app.cli.command('criar-propriedade')
+@click.argument('nome')
+@click.argument('arquivo')
+def criar_propriedade_command(nome, arquivo):
+    """Cadastra um hotel da rede com o próprio banco (ARQUIVO, relativo à pasta do banco principal)."""
+    try:
+        propriedade_id = criar_propriedade(nome, arquivo)
+    except sqlite3.Error as e:
+        print(f"Erro ao criar a propriedade: {e}")
+        return
+    print(f"Propriedade {propriedade_id} ({nome}) criada em {get_database_propriedade(propriedade_id)}.")
+
+@app.cli.command('rebuild-relatorios')
+@opcao_propriedade
+def rebuild_relatorios_command():
+    """Recalcula o resumo diário de ocupação a partir das reservas."""
+    linhas = rebuild_ocupacao_diaria()
+    print(f"Resumo de ocupação recalculado ({linhas} linhas).")
+
+@app.cli.command('quarto-atributos')
+@opcao_propriedade
+@click.argument('numero_quarto')
+@click.argument('atributos', nargs=-1)
+def quarto_atributos_command(numero_quarto, atributos):
+    """Define os atributos pesquisáveis de um quarto (ex.: varanda banheira)."""
+    if update_quarto_atributos(numero_quarto, atributos):
+        print(f"Quarto {numero_quarto}: {', '.join(atributos) or 'sem atributos'}.")
+    else:
+        print(f"Quarto {numero_quarto} não encontrado.")
+
+@app.cli.command('exportar')
+@opcao_propriedade
+@click.argument('tabela', type=click.Choice(['reservas', 'quartos']))
+@click.option('--formato', type=click.Choice(FORMATOS), default='csv')
+@click.option('--saida', type=click.File('w', encoding='utf-8'), default='-', help='Arquivo de saída (padrão: stdout).')
+def exportar_command(tabela, formato, saida):
+    """Exporta reservas ou quartos em CSV ou JSONL."""
+    for pedaco in exportar(tabela, formato, get_database()):
+        saida.write(pedaco)
+
+@app.cli.command('importar-reservas')
+@opcao_propriedade
+@click.argument('arquivo', type=click.File('r', encoding='utf-8'))
+@click.option('--formato', type=click.Choice(FORMATOS), default=None, help='Padrão: pela extensão do arquivo.')
+@click.option('--lote', type=int, default=IMPORT_LOTE, show_default=True, help='Reservas por transação.')
+def importar_reservas_command(arquivo, formato, lote):
+    """Importa reservas de um arquivo CSV ou JSONL (ex.: migração de outro sistema)."""
+    formato = formato or ('jsonl' if arquivo.name.endswith('.jsonl') else 'csv')
+    resumo = importar_reservas(arquivo, formato, lote)
+    for numero_linha, mensagem in resumo['erros'][:50]:
+        print(f"Linha {numero_linha}: {mensagem}")
+    if len(resumo['erros']) > 50:
+        print(f"... e mais {len(resumo['erros']) - 50} erros.")
+    print(
+        f"{resumo['inseridas']} de {resumo['lidas']} reservas importadas em "
+        f"{resumo['segundos']:.2f}s ({resumo['linhas_por_segundo']:.0f} linhas/s)."
+    )
 
 
 # --- Rotas de Autenticação ---
@@ -41,11 +186,12 @@ def login():
         email = request.form['email']
         password = request.form['password']
         
-        if authenticate_user(email, password):
+        success, message = authenticate_user(email, password, ip=request.remote_addr)
+        if success:
             flash(f'Bem-vindo(a), {session.get("user_name")} ({session.get("user_profile")})!', 'success')
             return redirect(url_for('home'))
         else:
-            flash('Login falhou. Verifique seu e-mail e senha.', 'danger')
+            flash(message, 'danger')
             
     # Obtém o tema do cookie para aplicar na página de login
     current_theme = get_theme_from_cookie(request)
@@ -93,7 +239,10 @@ def reservar():
         return redirect(url_for('reservar'))
     
     # Tratar Ação GET (Visualizar Formulário e Lista de Reservas)
-    reservas = get_reservas_data()
+    reservas, proximo_cursor = get_reservas_data(request.args)
+    args_sem_cursor = {k: v for k, v in request.args.items() if k != 'cursor'}
+    primeira_pagina = url_for('reservar', **args_sem_cursor) if 'cursor' in request.args else None
+    proxima_pagina = url_for('reservar', **args_sem_cursor, cursor=proximo_cursor) if proximo_cursor else None
     
     # Obter dados para o formulário de pesquisa de quartos
     quartos_disponiveis = []
@@ -106,23 +255,77 @@ def reservar():
     checkin_date = request.args.get('checkin', default_checkin)
     checkout_date = request.args.get('checkout', default_checkout)
     
-    if checkin_date and checkout_date:
-        quartos_disponiveis, error_msg = handle_room_availability(checkin_date, checkout_date)
+    busca, error_msg = get_busca_quartos_filtros(request.args)
+    if error_msg:
+        flash(error_msg, 'warning')
+    elif checkin_date and checkout_date:
+        quartos_disponiveis, error_msg = handle_room_availability(checkin_date, checkout_date, **busca)
         if error_msg:
              flash(error_msg, 'warning')
         
     return render_template('reservar.html', 
         reservas=reservas, 
+        primeira_pagina=primeira_pagina,
+        proxima_pagina=proxima_pagina,
+        filtros=request.args,
         quartos_disponiveis=quartos_disponiveis,
         default_checkin=default_checkin,
         default_checkout=default_checkout,
         search_checkin=checkin_date,
-        search_checkout=checkout_date
+        search_checkout=checkout_date,
+        busca=busca,
+        atributos_quartos=get_atributos_quartos(),
+        status_reserva=STATUS_RESERVA,
+        transicoes=TRANSICOES_RESERVA
     )
 
-@app.route('/reservar/delete/<int:reserva_id>', methods=['POST'])
+@app.route('/reservar/bloco', methods=['POST'])
+@login_required
+@profile_required(allowed_profiles=[1, 2])
+def reservar_bloco():
+    """Reserva em bloco (grupos): a quantidade pedida, com os filtros da busca atual."""
+    busca, error_msg = get_busca_quartos_filtros(request.form)
+    if error_msg:
+        flash(error_msg, 'danger')
+        return redirect(url_for('reservar'))
+    success, message, reservas, _ = handle_create_bloco(
+        request.form.get('nome_hospede'), request.form.get('data_checkin', ''), request.form.get('data_checkout', ''),
+        quantidade=request.form.get('quantidade'), busca=busca, email_hospede=request.form.get('email_hospede', '')
+    )
+    if success:
+        message += f" Quartos: {', '.join(reserva['numero_quarto'] for reserva in reservas)}."
+    flash(message, 'success' if success else 'danger')
+    return redirect(url_for('reservar'))
+
+@app.route('/reservar/<int:reserva_id>/status', methods=['POST'])
+@login_required
+@profile_required(allowed_profiles=[1, 2])
+def alterar_status(reserva_id):
+    """Check-in, check-out ou cancelamento de uma reserva."""
+    success, message = handle_status_reserva(reserva_id, request.form.get('status', ''), request.form.get('observacao', ''))
+    flash(message, 'success' if success else 'danger')
+    if request.form.get('voltar') == 'historico':
+        return redirect(url_for('historico_reserva', reserva_id=reserva_id))
+    return redirect(url_for('reservar'))
+
+@app.route('/reservar/<int:reserva_id>/historico')
 @login_required
 @profile_required(allowed_profiles=[1, 2])
+def historico_reserva(reserva_id):
+    """Trilha de auditoria das mudanças de status da reserva."""
+    reserva, historico = get_historico_reserva_data(reserva_id)
+    if reserva is None:
+        abort(404)
+    return render_template(
+        'historico_reserva.html', reserva=reserva, historico=historico,
+        transicoes=TRANSICOES_RESERVA, theme=get_theme_from_cookie(request)
+    )
+
+# A exclusão física fica restrita ao administrador (lançamentos por engano);
+# no dia a dia as reservas são canceladas e permanecem no histórico.
+@app.route('/reservar/delete/<int:reserva_id>', methods=['POST'])
+@login_required
+@profile_required(allowed_profiles=[1])
 def deletar_reserva(reserva_id):
     """Deleta uma reserva específica."""
     success, message = handle_delete_reservation(reserva_id)
@@ -132,13 +335,109 @@ def deletar_reserva(reserva_id):
         flash(message, 'danger')
     return redirect(url_for('reservar'))
 
+@app.route('/calendario')
+@login_required
+@profile_required(allowed_profiles=[1, 2])
+def calendario():
+    """Grade de ocupação de todos os quartos por noite."""
+    hoje = datetime.now().date()
+    inicio = request.args.get('inicio', hoje.strftime('%Y-%m-%d'))
+    fim = request.args.get('fim', (hoje + timedelta(days=30)).strftime('%Y-%m-%d'))
+
+    versoes = versoes_tabelas('quartos', 'reservas') # Chave do fragmento em cache da grade
+    datas, linhas, error_msg = get_calendario_data(inicio, fim)
+    if error_msg:
+        flash(error_msg, 'warning')
+    return render_template('calendario.html', datas=datas, linhas=linhas, inicio=inicio, fim=fim, versoes=versoes, theme=get_theme_from_cookie(request))
+
+# --- Rotas de Relatórios (Administrador) ---
+
+@app.route('/relatorios')
+@login_required
+@profile_required(allowed_profiles=[1])
+def relatorios():
+    """Relatório de ocupação, ADR e RevPAR por dia, mês e quarto."""
+    hoje = datetime.now().date()
+    default_inicio = hoje.replace(day=1).strftime('%Y-%m-%d')
+    default_fim = (hoje.replace(day=28) + timedelta(days=4)).replace(day=1).strftime('%Y-%m-%d')
+    inicio = request.args.get('inicio', default_inicio)
+    fim = request.args.get('fim', default_fim)
+
+    relatorio, error_msg = get_relatorio_ocupacao(inicio, fim)
+    if error_msg:
+        flash(error_msg, 'warning')
+    propriedades = get_propriedades_data()
+    # Comparativo da rede: só faz sentido com mais de um hotel cadastrado
+    rede = get_relatorio_rede(inicio, fim)[0] if len(propriedades) > 1 and not error_msg else None
+    return render_template(
+        'relatorios.html', relatorio=relatorio, rede=rede, propriedades=propriedades,
+        inicio=inicio, fim=fim, theme=get_theme_from_cookie(request)
+    )
+
+@app.route('/propriedade', methods=['POST'])
+@login_required
+@profile_required(allowed_profiles=[1])
+def trocar_propriedade():
+    """Administrador: passa a operar outro hotel da rede."""
+    success, message = handle_trocar_propriedade(request.form.get('propriedade_id'))
+    flash(message, 'success' if success else 'danger')
+    return redirect(request.referrer or url_for('home'))
+
+@app.route('/tarifas', methods=['GET', 'POST'])
+@login_required
+@profile_required(allowed_profiles=[1])
+def tarifas():
+    """Cadastro das regras de tarifa (temporadas, fins de semana, permanência)."""
+    if request.method == 'POST':
+        success, message = handle_create_regra_tarifa(request.form)
+        flash(message, 'success' if success else 'danger')
+        return redirect(url_for('tarifas'))
+    return render_template(
+        'tarifas.html',
+        regras=get_regras_tarifa_data(),
+        tipos=TIPOS_REGRA_TARIFA,
+        quartos=get_quartos_data(),
+        theme=get_theme_from_cookie(request)
+    )
+
+@app.route('/tarifas/delete/<int:id_regra>', methods=['POST'])
+@login_required
+@profile_required(allowed_profiles=[1])
+def delete_tarifa(id_regra):
+    """Remove uma regra de tarifa."""
+    success, message = handle_delete_regra_tarifa(id_regra)
+    flash(message, 'success' if success else 'danger')
+    return redirect(url_for('tarifas'))
+
+@app.route('/exportar/<tabela>.<formato>')
+@login_required
+@profile_required(allowed_profiles=[1])
+def exportar_tabela(tabela, formato):
+    """Baixa reservas ou quartos em CSV/JSONL, gerados em streaming."""
+    if tabela not in ('reservas', 'quartos') or formato not in FORMATOS:
+        abort(404)
+    mimetype = 'text/csv' if formato == 'csv' else 'application/x-ndjson'
+    # O banco da propriedade é resolvido aqui: o teardown volta ao banco
+    # principal antes de o corpo da resposta ser gerado
+    return Response(
+        stream_with_context(exportar(tabela, formato, get_database())),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={tabela}.{formato}'}
+    )
+
 # --- Rotas de Cookies ---
 
 @app.route('/set_theme/<theme>', methods=['GET'])
 @login_required
 def set_theme(theme):
-    """Define a preferência de tema e retorna para a página anterior."""
-    response = redirect(request.referrer or url_for('home'))
+    """
+    Define a preferência de tema. Chamado pelo script.js (fetch), responde
+    204 e o tema é trocado na própria página; sem JavaScript, volta à página anterior.
+    """
+    if request.headers.get('X-Requested-With') == 'fetch':
+        response = app.response_class(status=204)
+    else:
+        response = redirect(request.referrer or url_for('home'))
     return set_theme_cookie(response, theme)
 
 # --- Rotas da Camareira ---
@@ -153,8 +452,36 @@ def quartos():
         flash(message, 'success' if success else 'danger')
         return redirect(url_for('quartos'))
 
+    versoes = versoes_tabelas('quartos') # Chave do fragmento em cache da tabela
     quartos = get_quartos_data()
-    return render_template('quartos.html', quartos=quartos, theme=get_theme_from_cookie(request))
+    return render_template('quartos.html', quartos=quartos, status_limpeza=STATUS_LIMPEZA, versoes=versoes, theme=get_theme_from_cookie(request))
+
+@app.route('/quartos/lote', methods=['POST'])
+@login_required
+@profile_required(allowed_profiles=[3])  # Apenas Camareira
+def quartos_lote():
+    """
+    Atualiza o status de vários quartos de uma vez. Aceita o formulário da
+    página de quartos ou JSON: {"atualizacoes": [{"numero_quarto": ..., "status_limpeza": ...}]}.
+    """
+    if request.is_json:
+        dados = request.get_json(silent=True) or {}
+        atualizacoes = dados.get('atualizacoes')
+        if not isinstance(atualizacoes, list) or not all(isinstance(item, dict) for item in atualizacoes):
+            return jsonify({'erro': "Envie 'atualizacoes' como uma lista de objetos."}), 400
+        resultados = handle_update_quartos_lote(atualizacoes)
+        return jsonify({'resultados': resultados})
+
+    resultados = handle_update_quartos_lote(parse_quartos_lote_form(request.form))
+    atualizados = [r['numero_quarto'] for r in resultados if r['success']]
+    if atualizados:
+        flash(f"Status atualizado: quarto(s) {', '.join(atualizados)}.", 'success')
+    for r in resultados:
+        if not r['success']:
+            flash(f"Quarto {r['numero_quarto']}: {r['message']}", 'danger')
+    if not resultados:
+        flash('Nenhuma alteração de status para salvar.', 'info')
+    return redirect(url_for('quartos'))
 
 
 # --- Rotas do Hóspede ---
@@ -162,10 +489,38 @@ def quartos():
 @login_required
 @profile_required(allowed_profiles=[4])  # Apenas Hóspede
 def minhas_reservas():
-    nome_hospede = session.get('user_name')
-    reservas = get_reservas_hospede(nome_hospede)
-    return render_template('minhas_reservas.html', reservas=reservas, theme=get_theme_from_cookie(request))
+    reservas, proximo_cursor = get_reservas_hospede(session.get('user_id'), cursor=request.args.get('cursor'))
+    proxima_pagina = url_for('minhas_reservas', cursor=proximo_cursor) if proximo_cursor else None
+    return render_template('minhas_reservas.html', reservas=reservas, proxima_pagina=proxima_pagina, theme=get_theme_from_cookie(request))
+
+# --- Eventos em Tempo Real (SSE) ---
+
+@app.route('/eventos')
+@login_required
+def eventos():
+    """
+    Canal Server-Sent Events com as mudanças de quartos e reservas. As páginas
+    aplicam os eventos recebidos (static/js/eventos.js) em vez de recarregar.
+    """
+    tipos = get_tipos_evento(session.get('profile_id'))
+    if not tipos:
+        abort(403)
+    desde_id = parse_last_event_id(request.headers.get('Last-Event-ID'))
+    difusor = get_difusor(get_database()) # Log de eventos da propriedade do usuário
+    assinar_async = request.environ.get('hotel.asgi.sse')
+    if assinar_async is not None:
+        # Servidor ASGI (asgi.py): as mensagens são enviadas pelo event loop
+        assinar_async(difusor, tipos, desde_id)
+        corpo = iter(())
+    else:
+        corpo = stream_with_context(difusor.assinar(tipos, desde_id))
+    return Response(
+        corpo,
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 # --- Rodar o App ---
+# Servidor de desenvolvimento. Em produção, use o asgi.py (ver README).
 if __name__ == '__main__':
     app.run(debug=True, port=5006)
\ No newline at end of file
@@ -0,0 +1,219 @@
+import asyncio
+import contextvars
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from app import app
+
+# --- Servidor ASGI (produção) ---
+# Ponto de entrada para servidores ASGI (uvicorn, hypercorn):
+#
+#     uvicorn asgi:application --host 0.0.0.0 --port 5006 --workers 4
+#
+# O event loop cuida das conexões: recebe o corpo da requisição e envia a
+# resposta sem prender uma thread enquanto os bytes trafegam pela rede lenta
+# dos tablets. Apenas o app Flask (views, model.py, SQLite, bcrypt) roda em
+# um pool de ASGI_THREADS threads por processo, então um processo atende
+# muito mais sessões simultâneas do que threads abertas. Os canais SSE
+# (/eventos) aguardam no próprio event loop, sem ocupar o pool.
+#
+# Dimensionamento: --workers = núcleos da máquina (as escritas no SQLite já
+# são serializadas pelo banco; mais processos paralelizam leituras e bcrypt)
+# e ASGI_THREADS entre 8 e 16 (threads que aguardam o banco ou o pool do
+# bcrypt, não CPU). Sessões (sessoes.db) e eventos ficam no banco, então
+# qualquer worker atende qualquer requisição.
+#
+# Configuração (app.config):
+#   ASGI_THREADS     -> threads do pool que executa o app Flask (16)
+#   ASGI_MAX_CORPO   -> bytes aceitos no corpo de uma requisição (10 MB)
+
+ASGI_THREADS = 16
+ASGI_MAX_CORPO = 10 * 1024 * 1024
+RESPOSTA_LOTE = 64 * 1024 # Bytes lidos do app por ida ao pool
+
+
+class AplicacaoASGI:
+    """Adapta um app WSGI (Flask) para ASGI, executando-o em um pool limitado."""
+
+    def __init__(self, wsgi_app, threads=ASGI_THREADS, max_corpo=ASGI_MAX_CORPO):
+        self.wsgi_app = wsgi_app
+        self.threads = threads
+        self.max_corpo = max_corpo
+        self._executor = None
+
+    @property
+    def executor(self):
+        # Criado sob demanda, caso o servidor não envie os eventos de lifespan
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='asgi')
+        return self._executor
+
+    def executar(self, funcao, *args):
+        """Roda funcao(*args) no pool; retorna um awaitable."""
+        return asyncio.get_running_loop().run_in_executor(self.executor, funcao, *args)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            mensagem = await receive()
+            if mensagem['type'] == 'lifespan.startup':
+                self.executor # Cria o pool já na inicialização
+                await send({'type': 'lifespan.startup.complete'})
+            elif mensagem['type'] == 'lifespan.shutdown':
+                if self._executor is not None:
+                    self._executor.shutdown(wait=True)
+                    self._executor = None
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _ler_corpo(self, receive):
+        corpo = io.BytesIO()
+        while True:
+            mensagem = await receive()
+            if mensagem['type'] == 'http.disconnect':
+                return None
+            corpo.write(mensagem.get('body', b''))
+            if corpo.tell() > self.max_corpo:
+                return False
+            if not mensagem.get('more_body'):
+                corpo.seek(0)
+                return corpo
+
+    async def _http(self, scope, receive, send):
+        corpo = await self._ler_corpo(receive)
+        if corpo is None:
+            return
+        if corpo is False:
+            await _responder_erro(send, 413, b'Corpo da requisicao muito grande.')
+            return
+
+        environ = _montar_environ(scope, corpo)
+        assinatura = {}
+        # /eventos registra aqui o canal SSE em vez de devolver um gerador bloqueante
+        environ['hotel.asgi.sse'] = lambda difusor, tipos, desde_id: assinatura.update(
+            difusor=difusor, tipos=tipos, desde_id=desde_id
+        )
+        # O Flask guarda o contexto da requisição em contextvars: o app e a leitura
+        # da resposta (que pode continuar em outra thread do pool) rodam no mesmo Context
+        contexto = contextvars.Context()
+        status, cabecalhos, partes, fim, iteravel, iterador = await self.executar(contexto.run, self._iniciar, environ)
+
+        desconexao = asyncio.ensure_future(_aguardar_desconexao(receive))
+        try:
+            await send({'type': 'http.response.start', 'status': status, 'headers': cabecalhos})
+            if assinatura:
+                await self._enviar_eventos(send, partes, assinatura, desconexao)
+                return
+            while True:
+                for parte in partes:
+                    await send({'type': 'http.response.body', 'body': parte, 'more_body': True})
+                if fim or desconexao.done():
+                    break
+                partes, fim = await self.executar(contexto.run, _ler_lote, iterador)
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+        finally:
+            desconexao.cancel()
+            if hasattr(iteravel, 'close'):
+                await self.executar(contexto.run, iteravel.close)
+
+    def _iniciar(self, environ):
+        # Na thread do pool: executa o app e já lê o primeiro lote da resposta
+        resposta = {}
+
+        def start_response(status, headers, exc_info=None):
+            resposta['status'] = int(status.split(' ', 1)[0])
+            resposta['headers'] = [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers]
+            return lambda dados: None # write() legado: o Flask não o utiliza
+
+        iteravel = self.wsgi_app(environ, start_response)
+        iterador = iter(iteravel)
+        partes, fim = _ler_lote(iterador)
+        return resposta['status'], resposta['headers'], partes, fim, iteravel, iterador
+
+    async def _enviar_eventos(self, send, partes, assinatura, desconexao):
+        for parte in partes:
+            await send({'type': 'http.response.body', 'body': parte, 'more_body': True})
+        mensagens = assinatura['difusor'].assinar_async(assinatura['tipos'], assinatura['desde_id'], executar=self.executar)
+        try:
+            while True:
+                proxima = asyncio.ensure_future(mensagens.__anext__())
+                await asyncio.wait({proxima, desconexao}, return_when=asyncio.FIRST_COMPLETED)
+                if not proxima.done():
+                    proxima.cancel()
+                    await asyncio.gather(proxima, return_exceptions=True) # Espera o gerador parar antes do aclose()
+                    break
+                await send({'type': 'http.response.body', 'body': proxima.result().encode('utf-8'), 'more_body': True})
+        finally:
+            await mensagens.aclose()
+
+
+def _ler_lote(iterador):
+    # Lê partes da resposta até RESPOSTA_LOTE bytes; retorna (partes, terminou)
+    partes, total = [], 0
+    for parte in iterador:
+        if parte:
+            partes.append(parte)
+            total += len(parte)
+        if total >= RESPOSTA_LOTE:
+            return partes, False
+    return partes, True
+
+async def _aguardar_desconexao(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+async def _responder_erro(send, status, mensagem):
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': [(b'content-type', b'text/plain; charset=utf-8')]})
+    await send({'type': 'http.response.body', 'body': mensagem})
+
+def _montar_environ(scope, corpo):
+    """Monta o environ WSGI (PEP 3333) a partir do scope HTTP do ASGI."""
+    servidor = scope.get('server') or ('localhost', 80)
+    tamanho = corpo.seek(0, io.SEEK_END)
+    corpo.seek(0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': servidor[0],
+        'SERVER_PORT': str(servidor[1] or 80),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': corpo,
+        'wsgi.input_terminated': True,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'], environ['REMOTE_PORT'] = scope['client'][0], str(scope['client'][1])
+    for nome, valor in scope['headers']:
+        nome = nome.decode('latin-1').upper().replace('-', '_')
+        valor = valor.decode('latin-1')
+        if nome == 'CONTENT_TYPE' or nome == 'CONTENT_LENGTH':
+            chave = nome
+        else:
+            chave = f'HTTP_{nome}'
+        if chave in environ:
+            valor = environ[chave] + ('; ' if chave == 'HTTP_COOKIE' else ',') + valor
+        environ[chave] = valor
+    # O corpo já foi lido por inteiro: o tamanho real vale mais que o cabeçalho
+    # (que falta em uploads chunked; sem ele, o Werkzeug leria um corpo vazio)
+    environ['CONTENT_LENGTH'] = str(tamanho)
+    return environ
+
+
+application = AplicacaoASGI(
+    app,
+    threads=app.config.get('ASGI_THREADS', ASGI_THREADS),
+    max_corpo=app.config.get('ASGI_MAX_CORPO', ASGI_MAX_CORPO),
+)
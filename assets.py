@@ -0,0 +1,180 @@
+import gzip
+import hashlib
+import os
+import threading
+from flask import request
+import model
+from cache import CacheTTL
+
+try:
+    import brotli # Opcional: sem ele, as respostas são comprimidas só com gzip
+except ImportError:
+    brotli = None
+
+# --- Estáticos, Compressão e Cache de Fragmentos ---
+# Reduz os bytes enviados aos tablets da rede Wi-Fi do hotel:
+#   - url_for('static', ...) ganha ?v=<hash do conteúdo>; com o hash atual, o
+#     arquivo é servido com cache "imutável" de um ano (um arquivo alterado
+#     muda de URL, então o navegador nunca usa uma versão velha);
+#   - HTML, JSON, CSS e JS acima de COMPRESSAO_MINIMO bytes vão comprimidos
+#     (brotli, se instalado e aceito pelo cliente, senão gzip). Os estáticos
+#     são comprimidos uma vez, no nível máximo, e guardados em memória;
+#   - fragmento() guarda o HTML renderizado de trechos iguais para todos os
+#     perfis (grade do calendário, tabela de quartos), com as versões das
+#     tabelas na chave: qualquer escrita gera um fragmento novo.
+#
+# Configuração (app.config):
+#   ASSETS_COMPRESSAO_MINIMO -> bytes a partir dos quais a resposta é comprimida (1024)
+
+COMPRESSAO_MINIMO = 1024 # Bytes; abaixo disso, o cabeçalho gzip não compensa
+COMPRESSAO_TIPOS = {
+    'text/html', 'application/json', 'text/css', 'text/javascript',
+    'application/javascript', 'text/plain', 'image/svg+xml',
+}
+GZIP_NIVEL = 6 # Respostas dinâmicas: bom equilíbrio entre CPU e tamanho
+BROTLI_QUALIDADE = 5
+ESTATICO_MAX_AGE = 31536000 # Um ano (segundos)
+FRAGMENTOS_TTL = 300.0 # Segundos; a chave já muda a cada escrita
+FRAGMENTOS_MAXSIZE = 256
+
+
+def _codificacoes():
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+def comprimir(dados, codificacao, maximo=False):
+    """Comprime os bytes com 'br' ou 'gzip' (no nível máximo para estáticos)."""
+    if codificacao == 'br':
+        return brotli.compress(dados, quality=11 if maximo else BROTLI_QUALIDADE)
+    return gzip.compress(dados, compresslevel=9 if maximo else GZIP_NIVEL, mtime=0)
+
+
+class Estaticos:
+    """Hashes de conteúdo e versões comprimidas dos arquivos de static/."""
+
+    def __init__(self, pasta):
+        self.pasta = pasta
+        self._lock = threading.Lock()
+        self._hashes = {} # arquivo -> (mtime, hash)
+        self._comprimidos = {} # (arquivo, hash, codificacao) -> bytes
+
+    def _caminho(self, arquivo):
+        caminho = os.path.realpath(os.path.join(self.pasta, arquivo))
+        if not caminho.startswith(os.path.realpath(self.pasta) + os.sep):
+            return None
+        return caminho
+
+    def versao(self, arquivo):
+        """Hash (12 caracteres) do conteúdo atual do arquivo, ou None se não existir."""
+        caminho = self._caminho(arquivo)
+        try:
+            mtime = os.stat(caminho).st_mtime_ns if caminho else None
+        except OSError:
+            return None
+        if mtime is None:
+            return None
+        item = self._hashes.get(arquivo)
+        if item is not None and item[0] == mtime:
+            return item[1]
+        with open(caminho, 'rb') as f:
+            versao = hashlib.sha256(f.read()).hexdigest()[:12]
+        with self._lock:
+            self._hashes[arquivo] = (mtime, versao)
+        return versao
+
+    def comprimido(self, arquivo, versao, codificacao):
+        """Conteúdo do arquivo comprimido (calculado uma vez por versão)."""
+        chave = (arquivo, versao, codificacao)
+        dados = self._comprimidos.get(chave)
+        if dados is None:
+            with open(self._caminho(arquivo), 'rb') as f:
+                dados = comprimir(f.read(), codificacao, maximo=True)
+            with self._lock:
+                self._comprimidos[chave] = dados
+        return dados
+
+
+_cache_fragmentos = CacheTTL(maxsize=FRAGMENTOS_MAXSIZE, ttl=FRAGMENTOS_TTL)
+
+def fragmento(nome, *chave, caller):
+    """
+    Uso no template: {% call fragmento('nome', chave...) %}...{% endcall %}.
+    O corpo só é renderizado quando (nome, chave) não está em cache; a chave
+    deve conter tudo de que o trecho depende (ver versoes_tabelas()).
+    """
+    return _cache_fragmentos.get_or_load((model.get_database(), nome) + chave, caller)
+
+def versoes_tabelas(*tabelas):
+    """
+    Versões atuais das tabelas, para compor a chave de um fragmento. Deve ser
+    chamada antes de carregar os dados do trecho, para que o conteúdo nunca
+    seja mais antigo que a chave sob a qual fica guardado.
+    """
+    versoes = model.get_table_versions(tabelas)
+    if 'quartos' in versoes:
+        model.sincronizar_cache_quartos(versoes['quartos'][0])
+    return tuple(versoes[tabela][0] for tabela in tabelas)
+
+
+def _escolher_codificacao():
+    melhor = request.accept_encodings.best_match(_codificacoes())
+    return melhor if melhor and request.accept_encodings[melhor] > 0 else None
+
+def _marcar_variante(response, codificacao):
+    response.headers['Content-Encoding'] = codificacao
+    # O corpo mudou: o ETag passa a ser fraco (a comparação do If-None-Match continua valendo)
+    etag, _ = response.get_etag()
+    if etag:
+        response.set_etag(etag, weak=True)
+
+
+def init_assets(app):
+    """Ativa os estáticos versionados, a compressão e o cache de fragmentos no app."""
+    estaticos = Estaticos(app.static_folder)
+    minimo = app.config.get('ASSETS_COMPRESSAO_MINIMO', COMPRESSAO_MINIMO)
+    app.jinja_env.globals['fragmento'] = fragmento
+
+    @app.url_defaults
+    def versionar_estatico(endpoint, values):
+        if endpoint == 'static' and 'filename' in values and 'v' not in values:
+            versao = estaticos.versao(values['filename'])
+            if versao:
+                values['v'] = versao
+
+    @app.after_request
+    def otimizar_resposta(response):
+        estatico = request.endpoint == 'static'
+        if estatico:
+            arquivo = request.view_args.get('filename')
+            versao = estaticos.versao(arquivo)
+            if versao and request.args.get('v') == versao:
+                response.cache_control.public = True
+                response.cache_control.max_age = ESTATICO_MAX_AGE
+                response.cache_control.immutable = True
+                response.cache_control.no_cache = None
+
+        if response.mimetype not in COMPRESSAO_TIPOS:
+            return response
+        response.vary.add('Accept-Encoding')
+        if response.status_code != 200 or 'Content-Encoding' in response.headers:
+            return response
+
+        if estatico:
+            codificacao = _escolher_codificacao()
+            if versao and codificacao and os.path.getsize(estaticos._caminho(arquivo)) >= minimo:
+                response.close() # Descarta o arquivo aberto pelo send_file
+                response.direct_passthrough = False
+                response.set_data(estaticos.comprimido(arquivo, versao, codificacao))
+                _marcar_variante(response, codificacao)
+            return response
+
+        # Respostas em streaming (exportação, SSE) seguem sem compressão
+        if response.direct_passthrough or response.is_streamed:
+            return response
+        dados = response.get_data()
+        if len(dados) < minimo:
+            return response
+        codificacao = _escolher_codificacao()
+        if codificacao:
+            response.set_data(comprimir(dados, codificacao))
+            _marcar_variante(response, codificacao)
+        return response
@@ -0,0 +1,193 @@
+import bisect
+import threading
+from datetime import date
+
+# --- Índice de Disponibilidade em Memória ---
+# Mantém, para cada quarto, os períodos reservados ordenados por check-in.
+# Junto com cada lista é guardado o maior check-out visto até cada posição
+# (máximo prefixado), o que permite responder "há conflito?" com uma única
+# busca binária, mesmo que existam períodos sobrepostos no histórico.
+
+class _PeriodosQuarto:
+    """Períodos reservados de um único quarto, ordenados por check-in."""
+
+    def __init__(self):
+        self.checkins = []
+        self.checkouts = []
+        self.ids = []
+        self.max_checkout = [] # max_checkout[i] = max(checkouts[0..i])
+
+    def _recalcular_maximo(self, inicio):
+        """Recalcula o máximo prefixado a partir da posição informada."""
+        del self.max_checkout[inicio:]
+        maximo = self.max_checkout[-1] if self.max_checkout else None
+        for checkout in self.checkouts[inicio:]:
+            if maximo is None or checkout > maximo:
+                maximo = checkout
+            self.max_checkout.append(maximo)
+
+    def adicionar(self, checkin, checkout, id_reserva):
+        pos = bisect.bisect_right(self.checkins, checkin)
+        self.checkins.insert(pos, checkin)
+        self.checkouts.insert(pos, checkout)
+        self.ids.insert(pos, id_reserva)
+        self._recalcular_maximo(pos)
+
+    def remover(self, id_reserva):
+        pos = self.ids.index(id_reserva)
+        del self.checkins[pos]
+        del self.checkouts[pos]
+        del self.ids[pos]
+        self._recalcular_maximo(pos)
+
+    def tem_conflito(self, checkin, checkout):
+        # Candidatos: períodos com check-in anterior ao novo check-out.
+        # Há conflito se algum deles terminar depois do novo check-in.
+        pos = bisect.bisect_left(self.checkins, checkout)
+        return pos > 0 and self.max_checkout[pos - 1] > checkin
+
+
+class IndiceDisponibilidade:
+    """Índice de ocupação por quarto, seguro para uso entre threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._quartos = {} # numero_quarto -> _PeriodosQuarto
+        self._quarto_da_reserva = {} # id_reserva -> numero_quarto
+        self.carregado = False
+
+    def carregar(self, reservas):
+        """Reconstrói o índice a partir de (id_reserva, numero_quarto, checkin, checkout)."""
+        with self._lock:
+            self._quartos = {}
+            self._quarto_da_reserva = {}
+            for id_reserva, numero_quarto, checkin, checkout in reservas:
+                self._adicionar(id_reserva, numero_quarto, checkin, checkout)
+            self.carregado = True
+
+    def _adicionar(self, id_reserva, numero_quarto, checkin, checkout):
+        periodos = self._quartos.get(numero_quarto)
+        if periodos is None:
+            periodos = self._quartos[numero_quarto] = _PeriodosQuarto()
+        periodos.adicionar(checkin, checkout, id_reserva)
+        self._quarto_da_reserva[id_reserva] = numero_quarto
+
+    def adicionar(self, id_reserva, numero_quarto, checkin, checkout):
+        """Registra uma nova reserva ativa."""
+        with self._lock:
+            self._adicionar(id_reserva, numero_quarto, checkin, checkout)
+
+    def remover(self, id_reserva):
+        """Remove uma reserva do índice (ignora ids desconhecidos)."""
+        with self._lock:
+            numero_quarto = self._quarto_da_reserva.pop(id_reserva, None)
+            if numero_quarto is not None:
+                self._quartos[numero_quarto].remover(id_reserva)
+
+    def invalidar(self):
+        """Descarta o conteúdo; o índice será recarregado no próximo uso."""
+        with self._lock:
+            self._quartos = {}
+            self._quarto_da_reserva = {}
+            self.carregado = False
+
+    def tem_conflito(self, numero_quarto, checkin, checkout):
+        """Indica se o quarto possui reserva conflitante no período."""
+        with self._lock:
+            periodos = self._quartos.get(numero_quarto)
+            return periodos is not None and periodos.tem_conflito(checkin, checkout)
+
+    def quartos_ocupados(self, checkin, checkout):
+        """Retorna o conjunto de quartos com reserva conflitante no período."""
+        with self._lock:
+            return {
+                numero_quarto
+                for numero_quarto, periodos in self._quartos.items()
+                if periodos.tem_conflito(checkin, checkout)
+            }
+
+
+# --- Índice de Quartos (capacidade, preço e atributos) ---
+# Os quartos são agrupados por capacidade e, em cada grupo, ordenados por
+# preço. Uma busca "N hóspedes, até R$ X" pula por busca binária os grupos
+# pequenos demais e, em cada grupo restante, os quartos acima do preço;
+# os atributos viram bits de uma máscara, comparada com um único AND.
+
+class IndiceQuartos:
+    """Índice imutável dos quartos, reconstruído junto com o catálogo."""
+
+    def __init__(self, quartos):
+        """quartos: (numero_quarto, capacidade_maxima, preco_diaria_base, atributos)."""
+        self._bits = {} # atributo -> bit da máscara
+        grupos = {}
+        for numero_quarto, capacidade, preco, atributos in quartos:
+            mascara = 0
+            for atributo in atributos:
+                mascara |= self._bits.setdefault(atributo, 1 << len(self._bits))
+            grupos.setdefault(capacidade, []).append((preco, numero_quarto, mascara))
+
+        self.capacidades = sorted(grupos)
+        self._precos = [] # por capacidade: preços em ordem crescente
+        self._quartos = [] # por capacidade: (numero_quarto, máscara), na mesma ordem
+        for capacidade in self.capacidades:
+            itens = sorted(grupos[capacidade])
+            self._precos.append([preco for preco, _, _ in itens])
+            self._quartos.append([(numero_quarto, mascara) for _, numero_quarto, mascara in itens])
+
+    def atributos(self):
+        """Atributos existentes em algum quarto, em ordem alfabética."""
+        return sorted(self._bits)
+
+    def buscar(self, hospedes=1, preco_max=None, atributos=(), excluir=frozenset()):
+        """
+        Números dos quartos com capacidade >= hospedes, diária base <= preco_max
+        e todos os atributos pedidos, exceto os de `excluir` (ex.: ocupados).
+        Ordem: menor capacidade suficiente primeiro e, dentro dela, menor preço.
+        """
+        exigida = 0
+        for atributo in atributos:
+            bit = self._bits.get(atributo)
+            if bit is None:
+                return [] # Nenhum quarto possui o atributo
+            exigida |= bit
+
+        resultado = []
+        inicio = bisect.bisect_left(self.capacidades, hospedes)
+        for precos, quartos in zip(self._precos[inicio:], self._quartos[inicio:]):
+            fim = len(precos) if preco_max is None else bisect.bisect_right(precos, preco_max)
+            for numero_quarto, mascara in quartos[:fim]:
+                if mascara & exigida == exigida and numero_quarto not in excluir:
+                    resultado.append(numero_quarto)
+        return resultado
+
+
+# --- Calendário de Ocupação ---
+
+LIVRE = 0
+OCUPADO = 1
+
+_PARA_TEXTO = bytes.maketrans(bytes([LIVRE, OCUPADO]), b'01')
+
+def montar_calendario(quartos, reservas, inicio, fim):
+    """
+    Monta a grade quarto x noite para inicio <= noite < fim (datas).
+    reservas: (numero_quarto, data_checkin, data_checkout) já filtradas pelo
+    período. Cada quarto vira um bytearray com um byte por noite, preenchido
+    por fatias (um passo por reserva, não por noite).
+    """
+    noites = (fim - inicio).days
+    grade = {numero_quarto: bytearray(noites) for numero_quarto in quartos}
+    base = inicio.toordinal()
+    for numero_quarto, data_checkin, data_checkout in reservas:
+        linha = grade.get(numero_quarto)
+        if linha is None:
+            continue
+        a = max(date.fromisoformat(data_checkin).toordinal() - base, 0)
+        b = min(date.fromisoformat(data_checkout).toordinal() - base, noites)
+        if a < b:
+            linha[a:b] = bytes([OCUPADO]) * (b - a)
+    return grade
+
+def calendario_para_texto(linha):
+    """Representação compacta de uma linha da grade: '0' livre, '1' ocupado."""
+    return bytes(linha).translate(_PARA_TEXTO).decode('ascii')
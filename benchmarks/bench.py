@@ -0,0 +1,270 @@
+"""
+Benchmarks dos caminhos críticos (disponibilidade, reserva, listagem, login)
+e teste de carga das rotas Flask com clientes concorrentes.
+
+Cria um hotel sintético (N quartos, M anos de reservas) em um banco SQLite
+temporário, mede latência (p50/p99) e vazão e compara com uma baseline salva.
+
+    python benchmarks/bench.py                       # roda e compara com a baseline
+    python benchmarks/bench.py --salvar-baseline     # grava a baseline desta máquina
+    python benchmarks/bench.py --quartos 500 --anos 3 --clientes 16
+
+Sai com código 1 se alguma métrica piorar além da tolerância. A baseline é
+específica da máquina: gere-a no mesmo ambiente em que a comparação roda.
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PADRAO = os.path.join(RAIZ, 'benchmarks', 'baseline.json')
+
+# --- Hotel Sintético ---
+
+def popular_banco(model, quartos, anos, semente):
+    """Insere `quartos` quartos e `anos` anos de reservas sem sobreposição."""
+    rnd = random.Random(semente)
+    numeros = [f'{andar}{i:02d}' for andar in range(1, 100) for i in range(1, 100)][:quartos]
+    inicio = date.today() - timedelta(days=365 * anos)
+    fim = date.today() + timedelta(days=180)
+    hospedes = ['Hóspede'] + [f'Hóspede Sintético {i}' for i in range(500)]
+    id_hospede = model.get_user_by_email('hospede@hotel.com')['id']
+
+    def inserir(cursor):
+        atributos = ('varanda', 'banheira', 'vista_mar', 'acessivel', 'cama_casal')
+        cursor.executemany(
+            "INSERT OR IGNORE INTO quartos (numero_quarto, capacidade_maxima, preco_diaria_base, status_limpeza, atributos) VALUES (?, ?, ?, ?, ?)",
+            [
+                (numero, rnd.choice((1, 2, 2, 3, 4)), rnd.choice((100.0, 150.0, 250.0, 400.0)), 'Limpo',
+                 ','.join(a for a in atributos if rnd.random() < 0.3))
+                for numero in numeros
+            ]
+        )
+        reservas = []
+        for numero in numeros:
+            dia = inicio + timedelta(days=rnd.randint(0, 5))
+            while dia < fim:
+                noites = rnd.randint(1, 7)
+                checkout = dia + timedelta(days=noites)
+                status = 'Cancelada' if rnd.random() < 0.05 else 'Confirmada'
+                hospede = rnd.choice(hospedes)
+                usuario_id = id_hospede if hospede == 'Hóspede' else None
+                reservas.append((numero, hospede, dia.isoformat(), checkout.isoformat(), status, noites * 150.0, usuario_id))
+                dia = checkout + timedelta(days=rnd.randint(0, 4))
+        cursor.executemany('''
+            INSERT INTO reservas (numero_quarto, nome_hospede, data_checkin, data_checkout, status_reserva, valor_total, usuario_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', reservas)
+        return len(reservas)
+
+    total = model.executar_transacao(inserir)
+    model.rebuild_ocupacao_diaria()
+    model.get_connection().execute("ANALYZE")
+    model.invalidar_cache_quartos()
+    return numeros, total
+
+# --- Medição ---
+
+def percentil(amostras, p):
+    ordenadas = sorted(amostras)
+    if not ordenadas:
+        return 0.0
+    return ordenadas[min(len(ordenadas) - 1, int(round(p / 100 * (len(ordenadas) - 1))))]
+
+def resumir(amostras, duracao):
+    return {
+        'n': len(amostras),
+        'p50_ms': percentil(amostras, 50) * 1000,
+        'p99_ms': percentil(amostras, 99) * 1000,
+        'ops_s': len(amostras) / duracao if duracao > 0 else 0.0,
+    }
+
+def medir(funcao, iteracoes):
+    """Executa funcao(i) `iteracoes` vezes; retorna o resumo das latências."""
+    amostras = []
+    inicio = time.perf_counter()
+    for i in range(iteracoes):
+        t = time.perf_counter()
+        funcao(i)
+        amostras.append(time.perf_counter() - t)
+    return resumir(amostras, time.perf_counter() - inicio)
+
+def periodo_aleatorio(rnd, dias_a_frente=365):
+    checkin = date.today() + timedelta(days=rnd.randint(0, dias_a_frente))
+    return checkin.isoformat(), (checkin + timedelta(days=rnd.randint(1, 7))).isoformat()
+
+# --- Microbenchmarks ---
+
+def microbenchmarks(app, model, controller, numeros, args):
+    rnd = random.Random(args.semente)
+    resultados = {}
+
+    periodos = [periodo_aleatorio(rnd) for _ in range(args.iteracoes)]
+    resultados['get_quartos_disponiveis'] = medir(
+        lambda i: model.get_quartos_disponiveis(*periodos[i]), args.iteracoes
+    )
+    resultados['buscar_quartos_disponiveis'] = medir(
+        lambda i: model.buscar_quartos_disponiveis(*periodos[i], hospedes=3, preco_max=300.0, atributos=('varanda',)),
+        args.iteracoes
+    )
+
+    # Datas bem no futuro: mistura reservas aceitas e conflitos
+    futuros = []
+    for _ in range(args.iteracoes):
+        checkin = date.today() + timedelta(days=rnd.randint(400, 700))
+        futuros.append((rnd.choice(numeros), checkin.isoformat(), (checkin + timedelta(days=rnd.randint(1, 5))).isoformat()))
+    resultados['add_reserva'] = medir(
+        lambda i: model.add_reserva(futuros[i][0], 'Benchmark', futuros[i][1], futuros[i][2], 100.0),
+        args.iteracoes
+    )
+
+    # Blocos de grupo (count mode): um único commit para todos os quartos
+    tamanho_bloco = min(20, len(numeros))
+    def reservar_bloco(i):
+        checkin = date.today() + timedelta(days=400 + i % 300)
+        controller.handle_create_bloco(
+            'Grupo Benchmark', checkin.isoformat(), (checkin + timedelta(days=2)).isoformat(), quantidade=tamanho_bloco
+        )
+    resultados[f'handle_create_bloco ({tamanho_bloco})'] = medir(reservar_bloco, max(1, args.iteracoes // 10))
+
+    resultados['get_all_reservas'] = medir(lambda i: model.get_all_reservas(), max(1, args.iteracoes // 50))
+
+    # O bcrypt é caro de propósito: poucas iterações, sem o limite de tentativas
+    controller._limite_login_ip = controller.RateLimiter(10 ** 9, 10 ** 9)
+    controller._limite_login_email = controller.RateLimiter(10 ** 9, 10 ** 9)
+
+    def autenticar(i):
+        with app.test_request_context('/login', method='POST'):
+            ok, _ = controller.authenticate_user('recepcionista@hotel.com', 'recepcionista123', '127.0.0.1')
+            assert ok
+    resultados['authenticate_user'] = medir(autenticar, args.logins)
+    return resultados
+
+# --- Carga nas Rotas ---
+
+ROTAS = (
+    # (rota, e-mail do usuário logado)
+    ('/reservar', 'recepcionista@hotel.com'),
+    ('/quartos', 'camareira@hotel.com'),
+    ('/minhas_reservas', 'hospede@hotel.com'),
+)
+
+def carga_rotas(app, model, args):
+    """Dispara `requisicoes` GETs por rota a partir de `clientes` threads."""
+    resultados = {}
+    for rota, email in ROTAS:
+        usuario = model.get_user_by_email(email)
+        amostras, erros = [], []
+        lock = threading.Lock()
+        por_cliente = max(1, args.requisicoes // args.clientes)
+
+        def cliente():
+            client = app.test_client()
+            with client.session_transaction() as sessao:
+                sessao.update(
+                    logged_in=True, user_id=usuario['id'], user_name=usuario['nome_completo'],
+                    user_email=email, profile_id=usuario['perfil_id']
+                )
+            locais = []
+            for _ in range(por_cliente):
+                t = time.perf_counter()
+                resposta = client.get(rota)
+                locais.append(time.perf_counter() - t)
+                if resposta.status_code != 200:
+                    with lock:
+                        erros.append(resposta.status_code)
+            with lock:
+                amostras.extend(locais)
+
+        threads = [threading.Thread(target=cliente) for _ in range(args.clientes)]
+        inicio = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        resultados[f'GET {rota}'] = dict(resumir(amostras, time.perf_counter() - inicio), erros=len(erros))
+    return resultados
+
+# --- Relatório e Baseline ---
+
+def comparar(resultados, baseline, tolerancia):
+    """Retorna as linhas do relatório e a lista de regressões."""
+    linhas = [f"{'benchmark':32} {'n':>6} {'p50 ms':>10} {'p99 ms':>10} {'ops/s':>10}  vs baseline"]
+    regressoes = []
+    for nome, atual in resultados.items():
+        anterior = (baseline or {}).get(nome)
+        comparacao = ''
+        if anterior:
+            variacoes = []
+            for metrica in ('p50_ms', 'p99_ms'):
+                if anterior[metrica] > 0:
+                    razao = atual[metrica] / anterior[metrica]
+                    variacoes.append(f"{metrica[:3]} {razao - 1:+.0%}")
+                    if razao > 1 + tolerancia:
+                        regressoes.append(f"{nome}: {metrica} {anterior[metrica]:.2f} -> {atual[metrica]:.2f} ms")
+            comparacao = ', '.join(variacoes)
+        linhas.append(
+            f"{nome:32} {atual['n']:>6} {atual['p50_ms']:>10.2f} {atual['p99_ms']:>10.2f} {atual['ops_s']:>10.1f}  {comparacao}"
+        )
+    return linhas, regressoes
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--quartos', type=int, default=200)
+    parser.add_argument('--anos', type=int, default=2)
+    parser.add_argument('--iteracoes', type=int, default=500, help='Iterações por microbenchmark.')
+    parser.add_argument('--logins', type=int, default=10, help='Iterações de authenticate_user (bcrypt).')
+    parser.add_argument('--clientes', type=int, default=8, help='Clientes concorrentes no teste de carga.')
+    parser.add_argument('--requisicoes', type=int, default=400, help='Requisições por rota no teste de carga.')
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--baseline', default=BASELINE_PADRAO)
+    parser.add_argument('--salvar-baseline', action='store_true')
+    parser.add_argument('--tolerancia', type=float, default=0.25, help='Piora aceitável de p50/p99 (0.25 = 25%%).')
+    args = parser.parse_args(argv)
+
+    diretorio = tempfile.mkdtemp(prefix='bench_hotel_')
+    sys.path.insert(0, RAIZ)
+    os.chdir(diretorio) # sessoes.db e demais arquivos relativos ficam no diretório temporário
+
+    import model
+    model.DATABASE_NAME = os.path.join(diretorio, 'bench.db')
+    import app as aplicacao
+    import controller
+    # O log de SQL lento (metrics.py) poluiria o relatório; as latências já aparecem abaixo
+    logging.getLogger('hotel.sql').disabled = True
+
+    inicio = time.perf_counter()
+    numeros, total = popular_banco(model, args.quartos, args.anos, args.semente)
+    print(f"Hotel sintético: {len(numeros)} quartos, {total} reservas ({time.perf_counter() - inicio:.1f}s) em {diretorio}")
+
+    resultados = microbenchmarks(aplicacao.app, model, controller, numeros, args)
+    resultados.update(carga_rotas(aplicacao.app, model, args))
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as arquivo:
+            baseline = json.load(arquivo)
+    linhas, regressoes = comparar(resultados, baseline, args.tolerancia)
+    print('\n'.join(linhas))
+
+    if args.salvar_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as arquivo:
+            json.dump(resultados, arquivo, indent=2, sort_keys=True)
+        print(f"Baseline salva em {args.baseline}")
+        return 0
+    if regressoes:
+        print("\nRegressões acima da tolerância:")
+        print('\n'.join(f"  {regressao}" for regressao in regressoes))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,91 @@
+import threading
+import time
+from collections import OrderedDict
+
+# --- Cache em Memória com TTL e LRU ---
+# Usado para dados quase estáticos (catálogo de quartos, preços), que mudam
+# poucas vezes por dia mas são lidos em praticamente toda requisição.
+
+class CacheTTL:
+    """Cache thread-safe com expiração por tempo (TTL) e descarte LRU."""
+
+    def __init__(self, maxsize=128, ttl=60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._dados = OrderedDict() # chave -> (expira_em, valor)
+        # Invalidações por chave (e do cache todo): um carregamento que
+        # atravessa uma invalidação não grava o valor, lido antes da escrita
+        self._geracoes = {}
+        self._geracao_total = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, chave, default=None):
+        """Retorna o valor em cache (ou default se ausente/expirado)."""
+        with self._lock:
+            item = self._dados.get(chave)
+            if item is not None:
+                expira_em, valor = item
+                if expira_em > time.monotonic():
+                    self._dados.move_to_end(chave) # Marca como usado recentemente
+                    self.hits += 1
+                    return valor
+                del self._dados[chave]
+            self.misses += 1
+            return default
+
+    def set(self, chave, valor):
+        """Armazena um valor, descartando o menos usado se o cache estiver cheio."""
+        with self._lock:
+            self._armazenar(chave, valor)
+
+    def _armazenar(self, chave, valor):
+        self._dados[chave] = (time.monotonic() + self.ttl, valor)
+        self._dados.move_to_end(chave)
+        while len(self._dados) > self.maxsize:
+            self._dados.popitem(last=False)
+            self.evictions += 1
+
+    def _geracao(self, chave):
+        return self._geracao_total, self._geracoes.get(chave, 0)
+
+    def get_or_load(self, chave, carregar):
+        """
+        Retorna o valor em cache ou o obtém com carregar() e o armazena. Se a
+        chave for invalidada durante carregar(), o valor é retornado mas não
+        fica em cache: pode ter sido lido antes da escrita que invalidou.
+        """
+        ausente = object()
+        valor = self.get(chave, ausente)
+        if valor is ausente:
+            with self._lock:
+                geracao = self._geracao(chave)
+            valor = carregar()
+            with self._lock:
+                if self._geracao(chave) == geracao:
+                    self._armazenar(chave, valor)
+        return valor
+
+    def invalidate(self, chave=None):
+        """Remove uma chave (ou todo o conteúdo, se nenhuma for informada)."""
+        with self._lock:
+            if chave is None:
+                self._dados.clear()
+                self._geracao_total += 1
+            else:
+                self._dados.pop(chave, None)
+                self._geracoes[chave] = self._geracoes.get(chave, 0) + 1
+
+    def stats(self):
+        """Retorna os contadores do cache."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._dados),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+            }
@@ -1,8 +1,20 @@
-from model import get_user_by_email, check_password, add_reserva, get_all_reservas, delete_reserva, get_room_price, get_quartos_disponiveis
+from model import get_user_by_email, check_password, add_reserva, get_reservas_pagina, delete_reserva, get_quartos_disponiveis
 from flask import session, redirect, url_for, request, flash, make_response
 from functools import wraps
 from datetime import datetime, timedelta
-from model import get_all_quartos, update_quarto_status, get_reservas_by_hospede
+from model import get_all_quartos, update_quarto_status, update_quartos_status_lote, get_reservas_by_usuario, is_lock_error
+from model import hash_password, password_needs_rehash, update_user_password_hash
+from security import RateLimiter, PasswordVerifier, VerificacaoIndisponivel
+from sessions import regenerar_sessao
+from model import get_ocupacao_por_data, get_ocupacao_por_quarto
+from analytics import relatorio_periodo, indicadores
+from model import get_reservas_periodo
+from model import get_propriedades, get_ocupacao_rede, PROPRIEDADE_PRINCIPAL
+from availability import montar_calendario
+from model import get_regras_tarifa, add_regra_tarifa, delete_regra_tarifa
+from model import buscar_quartos_disponiveis, get_indice_quartos, parse_atributos, add_reservas_bloco
+from model import STATUS_RESERVA, TRANSICOES_RESERVA, alterar_status_reserva, get_historico_reserva, get_reserva_by_id
+from pricing import calcular_valor_estadia, cotar_quartos, invalidar_tarifas
 
 # Dicionário de Perfis para facilitar a Autorização
 PERFIS = {
@@ -12,22 +24,74 @@ PERFIS = {
     4: 'Hóspede'
 }
 
+# Status de limpeza aceitos para os quartos
+STATUS_LIMPEZA = ('Limpo', 'Sujo', 'Em limpeza')
+
 # --- Funções de Autenticação e Sessão ---
 
-def authenticate_user(email, password):
-    """Tenta autenticar o usuário e inicia a sessão em caso de sucesso."""
+# Limites de tentativas de login: (rajada máxima, fichas repostas por segundo)
+LOGIN_LIMITE_IP = (20, 1 / 3) # 20 tentativas seguidas, depois 1 a cada 3 s
+LOGIN_LIMITE_EMAIL = (5, 1 / 30) # 5 tentativas seguidas, depois 1 a cada 30 s
+
+# Pool para o bcrypt: no máximo 2 verificações simultâneas e 8 na fila
+LOGIN_BCRYPT_WORKERS = 2
+LOGIN_BCRYPT_FILA = 8
+
+_limite_login_ip = RateLimiter(*LOGIN_LIMITE_IP)
+_limite_login_email = RateLimiter(*LOGIN_LIMITE_EMAIL)
+
+def _verificar_senha(senha_hash, password):
+    """
+    Executada no pool do bcrypt: verifica a senha e, se o hash usar um custo
+    diferente do configurado, já gera o novo hash. Retorna (ok, novo_hash).
+    """
+    if not check_password(senha_hash, password):
+        return False, None
+    if password_needs_rehash(senha_hash):
+        return True, hash_password(password)
+    return True, None
+
+_verificador_senhas = PasswordVerifier(_verificar_senha, max_workers=LOGIN_BCRYPT_WORKERS, max_fila=LOGIN_BCRYPT_FILA)
+
+def authenticate_user(email, password, ip=None):
+    """
+    Tenta autenticar o usuário e inicia a sessão em caso de sucesso.
+    Retorna (sucesso, mensagem de erro).
+    """
+    email = (email or '').strip()
+    if not _limite_login_ip.permitir(ip) or not _limite_login_email.permitir(email.lower()):
+        return False, "Muitas tentativas de login. Aguarde alguns instantes e tente novamente."
+
     user = get_user_by_email(email)
-    
-    if user and check_password(user['senha_hash'], password):
-        # Autenticação bem-sucedida, armazena dados na sessão
-        session['logged_in'] = True
-        session['user_id'] = user['id']
-        session['user_email'] = user['email']
-        session['user_name'] = user['nome_completo']
-        session['user_profile'] = PERFIS.get(user['perfil_id'], 'Desconhecido')
-        session['profile_id'] = user['perfil_id']
-        return True
-    return False
+    if not user:
+        return False, "Login falhou. Verifique seu e-mail e senha."
+
+    try:
+        ok, novo_hash = _verificador_senhas.verificar(user['senha_hash'], password)
+    except VerificacaoIndisponivel:
+        return False, "Muitos logins simultâneos no momento. Tente novamente em instantes."
+    except Exception as e:
+        print(f"Erro ao verificar senha: {e}")
+        return False, "Ocorreu um erro inesperado ao verificar a senha."
+
+    if not ok:
+        return False, "Login falhou. Verifique seu e-mail e senha."
+
+    if novo_hash:
+        update_user_password_hash(user['id'], novo_hash)
+
+    # Autenticação bem-sucedida: sessão com id novo (um id obtido antes do
+    # login não dá acesso à conta) e sem dados anteriores ao login
+    session.clear()
+    regenerar_sessao(session)
+    session['logged_in'] = True
+    session['user_id'] = user['id']
+    session['user_email'] = user['email']
+    session['user_name'] = user['nome_completo']
+    session['user_profile'] = PERFIS.get(user['perfil_id'], 'Desconhecido')
+    session['profile_id'] = user['perfil_id']
+    _selecionar_propriedade(user['propriedade_id'])
+    return True, ""
 
 def logout_user():
     """Limpa a sessão do usuário."""
@@ -37,6 +101,33 @@ def logout_user():
     session.pop('user_name', None)
     session.pop('user_profile', None)
     session.pop('profile_id', None)
+    session.pop('propriedade_id', None)
+    session.pop('propriedade_nome', None)
+    regenerar_sessao(session) # O id usado durante o login deixa de valer
+
+# --- Propriedades (Hotéis da Rede) ---
+
+def _selecionar_propriedade(propriedade_id):
+    # O banco de cada requisição é escolhido a partir de session['propriedade_id'] (app.py)
+    propriedade = get_propriedades().get(propriedade_id) or get_propriedades()[PROPRIEDADE_PRINCIPAL]
+    session['propriedade_id'] = propriedade['id']
+    session['propriedade_nome'] = propriedade['nome']
+
+def get_propriedades_data():
+    """Lista as propriedades da rede."""
+    return list(get_propriedades().values())
+
+def handle_trocar_propriedade(propriedade_id):
+    """Administrador: passa a operar o banco de outra propriedade da rede."""
+    try:
+        propriedade_id = int(propriedade_id)
+    except (TypeError, ValueError):
+        return False, "Propriedade inválida."
+    if propriedade_id not in get_propriedades():
+        return False, "Propriedade não encontrada."
+    regenerar_sessao(session)
+    _selecionar_propriedade(propriedade_id)
+    return True, f"Operando agora: {session['propriedade_nome']}."
 
 
 # --- Decorador para Autorização ---
@@ -66,6 +157,19 @@ def profile_required(allowed_profiles):
 
 # --- Lógica de Negócio para Reservas ---
 
+def get_usuario_hospede(email_hospede):
+    """
+    Conta do hóspede no portal (opcional): identifica o hóspede mesmo quando
+    outro tem o mesmo nome. Retorna (id do usuário ou None, mensagem de erro).
+    """
+    email_hospede = (email_hospede or '').strip()
+    if not email_hospede:
+        return None, ""
+    usuario = get_user_by_email(email_hospede)
+    if not usuario or usuario['perfil_id'] != 4:
+        return None, "Nenhuma conta de hóspede com o e-mail informado."
+    return usuario['id'], ""
+
 def handle_create_reservation(form):
     """Processa o formulário de nova reserva."""
     try:
@@ -80,17 +184,18 @@ def handle_create_reservation(form):
         if checkin >= checkout:
             return False, "Data de check-out deve ser posterior à data de check-in."
 
-        # 1. Calcular Preço e Valor Total
-        price_per_night = get_room_price(numero_quarto)
-        if price_per_night is None:
-             return False, "Quarto não encontrado ou preço não definido."
+        usuario_id, error_msg = get_usuario_hospede(form.get('email_hospede', ''))
+        if error_msg:
+            return False, error_msg
 
-        duration = (checkout - checkin).days
-        valor_total = price_per_night * duration
+        # 1. Calcular o Valor Total pela tabela de tarifas
+        valor_total = calcular_valor_estadia(numero_quarto, checkin.date(), checkout.date())
+        if valor_total is None:
+             return False, "Quarto não encontrado ou preço não definido."
 
         # 2. Tentar Adicionar a Reserva no Model
         success, message = add_reserva(
-            numero_quarto, nome_hospede, data_checkin_str, data_checkout_str, valor_total
+            numero_quarto, nome_hospede, data_checkin_str, data_checkout_str, valor_total, usuario_id
         )
         
         return success, message
@@ -102,15 +207,90 @@ def handle_create_reservation(form):
         print(f"Erro ao criar reserva: {e}")
         return False, "Ocorreu um erro inesperado ao processar a reserva."
 
-def get_reservas_data():
-    """Obtém todas as reservas para exibição."""
-    # Note: Em um sistema real, aqui haveria filtros e paginação.
-    return get_all_reservas()
+# --- Reservas em Bloco (grupos e eventos) ---
+
+BLOCO_MAX_QUARTOS = 100
+
+def handle_create_bloco(nome_hospede, data_checkin, data_checkout, quartos=None, quantidade=None,
+                        busca=None, email_hospede=''):
+    """
+    Reserva vários quartos de uma vez para o mesmo período: a lista `quartos`
+    (todos precisam estar livres) ou `quantidade` quartos que atendam aos
+    filtros de `busca` (hospedes, preco_max, atributos), priorizando a menor
+    capacidade suficiente e o menor preço. Tudo ou nada, em uma transação.
+    Retorna (sucesso, mensagem, [{id_reserva, numero_quarto, valor_total}], erro),
+    com erro em ERROS_BLOCO ('invalido', 'conflito', 'ocupado') ou None.
+    """
+    nome_hospede = (nome_hospede or '').strip()
+    if not nome_hospede:
+        return False, "Informe o nome do grupo ou do responsável.", [], 'invalido'
+    error_msg = validate_periodo(data_checkin, data_checkout)
+    if error_msg:
+        return False, error_msg, [], 'invalido'
+    checkin = datetime.strptime(data_checkin, '%Y-%m-%d').date()
+    checkout = datetime.strptime(data_checkout, '%Y-%m-%d').date()
+    # Grava AAAA-MM-DD: as buscas de conflito comparam as datas como texto
+    data_checkin, data_checkout = checkin.isoformat(), checkout.isoformat()
+    usuario_id, error_msg = get_usuario_hospede(email_hospede)
+    if error_msg:
+        return False, error_msg, [], 'invalido'
+
+    if quartos:
+        candidatos = list(dict.fromkeys(str(numero).strip() for numero in quartos))
+        quantidade = len(candidatos)
+    else:
+        try:
+            # Via str(): 2.9 (JSON) ou "2.9" (formulário) são recusados, não truncados
+            quantidade = int(str(quantidade or 0).strip())
+        except ValueError:
+            return False, "A quantidade de quartos deve ser um número inteiro.", [], 'invalido'
+        if quantidade < 1:
+            return False, "Informe os quartos ou a quantidade de quartos do bloco.", [], 'invalido'
+        busca = busca or {}
+        candidatos = get_indice_quartos().buscar(busca.get('hospedes', 1), busca.get('preco_max'), busca.get('atributos', ()))
+    if quantidade > BLOCO_MAX_QUARTOS:
+        return False, f"Um bloco pode ter no máximo {BLOCO_MAX_QUARTOS} quartos.", [], 'invalido'
+
+    # Cota todos os candidatos de uma vez, pela mesma tabela de tarifas
+    valores = cotar_quartos(candidatos, checkin, checkout)
+    inexistentes = [numero for numero in candidatos if valores[numero] is None]
+    if inexistentes:
+        return False, f"Quarto(s) {', '.join(inexistentes)} não encontrado(s).", [], 'invalido'
+
+    success, message, criadas, erro = add_reservas_bloco(
+        candidatos, quantidade, nome_hospede, data_checkin, data_checkout, valores, usuario_id
+    )
+    return success, message, [
+        {'id_reserva': id_reserva, 'numero_quarto': numero_quarto, 'valor_total': valor_total}
+        for id_reserva, numero_quarto, valor_total in criadas
+    ], erro
+
+def get_reservas_filtros(args):
+    """Extrai os filtros da listagem de reservas dos parâmetros da URL."""
+    filtros = {
+        'data_inicio': args.get('filtro_inicio', '').strip(),
+        'data_fim': args.get('filtro_fim', '').strip(),
+        'numero_quarto': args.get('filtro_quarto', '').strip(),
+        'status_reserva': args.get('filtro_status', '').strip(),
+        'nome_hospede': args.get('filtro_hospede', '').strip(),
+    }
+    # Datas inválidas são ignoradas em vez de quebrar a listagem
+    for campo in ('data_inicio', 'data_fim'):
+        try:
+            if filtros[campo]:
+                datetime.strptime(filtros[campo], '%Y-%m-%d')
+        except ValueError:
+            filtros[campo] = ''
+    return filtros
+
+def get_reservas_data(args):
+    """Obtém uma página de reservas para exibição: (reservas, proximo_cursor)."""
+    return get_reservas_pagina(get_reservas_filtros(args), cursor=args.get('cursor'))
 
 def handle_delete_reservation(reserva_id):
     """Processa a requisição de exclusão de reserva."""
     try:
-        success = delete_reserva(reserva_id)
+        success = delete_reserva(reserva_id, alterado_por=session.get('user_id'))
         if success:
             return True, "Reserva deletada com sucesso."
         else:
@@ -119,21 +299,239 @@ def handle_delete_reservation(reserva_id):
         print(f"Erro ao deletar reserva: {e}")
         return False, "Ocorreu um erro inesperado ao deletar a reserva."
 
-def handle_room_availability(checkin, checkout):
-    """Busca a disponibilidade de quartos baseado nas datas."""
+def handle_status_reserva(reserva_id, novo_status, observacao=''):
+    """Aplica uma transição de status (check-in, check-out, cancelamento)."""
+    if novo_status not in STATUS_RESERVA:
+        return False, "Status de reserva inválido."
+    try:
+        return alterar_status_reserva(
+            reserva_id, novo_status, alterado_por=session.get('user_id'), observacao=(observacao or '').strip()
+        )
+    except Exception as e:
+        print(f"Erro ao alterar status da reserva: {e}")
+        return False, "Ocorreu um erro inesperado ao atualizar a reserva."
+
+def reserva_existe(reserva_id):
+    """Indica se a reserva existe (uma busca pela chave primária)."""
+    return get_reserva_by_id(reserva_id) is not None
+
+def get_historico_reserva_data(reserva_id):
+    """Retorna (reserva, histórico de status) ou (None, []) se não existir."""
+    reserva = get_reserva_by_id(reserva_id)
+    if reserva is None:
+        return None, []
+    return reserva, get_historico_reserva(reserva_id)
+
+def validate_periodo(checkin, checkout):
+    """Valida um período de estadia. Retorna a mensagem de erro ou "" se válido."""
     try:
         # Formato de data YYYY-MM-DD é o padrão do HTML input type="date"
         checkin_dt = datetime.strptime(checkin, '%Y-%m-%d')
         checkout_dt = datetime.strptime(checkout, '%Y-%m-%d')
-        
-        if checkin_dt >= checkout_dt:
-            return [], "Data de check-out deve ser posterior à data de check-in."
+    except (TypeError, ValueError): # TypeError: valor que não é texto (ex.: JSON null)
+        return "Formato de data inválido. Use AAAA-MM-DD."
+    if checkin_dt >= checkout_dt:
+        return "Data de check-out deve ser posterior à data de check-in."
+    return ""
+
+def get_busca_quartos_filtros(args):
+    """
+    Extrai da URL os filtros da busca de quartos: hospedes, preco_max e
+    atributo (repetível). Retorna (filtros, mensagem de erro).
+    """
+    filtros = {'hospedes': 1, 'preco_max': None, 'atributos': ()}
+    try:
+        if args.get('hospedes'):
+            filtros['hospedes'] = int(args['hospedes'])
+        if args.get('preco_max'):
+            filtros['preco_max'] = float(args['preco_max'].replace(',', '.'))
+    except ValueError:
+        return filtros, "Número de hóspedes e preço máximo devem ser numéricos."
+    if filtros['hospedes'] < 1:
+        return filtros, "Informe pelo menos 1 hóspede."
+    filtros['atributos'] = parse_atributos(','.join(args.getlist('atributo')))
+    return filtros, ""
+
+def handle_room_availability(checkin, checkout, hospedes=1, preco_max=None, atributos=()):
+    """Busca os quartos livres nas datas que atendem aos filtros informados."""
+    error_msg = validate_periodo(checkin, checkout)
+    if error_msg:
+        return [], error_msg
 
+    if hospedes > 1 or preco_max is not None or atributos:
+        quartos = buscar_quartos_disponiveis(checkin, checkout, hospedes, preco_max, atributos)
+    else:
         quartos = get_quartos_disponiveis(checkin, checkout)
-        return quartos, ""
-        
+    # Cota todos os quartos livres de uma vez, pela mesma tabela de tarifas
+    valores = cotar_quartos(
+        [quarto['numero_quarto'] for quarto in quartos],
+        datetime.strptime(checkin, '%Y-%m-%d').date(),
+        datetime.strptime(checkout, '%Y-%m-%d').date()
+    )
+    for quarto in quartos:
+        quarto['valor_estadia'] = valores[quarto['numero_quarto']]
+    return quartos, ""
+
+# --- Calendário de Ocupação ---
+
+CALENDARIO_MAX_NOITES = 366
+
+def validate_periodo_calendario(inicio, fim):
+    """Valida o período do calendário (fim exclusivo). Retorna a mensagem de erro ou ""."""
+    error_msg = validate_periodo(inicio, fim)
+    if error_msg:
+        return error_msg
+    noites = (datetime.strptime(fim, '%Y-%m-%d') - datetime.strptime(inicio, '%Y-%m-%d')).days
+    if noites > CALENDARIO_MAX_NOITES:
+        return f"O período do calendário é limitado a {CALENDARIO_MAX_NOITES} noites."
+    return ""
+
+def get_calendario_data(inicio, fim):
+    """
+    Monta a grade de ocupação quarto x noite do período (fim exclusivo).
+    Retorna (datas, [(quarto, grade)], mensagem de erro).
+    """
+    error_msg = validate_periodo_calendario(inicio, fim)
+    if error_msg:
+        return [], [], error_msg
+    inicio_dt = datetime.strptime(inicio, '%Y-%m-%d').date()
+    fim_dt = datetime.strptime(fim, '%Y-%m-%d').date()
+    noites = (fim_dt - inicio_dt).days
+
+    quartos = [quarto['numero_quarto'] for quarto in get_all_quartos()]
+    grade = montar_calendario(quartos, get_reservas_periodo(inicio, fim), inicio_dt, fim_dt)
+    datas = [inicio_dt + timedelta(days=i) for i in range(noites)]
+    return datas, [(numero_quarto, grade[numero_quarto]) for numero_quarto in quartos], ""
+
+# --- Relatórios Gerenciais ---
+
+RELATORIO_MAX_DIAS_DETALHADOS = 93 # Acima disso, o relatório não lista dia a dia
+
+def get_relatorio_ocupacao(inicio, fim):
+    """
+    Calcula ocupação, ADR e RevPAR entre as datas (fim exclusivo).
+    Retorna (relatorio, mensagem de erro).
+    """
+    error_msg = validate_periodo(inicio, fim)
+    if error_msg:
+        return None, error_msg
+    inicio_dt = datetime.strptime(inicio, '%Y-%m-%d').date()
+    fim_dt = datetime.strptime(fim, '%Y-%m-%d').date()
+
+    relatorio = relatorio_periodo(
+        get_ocupacao_por_data(inicio, fim),
+        get_ocupacao_por_quarto(inicio, fim),
+        len(get_all_quartos()),
+        inicio_dt,
+        fim_dt,
+        detalhar_dias=(fim_dt - inicio_dt).days <= RELATORIO_MAX_DIAS_DETALHADOS
+    )
+    return relatorio, ""
+
+def get_relatorio_rede(inicio, fim):
+    """
+    Ocupação, ADR e RevPAR de cada propriedade e da rede entre as datas (fim
+    exclusivo). Retorna (relatorio, mensagem de erro).
+    """
+    error_msg = validate_periodo(inicio, fim)
+    if error_msg:
+        return None, error_msg
+    dias = (datetime.strptime(fim, '%Y-%m-%d') - datetime.strptime(inicio, '%Y-%m-%d')).days
+    propriedades = get_propriedades()
+
+    por_propriedade = []
+    for propriedade_id, noites, receita, total_quartos in get_ocupacao_rede(inicio, fim):
+        item = indicadores(noites, receita, total_quartos * dias)
+        item['nome'] = propriedades[propriedade_id]['nome']
+        por_propriedade.append(item)
+    total = indicadores(
+        sum(item['noites_vendidas'] for item in por_propriedade),
+        sum(item['receita'] for item in por_propriedade),
+        sum(item['noites_disponiveis'] for item in por_propriedade)
+    )
+    return {'por_propriedade': por_propriedade, 'total': total}, ""
+
+# --- Regras de Tarifa (Administrador) ---
+
+TIPOS_REGRA_TARIFA = {
+    'temporada': 'Temporada',
+    'fim_de_semana': 'Fim de semana',
+    'permanencia': 'Permanência',
+}
+
+def get_regras_tarifa_data():
+    """Lista as regras de tarifa cadastradas."""
+    return get_regras_tarifa()
+
+def handle_create_regra_tarifa(form):
+    """Valida e grava uma regra de tarifa; recompila as tabelas de preço."""
+    tipo = form.get('tipo', '')
+    if tipo not in TIPOS_REGRA_TARIFA:
+        return False, "Tipo de regra inválido."
+    try:
+        percentual = float(form.get('percentual', ''))
+        min_noites = int(form['min_noites']) if form.get('min_noites') else None
+    except ValueError:
+        return False, "Percentual e mínimo de noites devem ser numéricos."
+    data_inicio = form.get('data_inicio', '').strip() or None
+    data_fim = form.get('data_fim', '').strip() or None
+    if data_inicio and data_fim:
+        error_msg = validate_periodo(data_inicio, data_fim)
+        if error_msg:
+            return False, error_msg
+    else:
+        try:
+            for data in (data_inicio, data_fim):
+                if data:
+                    datetime.strptime(data, '%Y-%m-%d')
+        except ValueError:
+            return False, "Formato de data inválido. Use AAAA-MM-DD."
+    if tipo == 'permanencia':
+        if not min_noites or min_noites < 1:
+            return False, "Informe o mínimo de noites para o desconto por permanência."
+        if not 0 < percentual < 100:
+            return False, "O desconto deve estar entre 0 e 100%."
+    elif percentual <= -100:
+        return False, "O ajuste não pode zerar a diária."
+
+    numero_quarto = form.get('numero_quarto', '').strip() or None
+    try:
+        add_regra_tarifa(
+            tipo, percentual, form.get('descricao', '').strip(),
+            numero_quarto, data_inicio, data_fim, min_noites
+        )
+    except Exception as e:
+        print(f"Erro ao criar regra de tarifa: {e}")
+        return False, "Não foi possível salvar a regra de tarifa."
+    invalidar_tarifas()
+    return True, "Regra de tarifa cadastrada."
+
+def handle_delete_regra_tarifa(id_regra):
+    """Remove uma regra de tarifa e recompila as tabelas de preço."""
+    if not delete_regra_tarifa(id_regra):
+        return False, "Regra de tarifa não encontrada."
+    invalidar_tarifas()
+    return True, "Regra de tarifa removida."
+
+# --- Eventos em Tempo Real ---
+
+# Tipos de evento que cada perfil recebe em /eventos
+TIPOS_EVENTO_POR_PERFIL = {
+    1: ('quarto', 'reserva'),
+    2: ('quarto', 'reserva'),
+    3: ('quarto',),
+}
+
+def get_tipos_evento(profile_id):
+    """Tipos de evento visíveis para o perfil (vazio se nenhum)."""
+    return TIPOS_EVENTO_POR_PERFIL.get(profile_id, ())
+
+def parse_last_event_id(valor):
+    """Converte o cabeçalho Last-Event-ID (enviado na reconexão) em int, ou None."""
+    try:
+        return int(valor) if valor else None
     except ValueError:
-        return [], "Formato de data inválido. Use AAAA-MM-DD."
+        return None
 
 # --- Lógica de Cookies (Preferências) ---
 
@@ -147,18 +545,84 @@ def get_theme_from_cookie(request):
     """Obtém a preferência de tema do cookie."""
     return request.cookies.get('theme', 'light') # 'light' é o padrão
 
+def get_atributos_quartos():
+    """Atributos disponíveis para filtrar a busca de quartos."""
+    return get_indice_quartos().atributos()
+
 def get_quartos_data():
     """Obtém todos os quartos para exibição da camareira."""
     return get_all_quartos()
 
 def handle_update_quarto_status(numero_quarto, novo_status):
     """Atualiza status de limpeza de um quarto."""
+    if novo_status not in STATUS_LIMPEZA:
+        return False, "Status de limpeza inválido."
     success = update_quarto_status(numero_quarto, novo_status)
     if success:
         return True, "Status atualizado com sucesso!"
     else:
         return False, "Erro ao atualizar status do quarto."
 
-def get_reservas_hospede(nome_hospede):
-    """Obtém reservas de um hóspede específico."""
-    return get_reservas_by_hospede(nome_hospede)
\ No newline at end of file
+def parse_quartos_lote_form(form):
+    """
+    Extrai as atualizações do formulário de quartos. Cada linha envia
+    numero_quarto, status_limpeza e status_atual; apenas as linhas alteradas
+    são consideradas. Se o botão de uma linha foi usado (campo 'somente'),
+    apenas aquele quarto é atualizado.
+    """
+    linhas = zip(
+        form.getlist('numero_quarto'),
+        form.getlist('status_limpeza'),
+        form.getlist('status_atual')
+    )
+    somente = form.get('somente')
+    atualizacoes = []
+    for numero_quarto, status_limpeza, status_atual in linhas:
+        if somente:
+            if numero_quarto == somente:
+                atualizacoes.append({'numero_quarto': numero_quarto, 'status_limpeza': status_limpeza})
+        elif status_limpeza != status_atual:
+            atualizacoes.append({'numero_quarto': numero_quarto, 'status_limpeza': status_limpeza})
+    return atualizacoes
+
+def handle_update_quartos_lote(atualizacoes):
+    """
+    Valida e aplica várias atualizações de status de limpeza de uma vez.
+    Recebe uma lista de {'numero_quarto', 'status_limpeza'} e retorna uma
+    lista de resultados por quarto: {'numero_quarto', 'success', 'message'}.
+    """
+    resultados = []
+    validas = []
+    for item in atualizacoes:
+        numero_quarto = str(item.get('numero_quarto') or '').strip()
+        novo_status = item.get('status_limpeza')
+        resultado = {'numero_quarto': numero_quarto, 'status_limpeza': novo_status}
+        if not numero_quarto:
+            resultado.update(success=False, message="Número do quarto não informado.")
+        elif novo_status not in STATUS_LIMPEZA:
+            resultado.update(success=False, message="Status de limpeza inválido.")
+        else:
+            validas.append((numero_quarto, novo_status))
+        resultados.append(resultado)
+
+    try:
+        aplicadas = update_quartos_status_lote(validas)
+    except Exception as e:
+        print(f"Erro ao atualizar quartos em lote: {e}")
+        mensagem = "Sistema ocupado. Tente novamente." if is_lock_error(e) else "Erro ao atualizar status dos quartos."
+        aplicadas = {}
+        for resultado in resultados:
+            resultado.setdefault('success', False)
+            resultado.setdefault('message', mensagem)
+
+    for resultado in resultados:
+        if 'success' not in resultado:
+            if aplicadas.get(resultado['numero_quarto']):
+                resultado.update(success=True, message="Status atualizado com sucesso!")
+            else:
+                resultado.update(success=False, message="Quarto não encontrado.")
+    return resultados
+
+def get_reservas_hospede(usuario_id, cursor=None):
+    """Obtém uma página de reservas de um hóspede, em todos os hotéis: (reservas, proximo_cursor)."""
+    return get_reservas_by_usuario(usuario_id, cursor=cursor)
\ No newline at end of file
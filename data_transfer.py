@@ -0,0 +1,159 @@
+import csv
+import io
+import json
+import time
+from datetime import datetime
+from model import COLUNAS_EXPORTACAO, STATUS_RESERVA, iter_tabela, import_reservas_lote
+
+# --- Exportação (streaming) ---
+# Os geradores abaixo produzem o arquivo em pedaços de texto, lendo o banco
+# em blocos; servem tanto para a resposta HTTP em streaming quanto para a CLI.
+
+FORMATOS = ('csv', 'jsonl')
+IMPORT_LOTE = 1000 # Reservas por transação na importação
+
+def exportar_csv(tabela, database):
+    """Gera a tabela em CSV (com cabeçalho), um bloco de linhas por vez."""
+    colunas = COLUNAS_EXPORTACAO[tabela]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(colunas)
+    for i, linha in enumerate(iter_tabela(tabela, database), start=1):
+        writer.writerow(linha)
+        if i % 500 == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def exportar_jsonl(tabela, database):
+    """Gera a tabela em JSON Lines (um objeto por linha)."""
+    colunas = COLUNAS_EXPORTACAO[tabela]
+    for linha in iter_tabela(tabela, database):
+        yield json.dumps(dict(zip(colunas, linha)), ensure_ascii=False) + '\n'
+
+def exportar(tabela, formato, database):
+    """
+    Retorna o gerador de exportação da tabela no formato pedido, lendo o
+    banco informado (o da propriedade, resolvido antes do streaming começar).
+    """
+    if tabela not in COLUNAS_EXPORTACAO:
+        raise ValueError(f"Tabela não exportável: {tabela}")
+    if formato == 'csv':
+        return exportar_csv(tabela, database)
+    if formato == 'jsonl':
+        return exportar_jsonl(tabela, database)
+    raise ValueError(f"Formato desconhecido: {formato}")
+
+# --- Importação em Massa ---
+
+def ler_registros(arquivo, formato):
+    """
+    Gera (número da linha, registro, mensagem de erro) a partir de um arquivo
+    CSV (com cabeçalho) ou JSONL. Uma linha ilegível vem com registro None e
+    a mensagem de erro, sem interromper a leitura das seguintes.
+    """
+    if formato == 'csv':
+        leitor = csv.DictReader(arquivo)
+        for registro in leitor:
+            yield leitor.line_num, registro, ""
+    elif formato == 'jsonl':
+        for numero_linha, linha in enumerate(arquivo, start=1):
+            if not linha.strip():
+                continue
+            try:
+                registro = json.loads(linha)
+            except json.JSONDecodeError as e:
+                yield numero_linha, None, f"JSON inválido: {e.msg}."
+                continue
+            if not isinstance(registro, dict):
+                yield numero_linha, None, "Cada linha deve ser um objeto JSON."
+                continue
+            yield numero_linha, registro, ""
+    else:
+        raise ValueError(f"Formato desconhecido: {formato}")
+
+def _inteiro_opcional(valor):
+    # Colunas opcionais do arquivo exportado (id_reserva, usuario_id): vazio = None
+    if valor is None or str(valor).strip() == '':
+        return None
+    return int(str(valor).strip())
+
+def validar_reserva(registro):
+    """
+    Converte um registro importado na tupla usada por import_reservas_lote.
+    Retorna (reserva, mensagem de erro).
+    """
+    try:
+        numero_quarto = str(registro['numero_quarto']).strip()
+        nome_hospede = str(registro['nome_hospede']).strip()
+        data_checkin = str(registro['data_checkin']).strip()
+        data_checkout = str(registro['data_checkout']).strip()
+        status = str(registro.get('status_reserva') or 'Confirmada').strip()
+        valor_total = float(registro['valor_total'])
+    except KeyError as e:
+        return None, f"Campo obrigatório ausente: {e.args[0]}"
+    except (TypeError, ValueError):
+        return None, "Valor total inválido."
+    try:
+        id_reserva = _inteiro_opcional(registro.get('id_reserva'))
+        usuario_id = _inteiro_opcional(registro.get('usuario_id'))
+    except ValueError:
+        return None, "id_reserva e usuario_id devem ser números inteiros."
+    if not numero_quarto or not nome_hospede:
+        return None, "Quarto e hóspede são obrigatórios."
+    if status not in STATUS_RESERVA:
+        return None, f"Status de reserva inválido: {status}"
+    try:
+        checkin = datetime.strptime(data_checkin, '%Y-%m-%d')
+        checkout = datetime.strptime(data_checkout, '%Y-%m-%d')
+    except ValueError:
+        return None, "Formato de data inválido. Use AAAA-MM-DD."
+    if checkin >= checkout:
+        return None, "Data de check-out deve ser posterior à data de check-in."
+    # Grava as datas normalizadas (o strptime aceita 2030-1-5): as buscas de
+    # conflito do model.py comparam as datas como texto AAAA-MM-DD
+    return (
+        numero_quarto, nome_hospede, checkin.date().isoformat(), checkout.date().isoformat(),
+        status, valor_total, id_reserva, usuario_id
+    ), ""
+
+def importar_reservas(arquivo, formato, tamanho_lote=IMPORT_LOTE):
+    """
+    Importa reservas de um arquivo em lotes (uma transação por lote).
+    Retorna um resumo com totais, erros por linha e vazão (linhas/s).
+    """
+    inicio = time.perf_counter()
+    lidas, inseridas, erros = 0, 0, []
+    lote, linhas_lote = [], []
+
+    def gravar_lote():
+        nonlocal inseridas
+        quantidade, erros_lote = import_reservas_lote(lote)
+        inseridas += quantidade
+        erros.extend((linhas_lote[pos], mensagem) for pos, mensagem in erros_lote)
+        lote.clear()
+        linhas_lote.clear()
+
+    for numero_linha, registro, error_msg in ler_registros(arquivo, formato):
+        lidas += 1
+        if not error_msg:
+            reserva, error_msg = validar_reserva(registro)
+        if error_msg:
+            erros.append((numero_linha, error_msg))
+            continue
+        lote.append(reserva)
+        linhas_lote.append(numero_linha)
+        if len(lote) >= tamanho_lote:
+            gravar_lote()
+    if lote:
+        gravar_lote()
+
+    duracao = time.perf_counter() - inicio
+    return {
+        'lidas': lidas,
+        'inseridas': inseridas,
+        'erros': erros,
+        'segundos': duracao,
+        'linhas_por_segundo': lidas / duracao if duracao > 0 else 0.0,
+    }
@@ -0,0 +1,204 @@
+import asyncio
+import threading
+import time
+from collections import deque
+import model
+
+# --- Eventos em Tempo Real (Server-Sent Events) ---
+# As páginas de quartos e reservas assinam /eventos e aplicam as mudanças
+# recebidas, em vez de recarregar as listas inteiras. Os eventos vêm da
+# tabela eventos (gravada junto com cada alteração), então escritas feitas
+# por qualquer worker chegam a todos os clientes.
+#
+# Por processo há uma única thread lendo o log (uma consulta indexada a cada
+# EVENTOS_INTERVALO, e só enquanto houver assinantes); as conexões SSE apenas
+# aguardam em memória e copiam os eventos novos do buffer compartilhado.
+# No modo ASGI (asgi.py), assinar_async() aguarda no event loop, sem ocupar
+# uma thread por conexão. Cada propriedade tem o próprio banco e, portanto,
+# o próprio difusor (get_difusor).
+
+EVENTOS_INTERVALO = 0.5 # Segundos entre leituras do log
+EVENTOS_KEEPALIVE = 15.0 # Segundos sem eventos até enviar um comentário (mantém a conexão)
+EVENTOS_BUFFER = 1000 # Eventos recentes mantidos em memória
+EVENTOS_LOTE = 500 # Eventos lidos do banco por consulta
+EVENTOS_RETENCAO = 86400 # Segundos de log mantidos no banco (reconexões com Last-Event-ID)
+EVENTOS_LIMPEZA_INTERVALO = 600 # Segundos entre limpezas do log
+
+class DifusorEventos:
+    """Lê o log de eventos em segundo plano e o distribui às conexões SSE."""
+
+    def __init__(self, database=None, intervalo=EVENTOS_INTERVALO, buffer=EVENTOS_BUFFER):
+        self.database = database
+        self.intervalo = intervalo
+        self._cond = threading.Condition()
+        self._buffer = deque(maxlen=buffer) # (id, tipo, dados em JSON)
+        self._ultimo_id = None
+        self._base_id = None # Eventos com id <= base_id não estão (mais) no buffer
+        self._assinantes = 0
+        self._thread = None
+        self._proxima_limpeza = 0.0
+        self._esperas = [] # (loop, futuro) dos assinantes assíncronos aguardando
+
+    def _ler_log(self):
+        while True:
+            with self._cond:
+                if self._assinantes == 0:
+                    self._thread = None
+                    return
+                ultimo_id = self._ultimo_id
+            try:
+                novos = model.get_eventos_desde(ultimo_id, EVENTOS_LOTE, self.database)
+                self._limpar_se_necessario()
+            except Exception as e:
+                print(f"Erro ao ler eventos: {e}")
+                novos = []
+            finally:
+                model.release_connection()
+            if novos:
+                with self._cond:
+                    if self._ultimo_id != ultimo_id:
+                        continue # A leitura recomeçou (_entrar) durante a consulta: descarta o lote
+                    self._buffer.extend(novos)
+                    self._ultimo_id = novos[-1][0]
+                    if len(self._buffer) == self._buffer.maxlen:
+                        self._base_id = max(self._base_id, self._buffer[0][0] - 1)
+                    self._cond.notify_all()
+                    self._notificar_async()
+            if len(novos) < EVENTOS_LOTE: # Lote cheio: ainda há eventos, lê de novo já
+                time.sleep(self.intervalo)
+
+    def _limpar_se_necessario(self):
+        agora = time.monotonic()
+        if agora >= self._proxima_limpeza:
+            self._proxima_limpeza = agora + EVENTOS_LIMPEZA_INTERVALO
+            model.limpar_eventos(EVENTOS_RETENCAO, self.database)
+
+    def _notificar_async(self):
+        # Chamado com o lock, na thread de leitura
+        for loop, futuro in self._esperas:
+            loop.call_soon_threadsafe(_concluir, futuro)
+        self._esperas.clear()
+
+    def _entrar(self):
+        with self._cond:
+            if self._assinantes == 0:
+                # Sem assinantes a leitura do log para: recomeça do fim dele, em vez
+                # de reenviar ao novo assinante tudo o que foi gravado nesse intervalo
+                self._ultimo_id = self._base_id = _consultar(model.get_ultimo_evento_id, self.database)
+                self._buffer.clear()
+            self._assinantes += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._ler_log, name='eventos-sse', daemon=True)
+                self._thread.start()
+            return self._ultimo_id
+
+    def _sair(self):
+        with self._cond:
+            self._assinantes -= 1
+
+    def _pendentes(self, desde_id):
+        # Chamado com o lock: eventos do buffer posteriores a desde_id, ou
+        # None se parte deles não está no buffer (assinante atrasado ou
+        # retomando de um id anterior ao início da leitura).
+        if desde_id < self._base_id:
+            return None
+        return [evento for evento in self._buffer if evento[0] > desde_id]
+
+    def assinar(self, tipos, desde_id=None, keepalive=EVENTOS_KEEPALIVE):
+        """
+        Gera as mensagens SSE dos eventos dos tipos informados. Com desde_id
+        (cabeçalho Last-Event-ID), reenvia o que foi perdido na desconexão.
+        """
+        atual = self._entrar()
+        try:
+            yield "retry: 3000\n\n"
+            cursor = atual if desde_id is None else min(desde_id, atual)
+            while True:
+                with self._cond:
+                    self._cond.wait_for(lambda: self._ultimo_id > cursor, timeout=keepalive)
+                    ultimo_id = self._ultimo_id
+                    eventos = self._pendentes(cursor)
+                if eventos is None:
+                    # Fora do buffer: busca direto no banco (em blocos)
+                    eventos = _consultar(model.get_eventos_desde, cursor, EVENTOS_LOTE, self.database)
+                    if not eventos:
+                        cursor = ultimo_id # Já removidos pela retenção
+                if not eventos:
+                    yield ": ping\n\n"
+                    continue
+                for evento_id, tipo, dados in eventos:
+                    if tipo in tipos:
+                        yield f"id: {evento_id}\nevent: {tipo}\ndata: {dados}\n\n"
+                cursor = eventos[-1][0]
+        finally:
+            self._sair()
+
+    async def assinar_async(self, tipos, desde_id=None, keepalive=EVENTOS_KEEPALIVE, executar=None):
+        """
+        Versão assíncrona de assinar(), usada pelo asgi.py. As consultas ao
+        banco rodam em executar(funcao, *args) (o executor limitado do servidor).
+        """
+        loop = asyncio.get_running_loop()
+        if executar is None:
+            executar = lambda funcao, *args: loop.run_in_executor(None, funcao, *args)
+        atual = await executar(self._entrar)
+        try:
+            yield "retry: 3000\n\n"
+            cursor = atual if desde_id is None else min(desde_id, atual)
+            while True:
+                futuro = loop.create_future()
+                espera = (loop, futuro)
+                with self._cond:
+                    if self._ultimo_id > cursor:
+                        futuro.set_result(None)
+                    else:
+                        self._esperas.append(espera)
+                try:
+                    await asyncio.wait_for(futuro, timeout=keepalive)
+                except asyncio.TimeoutError:
+                    pass
+                finally:
+                    with self._cond:
+                        if espera in self._esperas:
+                            self._esperas.remove(espera)
+                with self._cond:
+                    ultimo_id = self._ultimo_id
+                    eventos = self._pendentes(cursor)
+                if eventos is None:
+                    eventos = await executar(_consultar, model.get_eventos_desde, cursor, EVENTOS_LOTE, self.database)
+                    if not eventos:
+                        cursor = ultimo_id
+                if not eventos:
+                    yield ": ping\n\n"
+                    continue
+                for evento_id, tipo, dados in eventos:
+                    if tipo in tipos:
+                        yield f"id: {evento_id}\nevent: {tipo}\ndata: {dados}\n\n"
+                cursor = eventos[-1][0]
+        finally:
+            self._sair()
+
+
+def _concluir(futuro):
+    if not futuro.done():
+        futuro.set_result(None)
+
+def _consultar(funcao, *args):
+    # Consulta avulsa (fora de uma requisição): devolve a conexão da thread ao terminar
+    try:
+        return funcao(*args)
+    finally:
+        model.release_connection()
+
+
+_difusores = {} # arquivo do banco -> DifusorEventos
+_difusores_lock = threading.Lock()
+
+def get_difusor(database=None):
+    """Difusor do banco informado (o principal, se None), criado no primeiro uso."""
+    database = database or model.DATABASE_NAME
+    with _difusores_lock:
+        difusor = _difusores.get(database)
+        if difusor is None:
+            difusor = _difusores[database] = DifusorEventos(database)
+        return difusor
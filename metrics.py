@@ -0,0 +1,191 @@
+import hmac
+import logging
+import threading
+import time
+from flask import g, request, abort
+from model import registrar_observador_sql, get_cache_stats
+
+# --- Métricas da Aplicação ---
+# Latência por rota e, por requisição, a quantidade e o tempo total dos
+# comandos SQL (medidos pela camada de conexão do model.py). Os dados ficam
+# em memória, por processo, e são expostos em /metrics no formato texto do
+# Prometheus. Com METRICS_DEBUG_HEADER ativo, cada resposta leva também o
+# cabeçalho X-Debug-Timing com o tempo da requisição e o resumo do SQL.
+#
+# Configuração (app.config):
+#   METRICS_SQL_LENTA     -> segundos a partir dos quais um comando é logado (0.1)
+#   METRICS_DEBUG_HEADER  -> inclui X-Debug-Timing nas respostas (False)
+#   METRICS_TOKEN         -> token exigido em /metrics ("Authorization: Bearer <token>");
+#                            sem ele, a rota responde 404 (não publica as métricas)
+
+LATENCIA_LIMITES = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_DURACAO_LIMITES = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+SQL_CONSULTAS_LIMITES = (0, 1, 2, 5, 10, 20, 50, 100)
+SQL_LENTA_PADRAO = 0.1 # Segundos
+
+logger = logging.getLogger('hotel.sql')
+
+
+class Histograma:
+    """Histograma cumulativo (estilo Prometheus) com limites fixos."""
+
+    def __init__(self, limites):
+        self.limites = limites
+        self.contagens = [0] * (len(limites) + 1) # Último balde: +Inf
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        for i, limite in enumerate(self.limites):
+            if valor <= limite:
+                break
+        else:
+            i = len(self.limites)
+        self.contagens[i] += 1
+        self.soma += valor
+        self.total += 1
+
+    def linhas(self, nome, rotulos):
+        """Gera as linhas _bucket, _sum e _count do histograma."""
+        prefixo = ','.join(f'{k}="{_escapar(v)}"' for k, v in rotulos) + (',' if rotulos else '')
+        acumulado = 0
+        for limite, contagem in zip(self.limites + ('+Inf',), self.contagens):
+            acumulado += contagem
+            yield f'{nome}_bucket{{{prefixo}le="{limite}"}} {acumulado}'
+        sufixo = '{' + prefixo.rstrip(',') + '}' if rotulos else ''
+        yield f'{nome}_sum{sufixo} {self.soma}'
+        yield f'{nome}_count{sufixo} {self.total}'
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Metricas:
+    """Registro das métricas do processo, seguro entre threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencia = {} # (metodo, rota) -> Histograma
+        self.consultas_por_requisicao = {} # (metodo, rota) -> Histograma
+        self.requisicoes = {} # (metodo, rota, status) -> contagem
+        self.sql_duracao = Histograma(SQL_DURACAO_LIMITES)
+        self.sql_lentas = 0
+
+    def registrar_requisicao(self, metodo, rota, status, segundos, consultas):
+        with self._lock:
+            chave = (metodo, rota)
+            if chave not in self.latencia:
+                self.latencia[chave] = Histograma(LATENCIA_LIMITES)
+                self.consultas_por_requisicao[chave] = Histograma(SQL_CONSULTAS_LIMITES)
+            self.latencia[chave].observar(segundos)
+            self.consultas_por_requisicao[chave].observar(consultas)
+            chave_status = (metodo, rota, status)
+            self.requisicoes[chave_status] = self.requisicoes.get(chave_status, 0) + 1
+
+    def registrar_sql(self, segundos, lenta):
+        with self._lock:
+            self.sql_duracao.observar(segundos)
+            if lenta:
+                self.sql_lentas += 1
+
+    def exportar(self):
+        """Retorna as métricas no formato texto de exposição do Prometheus."""
+        with self._lock:
+            linhas = [
+                '# HELP hotel_http_request_duration_seconds Latência das requisições por rota.',
+                '# TYPE hotel_http_request_duration_seconds histogram',
+            ]
+            for (metodo, rota), histograma in sorted(self.latencia.items()):
+                linhas.extend(histograma.linhas('hotel_http_request_duration_seconds', (('method', metodo), ('route', rota))))
+            linhas += [
+                '# HELP hotel_http_requests_total Requisições atendidas por rota e status.',
+                '# TYPE hotel_http_requests_total counter',
+            ]
+            for (metodo, rota, status), contagem in sorted(self.requisicoes.items()):
+                linhas.append(
+                    f'hotel_http_requests_total{{method="{metodo}",route="{_escapar(rota)}",status="{status}"}} {contagem}'
+                )
+            linhas += [
+                '# HELP hotel_sql_queries_per_request Comandos SQL executados por requisição.',
+                '# TYPE hotel_sql_queries_per_request histogram',
+            ]
+            for (metodo, rota), histograma in sorted(self.consultas_por_requisicao.items()):
+                linhas.extend(histograma.linhas('hotel_sql_queries_per_request', (('method', metodo), ('route', rota))))
+            linhas += [
+                '# HELP hotel_sql_query_duration_seconds Duração de cada comando SQL.',
+                '# TYPE hotel_sql_query_duration_seconds histogram',
+            ]
+            linhas.extend(self.sql_duracao.linhas('hotel_sql_query_duration_seconds', ()))
+            linhas += [
+                '# HELP hotel_sql_slow_queries_total Comandos SQL acima do limite de lentidão.',
+                '# TYPE hotel_sql_slow_queries_total counter',
+                f'hotel_sql_slow_queries_total {self.sql_lentas}',
+            ]
+        cache = get_cache_stats()
+        linhas += [
+            '# HELP hotel_cache_quartos_hits_total Acertos do cache do catálogo de quartos.',
+            '# TYPE hotel_cache_quartos_hits_total counter',
+            f"hotel_cache_quartos_hits_total {cache['hits']}",
+            '# HELP hotel_cache_quartos_misses_total Faltas do cache do catálogo de quartos.',
+            '# TYPE hotel_cache_quartos_misses_total counter',
+            f"hotel_cache_quartos_misses_total {cache['misses']}",
+        ]
+        return '\n'.join(linhas) + '\n'
+
+
+metricas = Metricas()
+
+# Contadores de SQL da requisição em andamento (uma por thread)
+_requisicao = threading.local()
+
+def _zerar_contadores():
+    _requisicao.consultas = 0
+    _requisicao.segundos = 0.0
+
+def _observar_sql(limite_lenta):
+    def observar(sql, segundos):
+        _requisicao.consultas = getattr(_requisicao, 'consultas', 0) + 1
+        _requisicao.segundos = getattr(_requisicao, 'segundos', 0.0) + segundos
+        lenta = segundos >= limite_lenta
+        if lenta:
+            logger.warning("SQL lento (%.1f ms): %s", segundos * 1000, ' '.join(sql.split()))
+        metricas.registrar_sql(segundos, lenta)
+    return observar
+
+
+def init_metrics(app):
+    """Ativa a coleta de métricas no app e registra a rota /metrics."""
+    registrar_observador_sql(_observar_sql(app.config.get('METRICS_SQL_LENTA', SQL_LENTA_PADRAO)))
+
+    @app.before_request
+    def iniciar_medicao():
+        _zerar_contadores()
+        g.metricas_inicio = time.perf_counter()
+
+    @app.after_request
+    def registrar_medicao(response):
+        inicio = g.pop('metricas_inicio', None)
+        if inicio is None:
+            return response
+        segundos = time.perf_counter() - inicio
+        consultas = getattr(_requisicao, 'consultas', 0)
+        # A rota (e não a URL) evita uma série por id de reserva ou quarto
+        rota = request.url_rule.rule if request.url_rule is not None else 'nao_encontrada'
+        metricas.registrar_requisicao(request.method, rota, response.status_code, segundos, consultas)
+        if app.config.get('METRICS_DEBUG_HEADER'):
+            response.headers['X-Debug-Timing'] = (
+                f"total={segundos * 1000:.1f}ms; sql={consultas}; "
+                f"sql_tempo={getattr(_requisicao, 'segundos', 0.0) * 1000:.1f}ms"
+            )
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        token = app.config.get('METRICS_TOKEN')
+        if not token:
+            abort(404)
+        enviado = request.headers.get('Authorization', '').removeprefix('Bearer ')
+        if not hmac.compare_digest(enviado.encode(), token.encode()):
+            abort(401)
+        return metricas.exportar(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
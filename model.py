@@ -1,15 +1,205 @@
+import contextvars
+import json
+import os
 import sqlite3
+import threading
+import time
+import urllib.parse
+import random
 import bcrypt
-from datetime import datetime
+from datetime import datetime, timedelta
+from availability import IndiceDisponibilidade, IndiceQuartos
+from cache import CacheTTL
 
+# Banco principal: usuários, cadastro de propriedades e os dados do hotel 1.
+# Cada outra propriedade (hotel) tem o próprio arquivo, com o mesmo esquema;
+# o app escolhe o banco a cada requisição pela propriedade do usuário logado
+# (ver usar_banco), então o lock de escrita de um hotel não bloqueia outro.
 DATABASE_NAME = 'hotel_estada_feliz.db'
 
-# --- Configurações Iniciais e Criação de DB ---
-def init_db():
-    """Cria e popula o banco de dados SQLite com dados iniciais."""
-    conn = sqlite3.connect(DATABASE_NAME)
-    cursor = conn.cursor()
+_banco_atual = contextvars.ContextVar('banco_atual', default=None)
+
+def get_database():
+    """Arquivo do banco em uso (o da propriedade da requisição, ou o principal)."""
+    return _banco_atual.get() or DATABASE_NAME
+
+def usar_banco(database):
+    """Passa a usar o banco informado (None = principal) na thread/contexto atual."""
+    _banco_atual.set(database)
+
+# --- Camada de Conexão ---
+# Cada thread mantém uma conexão aberta por arquivo de banco (um pool por
+# propriedade) e a reutiliza entre requisições, evitando o custo de
+# abrir/configurar uma conexão a cada chamada. O app Flask devolve a conexão
+# ao final de cada requisição através do teardown (ver release_connection).
+
+SQLITE_CACHED_STATEMENTS = 256 # Statements preparados mantidos por conexão
+# Espera curta pelo lock de escrita: em vez de deixar vários escritores
+# bloqueados em fila, executar_transacao() tenta novamente com backoff.
+SQLITE_BUSY_TIMEOUT = 0.05 # Segundos aguardando um lock antes de erro
+
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -8000", # ~8 MB de cache de páginas
+    "PRAGMA mmap_size = 67108864", # 64 MB mapeados em memória
+    "PRAGMA temp_store = MEMORY",
+)
+
+_local = threading.local()
+
+# --- Instrumentação de SQL ---
+# Toda conexão aberta por este módulo mede o tempo de cada execute(); os
+# observadores registrados (ex.: metrics.py) recebem (sql, segundos). Sem
+# observadores, as chamadas seguem direto para o sqlite3. O tempo medido é o
+# da execução até a primeira linha; leituras posteriores (fetch*) não entram.
+
+_observadores_sql = []
+
+def registrar_observador_sql(observador):
+    """Registra observador(sql, segundos), chamado após cada comando SQL."""
+    if observador not in _observadores_sql:
+        _observadores_sql.append(observador)
+
+def _medir(executar, sql, *args):
+    if not _observadores_sql:
+        return executar(sql, *args)
+    inicio = time.perf_counter()
+    try:
+        return executar(sql, *args)
+    finally:
+        segundos = time.perf_counter() - inicio
+        for observador in _observadores_sql:
+            observador(sql, segundos)
+
+
+class _CursorInstrumentado(sqlite3.Cursor):
+    def execute(self, sql, *args):
+        return _medir(super().execute, sql, *args)
+
+    def executemany(self, sql, *args):
+        return _medir(super().executemany, sql, *args)
+
+
+class _ConexaoInstrumentada(sqlite3.Connection):
+    def cursor(self, factory=_CursorInstrumentado):
+        return super().cursor(factory)
+
+    def execute(self, sql, *args):
+        return _medir(super().execute, sql, *args)
 
+    def executemany(self, sql, *args):
+        return _medir(super().executemany, sql, *args)
+
+
+def _open_connection(database):
+    """Abre e configura uma nova conexão SQLite."""
+    conn = sqlite3.connect(
+        database,
+        timeout=SQLITE_BUSY_TIMEOUT,
+        cached_statements=SQLITE_CACHED_STATEMENTS,
+        factory=_ConexaoInstrumentada
+    )
+    conn.row_factory = sqlite3.Row # Permite acessar colunas por nome
+    for pragma in SQLITE_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+def get_connection(database=None):
+    """Retorna a conexão da thread atual, criando-a na primeira utilização."""
+    database = database or get_database()
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(database)
+    if conn is None:
+        conn = connections[database] = _open_connection(database)
+    return conn
+
+def release_connection(exception=None):
+    """
+    Devolve as conexões da thread ao final de uma requisição.
+    Transações deixadas abertas (ex.: por uma exceção) são desfeitas,
+    mas a conexão permanece aberta para a próxima requisição.
+    """
+    for conn in getattr(_local, 'connections', {}).values():
+        if conn.in_transaction:
+            conn.rollback()
+
+def close_connection():
+    """Fecha definitivamente as conexões da thread atual."""
+    connections = getattr(_local, 'connections', {})
+    while connections:
+        _, conn = connections.popitem()
+        conn.close()
+
+# --- Transações de Escrita ---
+
+WRITE_MAX_TENTATIVAS = 6
+WRITE_BACKOFF_INICIAL = 0.01 # Segundos; dobra a cada nova tentativa
+
+def is_lock_error(erro):
+    """Indica se o erro do SQLite é de banco ocupado/bloqueado (SQLITE_BUSY)."""
+    mensagem = str(erro)
+    return isinstance(erro, sqlite3.OperationalError) and (
+        'locked' in mensagem or 'busy' in mensagem
+    )
+
+def executar_transacao(operacao, database=None):
+    """
+    Executa operacao(cursor) dentro de uma transação BEGIN IMMEDIATE e
+    retorna o seu resultado. O lock de escrita é obtido logo no início,
+    então leituras e escritas da operação enxergam um estado consistente.
+    Se o banco estiver ocupado, tenta novamente com backoff exponencial e
+    jitter (para os escritores não acordarem todos juntos) e, esgotadas as
+    tentativas, propaga o sqlite3.OperationalError.
+    """
+    conn = get_connection(database)
+    for tentativa in range(WRITE_MAX_TENTATIVAS):
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            break
+        except sqlite3.OperationalError as e:
+            if not is_lock_error(e) or tentativa == WRITE_MAX_TENTATIVAS - 1:
+                raise
+            time.sleep(WRITE_BACKOFF_INICIAL * (2 ** tentativa) * random.uniform(0.5, 1.5))
+
+    try:
+        resultado = operacao(conn.cursor())
+        conn.commit()
+        return resultado
+    except BaseException:
+        conn.rollback()
+        raise
+
+# --- Esquema do Banco e Migrações ---
+# O esquema é versionado na tabela schema_version. Cada migração é aplicada
+# uma única vez, em ordem; quando o banco já está atualizado, init_db() faz
+# apenas uma consulta e retorna.
+
+# Usuários de exemplo: (nome, email, senha, perfil_id)
+SEED_USUARIOS = [
+    ('Admin Hotel', 'admin@hotel.com', 'admin123', 1),
+    ('Hóspede', 'hospede@hotel.com', 'hospede123', 4),
+    ('Camareira', 'camareira@hotel.com', 'camareira123', 3),
+    ('Recepcionista', 'recepcionista@hotel.com', 'recepcionista123', 2),
+]
+
+# Custo (log2 de rodadas) usado nos novos hashes. Ao alterar, as senhas
+# existentes são refeitas com o novo custo no próximo login de cada usuário.
+BCRYPT_ROUNDS = 12
+
+def hash_password(password):
+    """Gera o hash bcrypt de uma senha."""
+    # O bcrypt espera um bytestring, por isso o .encode('utf-8')
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode('utf-8')
+
+def _e_banco_principal(cursor):
+    arquivo = cursor.execute("PRAGMA database_list").fetchone()[2]
+    return os.path.realpath(arquivo) == os.path.realpath(DATABASE_NAME)
+
+def _migracao_esquema_inicial(cursor):
+    """Cria as tabelas principais e os dados iniciais do hotel."""
     # Tabela PERFIS
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS perfis (
@@ -64,35 +254,21 @@ def init_db():
     ]
     cursor.executemany("INSERT OR IGNORE INTO perfis VALUES (?, ?)", perfis)
 
-    # Função auxiliar para gerar hash de senha
-    def hash_password(password):
-        # O bcrypt espera um bytestring, por isso o .encode('utf-8')
-        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-
-    # Inserir Usuário Administrador (Senha: 'admin123')
-    admin_hash = hash_password('admin123')
-    admin_user = ('Admin Hotel', 'admin@hotel.com', admin_hash, 1)
-    
-    # Inserir Usuário Hóspede (Senha: 'hospede123')
-    hospede_hash = hash_password('hospede123')
-    hospede_user = ('Hóspede', 'hospede@hotel.com', hospede_hash, 4)
-
-    # Inserir Usuário Camareira (Senha: 'camareira123')
-    camareira_hash = hash_password('camareira123')
-    camareira_user = ('Camareira', 'camareira@hotel.com', camareira_hash, 3)
-
-    # Inserir Usuário Recepcionista (Senha: 'recepcionista123')
-    recepcionista_hash = hash_password('recepcionista123')
-    recepcionista_user = ('Recepcionista', 'recepcionista@hotel.com', recepcionista_hash, 2)
-
-    try:
-        cursor.execute("INSERT INTO usuarios (nome_completo, email, senha_hash, perfil_id) VALUES (?, ?, ?, ?)", admin_user)
-        cursor.execute("INSERT INTO usuarios (nome_completo, email, senha_hash, perfil_id) VALUES (?, ?, ?, ?)", hospede_user)
-        cursor.execute("INSERT INTO usuarios (nome_completo, email, senha_hash, perfil_id) VALUES (?, ?, ?, ?)", camareira_user)
-        cursor.execute("INSERT INTO usuarios (nome_completo, email, senha_hash, perfil_id) VALUES (?, ?, ?, ?)", recepcionista_user)
-    except sqlite3.IntegrityError:
-        print("Usuários Admin e Hóspede já existem.")
+    # Os dados de exemplo só entram no banco principal; o de uma nova
+    # propriedade começa vazio (criar_propriedade)
+    if not _e_banco_principal(cursor):
+        return
 
+    # Inserir Usuários de exemplo. O hash (caro) só é gerado para os
+    # usuários que ainda não existem no banco.
+    cursor.execute("SELECT email FROM usuarios")
+    existentes = {row[0] for row in cursor.fetchall()}
+    novos_usuarios = [
+        (nome, email, hash_password(senha), perfil_id)
+        for nome, email, senha, perfil_id in SEED_USUARIOS
+        if email not in existentes
+    ]
+    cursor.executemany("INSERT INTO usuarios (nome_completo, email, senha_hash, perfil_id) VALUES (?, ?, ?, ?)", novos_usuarios)
 
     # Inserir Quartos de Exemplo
     quartos = [
@@ -103,20 +279,440 @@ def init_db():
     ]
     cursor.executemany("INSERT OR IGNORE INTO quartos VALUES (?, ?, ?, ?)", quartos)
 
+def _migracao_indices_disponibilidade(cursor):
+    """Cria o índice composto usado na busca de disponibilidade."""
+    # A ordem (quarto, checkout, checkin) faz a busca pular direto para as
+    # reservas que terminam depois do check-in pedido, ignorando o histórico
+    # passado. O status incluído no índice evita consultar a tabela.
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_reservas_quarto_periodo
+        ON reservas (numero_quarto, data_checkout, data_checkin, status_reserva)
+    ''')
+
+def _migracao_indices_listagem(cursor):
+    """Cria os índices usados na listagem paginada de reservas."""
+    # Todos terminam em data_checkin (o id_reserva é o rowid, incluído
+    # implicitamente), casando com a ordenação usada na paginação por cursor.
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_reservas_checkin ON reservas (data_checkin)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_reservas_quarto_checkin ON reservas (numero_quarto, data_checkin)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_reservas_status_checkin ON reservas (status_reserva, data_checkin)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_reservas_hospede_checkin ON reservas (nome_hospede, data_checkin)")
+
+# Tabelas cujas alterações são contadas em versoes_tabela
+TABELAS_VERSIONADAS = ('quartos', 'reservas', 'regras_tarifa')
+
+def _criar_versionamento(cursor, tabela):
+    """Registra a tabela em versoes_tabela e cria os triggers que a incrementam."""
+    cursor.execute("INSERT OR IGNORE INTO versoes_tabela (tabela) VALUES (?)", (tabela,))
+    for evento in ('INSERT', 'UPDATE', 'DELETE'):
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{tabela}_{evento.lower()}_versao
+            AFTER {evento} ON {tabela}
+            BEGIN
+                UPDATE versoes_tabela
+                SET versao = versao + 1, alterada_em = strftime('%Y-%m-%dT%H:%M:%SZ', 'now')
+                WHERE tabela = '{tabela}';
+            END
+        ''')
+
+def _migracao_versoes_tabela(cursor):
+    """Cria os contadores de alteração por tabela, mantidos por triggers."""
+    # Qualquer escrita (de qualquer processo) incrementa a versão da tabela,
+    # o que permite gerar ETags sem consultar os dados em si.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS versoes_tabela (
+            tabela TEXT PRIMARY KEY,
+            versao INTEGER NOT NULL DEFAULT 0,
+            alterada_em TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%SZ', 'now'))
+        )
+    ''')
+    for tabela in ('quartos', 'reservas'):
+        _criar_versionamento(cursor, tabela)
+
+# Expande cada reserva ativa em uma linha por noite e agrega por (data, quarto).
+# A receita da reserva é distribuída igualmente entre as noites.
+SQL_OCUPACAO_DIARIA = '''
+    WITH RECURSIVE noites (data, numero_quarto, checkout, diaria) AS (
+        SELECT data_checkin, numero_quarto, data_checkout,
+               valor_total / (julianday(data_checkout) - julianday(data_checkin))
+        FROM reservas
+        WHERE status_reserva NOT IN ('Cancelada') AND data_checkout > data_checkin
+        UNION ALL
+        SELECT date(data, '+1 day'), numero_quarto, checkout, diaria
+        FROM noites WHERE date(data, '+1 day') < checkout
+    )
+    SELECT data, numero_quarto, COUNT(*), SUM(diaria) FROM noites
+    GROUP BY data, numero_quarto
+'''
+
+def _migracao_ocupacao_diaria(cursor):
+    """Cria a tabela de resumo diário de ocupação e receita e a preenche."""
+    # Uma linha por (noite, quarto) vendido; mantida incrementalmente por
+    # add_reserva/delete_reserva e usada pelos relatórios gerenciais.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS ocupacao_diaria (
+            data DATE NOT NULL,
+            numero_quarto VARCHAR(10) NOT NULL,
+            noites INTEGER NOT NULL,
+            receita REAL NOT NULL,
+            PRIMARY KEY (data, numero_quarto)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute("DELETE FROM ocupacao_diaria")
+    cursor.execute(f"INSERT INTO ocupacao_diaria (data, numero_quarto, noites, receita) {SQL_OCUPACAO_DIARIA}")
+
+def _migracao_indice_calendario(cursor):
+    """Cria o índice por período usado pelo calendário de ocupação."""
+    # Começando pelo check-out, a busca de um período atual/futuro ignora
+    # todo o histórico já encerrado.
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_reservas_periodo ON reservas (data_checkout, data_checkin)")
+
+def _migracao_regras_tarifa(cursor):
+    """Cria a tabela de regras de tarifa (temporadas, fim de semana, permanência)."""
+    # tipo: 'temporada' e 'fim_de_semana' ajustam a diária em `percentual` nas
+    # datas [data_inicio, data_fim) (sem datas = sempre); 'permanencia' dá
+    # `percentual` de desconto no total para estadias com >= min_noites.
+    # numero_quarto NULL aplica a regra a todos os quartos.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS regras_tarifa (
+            id_regra INTEGER PRIMARY KEY,
+            tipo VARCHAR(20) NOT NULL CHECK (tipo IN ('temporada', 'fim_de_semana', 'permanencia')),
+            descricao TEXT NOT NULL DEFAULT '',
+            numero_quarto VARCHAR(10),
+            data_inicio DATE,
+            data_fim DATE,
+            min_noites INTEGER,
+            percentual REAL NOT NULL,
+            FOREIGN KEY (numero_quarto) REFERENCES quartos(numero_quarto)
+        )
+    ''')
+    _criar_versionamento(cursor, 'regras_tarifa')
+
+# Usuário hóspede (perfil 4) com exatamente o nome informado; nomes repetidos
+# são ambíguos e não são vinculados automaticamente. Usado só no backfill
+# desta migração: novas reservas são vinculadas apenas por um usuario_id
+# explícito (e-mail da conta do hóspede), nunca pelo nome.
+SQL_HOSPEDE_POR_NOME = '''
+    SELECT MIN(u.id) FROM usuarios u
+    WHERE u.perfil_id = 4 AND u.nome_completo = ?
+    GROUP BY u.nome_completo HAVING COUNT(*) = 1
+'''
+
+def _migracao_reservas_usuario(cursor):
+    """Vincula as reservas à conta do hóspede (usuarios.id), com índice."""
+    colunas = {row[1] for row in cursor.execute("PRAGMA table_info(reservas)")}
+    if 'usuario_id' not in colunas:
+        cursor.execute("ALTER TABLE reservas ADD COLUMN usuario_id INTEGER REFERENCES usuarios(id)")
+    # Backfill pelo nome, apenas quando ele identifica um único hóspede
+    cursor.execute(f'''
+        UPDATE reservas SET usuario_id = ({SQL_HOSPEDE_POR_NOME.replace('?', 'reservas.nome_hospede')})
+        WHERE usuario_id IS NULL
+    ''')
+    # Mesma ordem da paginação (data_checkin, id_reserva): o portal do
+    # hóspede lê só a faixa do índice correspondente ao usuário.
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_reservas_usuario_checkin
+        ON reservas (usuario_id, data_checkin)
+    ''')
+
+def _migracao_ciclo_reserva(cursor):
+    """Índices parciais de reservas ativas e histórico de mudanças de status."""
+    # Os índices parciais contêm apenas reservas não canceladas: o histórico
+    # de cancelamentos pode crescer sem aumentar o custo da disponibilidade.
+    # O SQLite só usa um índice parcial quando a consulta repete a condição
+    # do índice, por isso todas as buscas de conflito usam exatamente
+    # "status_reserva NOT IN ('Cancelada')". Eles substituem os índices
+    # completos equivalentes das migrações 2 e 6.
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_reservas_ativas_quarto_periodo
+        ON reservas (numero_quarto, data_checkout, data_checkin)
+        WHERE status_reserva NOT IN ('Cancelada')
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_reservas_ativas_periodo
+        ON reservas (data_checkout, data_checkin, numero_quarto)
+        WHERE status_reserva NOT IN ('Cancelada')
+    ''')
+    cursor.execute("DROP INDEX IF EXISTS idx_reservas_quarto_periodo")
+    cursor.execute("DROP INDEX IF EXISTS idx_reservas_periodo")
+
+    # Trilha de auditoria: uma linha por mudança de status (ou exclusão)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS reservas_historico (
+            id INTEGER PRIMARY KEY,
+            id_reserva INTEGER NOT NULL,
+            status_anterior VARCHAR(30),
+            status_novo VARCHAR(30) NOT NULL,
+            alterado_por INTEGER REFERENCES usuarios(id),
+            observacao TEXT NOT NULL DEFAULT '',
+            alterado_em TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%SZ', 'now'))
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_reservas_historico_reserva
+        ON reservas_historico (id_reserva, id)
+    ''')
+
+def _migracao_atributos_quartos(cursor):
+    """Adiciona os atributos pesquisáveis dos quartos (ex.: varanda, banheira)."""
+    # Lista separada por vírgulas: alterar atributos é uma escrita em quartos,
+    # o que já incrementa a versão da tabela e invalida o catálogo em cache.
+    colunas = {row[1] for row in cursor.execute("PRAGMA table_info(quartos)")}
+    if 'atributos' not in colunas:
+        cursor.execute("ALTER TABLE quartos ADD COLUMN atributos TEXT NOT NULL DEFAULT ''")
+    cursor.executemany("UPDATE quartos SET atributos = ? WHERE numero_quarto = ? AND atributos = ''", [
+        ('cama_casal,varanda', '101'),
+        ('cama_casal', '102'),
+        ('varanda,banheira,vista_mar', '201'),
+        ('acessivel', '305'),
+    ])
+
+def _migracao_eventos(cursor):
+    """Cria o log de eventos publicado aos clientes em tempo real (SSE)."""
+    # Gravado na mesma transação da alteração, o log é visto por todos os
+    # workers/processos. AUTOINCREMENT garante ids crescentes mesmo depois
+    # que os eventos antigos forem apagados (clientes retomam pelo id).
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS eventos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tipo VARCHAR(20) NOT NULL,
+            dados TEXT NOT NULL,
+            criado_em REAL NOT NULL
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_eventos_criado_em ON eventos (criado_em)")
 
-    conn.commit()
-    conn.close()
+def _migracao_propriedades(cursor):
+    """Cadastra as propriedades (hotéis) e vincula cada usuário à sua."""
+    # Só o banco principal usa estas tabelas; os das demais propriedades as
+    # recebem vazias, por compartilharem as mesmas migrações.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS propriedades (
+            id INTEGER PRIMARY KEY,
+            nome TEXT NOT NULL,
+            arquivo TEXT UNIQUE -- NULL: o próprio banco principal
+        )
+    ''')
+    colunas = {row[1] for row in cursor.execute("PRAGMA table_info(usuarios)")}
+    if 'propriedade_id' not in colunas:
+        cursor.execute("ALTER TABLE usuarios ADD COLUMN propriedade_id INTEGER NOT NULL DEFAULT 1 REFERENCES propriedades(id)")
+    if _e_banco_principal(cursor):
+        cursor.execute("INSERT OR IGNORE INTO propriedades (id, nome, arquivo) VALUES (1, 'Hotel Estada Feliz', NULL)")
+
+def _migracao_ids_reserva(cursor):
+    """Recria reservas com AUTOINCREMENT: o id de uma reserva excluída não volta a ser usado."""
+    # Sem AUTOINCREMENT, o SQLite reaproveita o maior id após uma exclusão e
+    # a nova reserva herdaria o histórico (reservas_historico) da excluída.
+    # O SQLite não altera a chave de uma tabela existente: a tabela é
+    # recriada, e os índices e triggers originais são refeitos em seguida.
+    objetos = [row[0] for row in cursor.execute(
+        "SELECT sql FROM sqlite_master WHERE tbl_name = 'reservas' AND type IN ('index', 'trigger') AND sql IS NOT NULL"
+    )]
+    cursor.execute('''
+        CREATE TABLE reservas_nova (
+            id_reserva INTEGER PRIMARY KEY AUTOINCREMENT,
+            numero_quarto VARCHAR(10) NOT NULL,
+            nome_hospede TEXT NOT NULL,
+            data_checkin DATE NOT NULL,
+            data_checkout DATE NOT NULL,
+            status_reserva VARCHAR(30) NOT NULL,
+            valor_total REAL NOT NULL,
+            usuario_id INTEGER REFERENCES usuarios(id),
+            FOREIGN KEY (numero_quarto) REFERENCES quartos(numero_quarto)
+        )
+    ''')
+    colunas = ('id_reserva, numero_quarto, nome_hospede, data_checkin, data_checkout, '
+               'status_reserva, valor_total, usuario_id')
+    cursor.execute(f"INSERT INTO reservas_nova ({colunas}) SELECT {colunas} FROM reservas")
+    cursor.execute("DROP TABLE reservas")
+    cursor.execute("ALTER TABLE reservas_nova RENAME TO reservas")
+    for sql in objetos:
+        cursor.execute(sql)
+    # Ids já excluídos ficam só no histórico: a sequência começa depois deles
+    maior_id = cursor.execute('''
+        SELECT MAX(id) FROM (
+            SELECT MAX(id_reserva) AS id FROM reservas
+            UNION ALL SELECT MAX(id_reserva) FROM reservas_historico
+        )
+    ''').fetchone()[0]
+    if maior_id:
+        cursor.execute("DELETE FROM sqlite_sequence WHERE name = 'reservas'")
+        cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('reservas', ?)", (maior_id,))
+
+# Lista ordenada de migrações: (versão, descrição, função)
+MIGRACOES = [
+    (1, 'Esquema inicial', _migracao_esquema_inicial),
+    (2, 'Índice de disponibilidade de quartos', _migracao_indices_disponibilidade),
+    (3, 'Índices da listagem paginada de reservas', _migracao_indices_listagem),
+    (4, 'Contadores de alteração por tabela', _migracao_versoes_tabela),
+    (5, 'Resumo diário de ocupação e receita', _migracao_ocupacao_diaria),
+    (6, 'Índice por período para o calendário', _migracao_indice_calendario),
+    (7, 'Regras de tarifa', _migracao_regras_tarifa),
+    (8, 'Reservas vinculadas ao usuário hóspede', _migracao_reservas_usuario),
+    (9, 'Ciclo de vida da reserva e índices parciais', _migracao_ciclo_reserva),
+    (10, 'Atributos dos quartos', _migracao_atributos_quartos),
+    (11, 'Log de eventos em tempo real', _migracao_eventos),
+    (12, 'Propriedades com banco próprio', _migracao_propriedades),
+    (13, 'Ids de reserva sem reaproveitamento', _migracao_ids_reserva),
+]
+
+SCHEMA_VERSION = MIGRACOES[-1][0]
+
+def get_schema_version(database=None):
+    """Retorna a versão atual do esquema (0 se o banco ainda não foi criado)."""
+    conn = get_connection(database)
+    try:
+        row = conn.execute("SELECT MAX(versao) FROM schema_version").fetchone()
+    except sqlite3.OperationalError:
+        return 0 # Tabela schema_version ainda não existe
+    return row[0] or 0
+
+def init_db(database=None):
+    """
+    Cria ou atualiza o banco de dados aplicando as migrações pendentes.
+    Retorna a lista de versões aplicadas (vazia se o esquema já está atual).
+    """
+    if get_schema_version(database) >= SCHEMA_VERSION:
+        return []
+
+    conn = get_connection(database)
+    cursor = conn.cursor()
+    # BEGIN IMMEDIATE serializa workers que iniciam ao mesmo tempo:
+    # apenas um aplica as migrações, os demais aguardam (com uma espera
+    # maior que a usual) e depois encontram o esquema atual.
+    cursor.execute("PRAGMA busy_timeout = 60000")
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS schema_version (
+                versao INTEGER PRIMARY KEY,
+                descricao TEXT NOT NULL,
+                aplicada_em TEXT NOT NULL
+            )
+        ''')
+        cursor.execute("SELECT COALESCE(MAX(versao), 0) FROM schema_version")
+        versao_atual = cursor.fetchone()[0]
+
+        aplicadas = []
+        for versao, descricao, migracao in MIGRACOES:
+            if versao <= versao_atual:
+                continue
+            migracao(cursor)
+            cursor.execute(
+                "INSERT INTO schema_version (versao, descricao, aplicada_em) VALUES (?, ?, ?)",
+                (versao, descricao, datetime.now().isoformat(timespec='seconds'))
+            )
+            aplicadas.append(versao)
+        conn.commit()
+        invalidar_cache_quartos(database)
+        return aplicadas
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.execute(f"PRAGMA busy_timeout = {int(SQLITE_BUSY_TIMEOUT * 1000)}")
+
+# --- Propriedades (um banco por hotel) ---
+# O cadastro fica no banco principal; o arquivo de cada propriedade é
+# relativo à pasta do banco principal. Cada banco tem as próprias conexões
+# por thread (get_connection) e o próprio lock de escrita. Relatórios da
+# rede leem todos os bancos com ATTACH, em uma conexão separada e somente
+# leitura, sem disputar o lock de escrita de nenhum hotel.
+
+PROPRIEDADE_PRINCIPAL = 1
+PROPRIEDADES_CACHE_TTL = 30.0 # Segundos
+SQLITE_MAX_ATTACHED = 10 # Limite padrão do SQLite de bancos anexados por conexão
+
+_cache_propriedades = CacheTTL(maxsize=4, ttl=PROPRIEDADES_CACHE_TTL)
+
+def _caminho_propriedade(arquivo):
+    if arquivo is None:
+        return DATABASE_NAME
+    return os.path.join(os.path.dirname(DATABASE_NAME), arquivo)
+
+def get_propriedades():
+    """Retorna {id: {'id', 'nome', 'database'}} das propriedades cadastradas."""
+    def carregar():
+        cursor = get_connection(DATABASE_NAME).execute("SELECT id, nome, arquivo FROM propriedades ORDER BY id")
+        return {
+            row['id']: {'id': row['id'], 'nome': row['nome'], 'database': _caminho_propriedade(row['arquivo'])}
+            for row in cursor.fetchall()
+        }
+    return _cache_propriedades.get_or_load(DATABASE_NAME, carregar)
+
+def get_database_propriedade(propriedade_id):
+    """Arquivo do banco da propriedade (None se ela não existir)."""
+    propriedade = get_propriedades().get(propriedade_id)
+    return propriedade['database'] if propriedade else None
+
+def criar_propriedade(nome, arquivo):
+    """Cria o banco de uma propriedade e a cadastra. Retorna o id."""
+    # O banco é criado antes do cadastro: se a criação falhar (ex.: pasta
+    # inexistente), nenhuma propriedade fica apontando para um banco inválido
+    init_db(_caminho_propriedade(arquivo))
+    def cadastrar(cursor):
+        cursor.execute("INSERT INTO propriedades (nome, arquivo) VALUES (?, ?)", (nome, arquivo))
+        return cursor.lastrowid
+    propriedade_id = executar_transacao(cadastrar, DATABASE_NAME)
+    _cache_propriedades.invalidate()
+    return propriedade_id
+
+def init_db_propriedades(ignorar_falhas=False):
+    """
+    Aplica as migrações pendentes no banco principal e no de cada propriedade.
+    Com ignorar_falhas, o banco de uma propriedade que não pode ser aberto ou
+    migrado é informado e pulado, sem impedir os demais (e a inicialização do app).
+    Retorna {arquivo: versões aplicadas} dos bancos migrados.
+    """
+    aplicadas = {DATABASE_NAME: init_db(DATABASE_NAME)}
+    _cache_propriedades.invalidate()
+    for propriedade in get_propriedades().values():
+        if propriedade['database'] in aplicadas:
+            continue
+        try:
+            aplicadas[propriedade['database']] = init_db(propriedade['database'])
+        except sqlite3.Error as e:
+            if not ignorar_falhas:
+                raise
+            print(f"Erro ao migrar o banco da propriedade {propriedade['id']} ({propriedade['database']}): {e}")
+    return aplicadas
+
+def get_ocupacao_rede(data_inicio, data_fim):
+    """
+    Retorna [(propriedade_id, noites, receita, total_quartos)] de cada
+    propriedade, para data_inicio <= data < data_fim.
+    """
+    propriedades = list(get_propriedades().values())
+    resultado = []
+    conn = sqlite3.connect(':memory:', factory=_ConexaoInstrumentada, uri=True)
+    try:
+        for i in range(0, len(propriedades), SQLITE_MAX_ATTACHED):
+            grupo = propriedades[i:i + SQLITE_MAX_ATTACHED]
+            consultas, params = [], []
+            for n, propriedade in enumerate(grupo):
+                uri = 'file:' + urllib.parse.quote(os.path.abspath(propriedade['database'])) + '?mode=ro'
+                conn.execute(f"ATTACH DATABASE ? AS p{n}", (uri,))
+                consultas.append(f'''
+                    SELECT ?, COALESCE(SUM(noites), 0), COALESCE(SUM(receita), 0), (SELECT COUNT(*) FROM p{n}.quartos)
+                    FROM p{n}.ocupacao_diaria WHERE data >= ? AND data < ?
+                ''')
+                params += [propriedade['id'], data_inicio, data_fim]
+            # Uma única consulta: leitura consistente de todos os bancos do grupo
+            resultado += [tuple(row) for row in conn.execute(' UNION ALL '.join(consultas), params)]
+            for n in range(len(grupo)):
+                conn.execute(f"DETACH DATABASE p{n}")
+    finally:
+        conn.close()
+    return resultado
 
 # --- Funções de Autenticação e Usuário ---
 
 def get_user_by_email(email):
-    """Busca um usuário por email."""
-    conn = sqlite3.connect(DATABASE_NAME)
-    conn.row_factory = sqlite3.Row # Permite acessar colunas por nome
+    """Busca um usuário por email (no banco principal)."""
+    conn = get_connection(DATABASE_NAME)
     cursor = conn.cursor()
     cursor.execute("SELECT u.*, p.nome_perfil FROM usuarios u JOIN perfis p ON u.perfil_id = p.id WHERE u.email = ?", (email,))
     user = cursor.fetchone()
-    conn.close()
     return user
 
 def check_password(hashed_password, password):
@@ -124,69 +720,529 @@ def check_password(hashed_password, password):
     # Ambas as strings devem ser bytestrings para bcrypt.checkpw
     return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
 
+def password_needs_rehash(hashed_password):
+    """Indica se o hash foi gerado com um custo diferente de BCRYPT_ROUNDS."""
+    # Formato: $2b$<custo>$<salt+hash>
+    try:
+        return int(hashed_password.split('$')[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+def update_user_password_hash(user_id, senha_hash):
+    """Substitui o hash de senha armazenado de um usuário."""
+    def atualizar(cursor):
+        cursor.execute("UPDATE usuarios SET senha_hash = ? WHERE id = ?", (senha_hash, user_id))
+        return cursor.rowcount
+    return executar_transacao(atualizar, DATABASE_NAME) > 0
+
 # --- Funções de CRUD de Reserva ---
 
 def get_all_reservas():
     """Retorna todas as reservas."""
-    conn = sqlite3.connect(DATABASE_NAME)
-    conn.row_factory = sqlite3.Row
+    conn = get_connection()
     cursor = conn.cursor()
     cursor.execute("SELECT * FROM reservas ORDER BY data_checkin DESC")
     reservas = cursor.fetchall()
-    conn.close()
     # Converte rows para lista de dicionários para fácil manipulação no Flask
     return [dict(reserva) for reserva in reservas]
 
+# --- Listagem Paginada de Reservas ---
+# Paginação por cursor (keyset): cada página continua a partir da última
+# reserva exibida, ordenando por (data_checkin, id_reserva) decrescente.
+# O custo de uma página não cresce com o tamanho do histórico.
+
+RESERVAS_POR_PAGINA = 50
+
+def encode_cursor(reserva):
+    """Gera o cursor que aponta para depois da reserva informada."""
+    return f"{reserva['data_checkin']}_{reserva['id_reserva']}"
+
+def decode_cursor(cursor):
+    """Converte o cursor em (data_checkin, id_reserva); None se inválido."""
+    try:
+        data_checkin, id_reserva = cursor.split('_')
+        datetime.strptime(data_checkin, '%Y-%m-%d')
+        return data_checkin, int(id_reserva)
+    except (AttributeError, ValueError):
+        return None
+
+def _get_pagina_reservas(condicoes, params, cursor, limite, database=None):
+    """Executa a consulta paginada com as condições informadas."""
+    posicao = decode_cursor(cursor) if cursor else None
+    if posicao:
+        condicoes = condicoes + ["(data_checkin, id_reserva) < (?, ?)"]
+        params = params + list(posicao)
+
+    where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+    conn = get_connection(database)
+    cursor_db = conn.cursor()
+    # Busca um registro a mais apenas para saber se existe próxima página
+    cursor_db.execute(f'''
+        SELECT * FROM reservas {where}
+        ORDER BY data_checkin DESC, id_reserva DESC
+        LIMIT ?
+    ''', params + [limite + 1])
+    reservas = [dict(reserva) for reserva in cursor_db.fetchall()]
+
+    proximo_cursor = None
+    if len(reservas) > limite:
+        reservas = reservas[:limite]
+        proximo_cursor = encode_cursor(reservas[-1])
+    return reservas, proximo_cursor
+
+def get_reservas_pagina(filtros=None, cursor=None, limite=RESERVAS_POR_PAGINA):
+    """
+    Retorna (reservas, proximo_cursor) com até `limite` reservas.
+    Filtros aceitos: data_inicio/data_fim (intervalo da data de check-in),
+    numero_quarto, status_reserva e nome_hospede (início do nome).
+    proximo_cursor é None na última página.
+    """
+    filtros = filtros or {}
+    condicoes, params = [], []
+    if filtros.get('data_inicio'):
+        condicoes.append("data_checkin >= ?")
+        params.append(filtros['data_inicio'])
+    if filtros.get('data_fim'):
+        condicoes.append("data_checkin <= ?")
+        params.append(filtros['data_fim'])
+    if filtros.get('numero_quarto'):
+        condicoes.append("numero_quarto = ?")
+        params.append(filtros['numero_quarto'])
+    if filtros.get('status_reserva'):
+        condicoes.append("status_reserva = ?")
+        params.append(filtros['status_reserva'])
+    if filtros.get('nome_hospede'):
+        # Busca por prefixo escrita como intervalo para poder usar o índice
+        condicoes.append("nome_hospede >= ? AND nome_hospede < ?")
+        params.extend([filtros['nome_hospede'], filtros['nome_hospede'] + '\U0010ffff'])
+    return _get_pagina_reservas(condicoes, params, cursor, limite)
+
+# --- Exportação e Importação em Massa ---
+
+EXPORT_CHUNK = 1000 # Linhas lidas por fetchmany durante a exportação
+
+# Colunas exportadas por tabela, na ordem das chaves primárias
+COLUNAS_EXPORTACAO = {
+    'reservas': ('id_reserva', 'numero_quarto', 'nome_hospede', 'data_checkin',
+                 'data_checkout', 'status_reserva', 'valor_total', 'usuario_id'),
+    'quartos': ('numero_quarto', 'capacidade_maxima', 'preco_diaria_base', 'status_limpeza', 'atributos'),
+}
+
+def iter_tabela(tabela, database, chunk=EXPORT_CHUNK):
+    """
+    Gera as linhas (tuplas, na ordem de COLUNAS_EXPORTACAO) de uma tabela do
+    banco informado lendo blocos com fetchmany, com uso de memória constante.
+    O banco é explícito: o gerador só roda durante o streaming da resposta,
+    depois que a requisição já deixou de selecionar o banco da propriedade.
+    """
+    colunas = COLUNAS_EXPORTACAO[tabela]
+    # Conexão própria: o gerador pode ser consumido por threads diferentes
+    # (resposta em streaming no asgi.py), uma de cada vez
+    conn = sqlite3.connect(database, timeout=SQLITE_BUSY_TIMEOUT, check_same_thread=False, factory=_ConexaoInstrumentada)
+    try:
+        cursor = conn.execute(f"SELECT {', '.join(colunas)} FROM {tabela} ORDER BY {colunas[0]}")
+        while True:
+            linhas = cursor.fetchmany(chunk)
+            if not linhas:
+                break
+            for linha in linhas:
+                yield tuple(linha)
+    finally:
+        conn.close()
+
+def import_reservas_lote(reservas):
+    """
+    Insere um lote de reservas em uma única transação. Cada item é
+    (numero_quarto, nome_hospede, data_checkin, data_checkout, status_reserva,
+    valor_total, id_reserva, usuario_id), com datas já validadas; id_reserva e
+    usuario_id podem ser None. Reservas cujo id_reserva já existe ou já foi
+    usado por uma reserva excluída (ex.: um arquivo exportado importado de
+    novo) são ignoradas; reservas ativas que se
+    sobrepõem a outra (do banco ou do próprio lote), de quartos ou usuários
+    inexistentes são rejeitadas. Cada reserva inserida ganha a entrada inicial
+    do histórico de status.
+    Retorna (quantidade inserida, [(posição no lote, mensagem de erro)]).
+    """
+    if not reservas:
+        return 0, []
+    # Usuários ficam no banco principal: valida os vínculos antes da transação
+    usuarios = sorted({r[7] for r in reservas if r[7] is not None})
+    usuarios_existentes = set()
+    if usuarios:
+        placeholders = ', '.join('?' for _ in usuarios)
+        cursor = get_connection(DATABASE_NAME).execute(f"SELECT id FROM usuarios WHERE id IN ({placeholders})", usuarios)
+        usuarios_existentes = {row[0] for row in cursor.fetchall()}
+
+    def importar(cursor):
+        numeros = sorted({r[0] for r in reservas})
+        placeholders = ', '.join('?' for _ in numeros)
+        cursor.execute(f"SELECT numero_quarto FROM quartos WHERE numero_quarto IN ({placeholders})", numeros)
+        quartos_existentes = {row[0] for row in cursor.fetchall()}
+
+        ids = sorted({r[6] for r in reservas if r[6] is not None})
+        ids_existentes = set()
+        if ids:
+            # Ids de reservas excluídas também contam: o histórico delas continua no banco
+            placeholders_ids = ', '.join('?' for _ in ids)
+            cursor.execute(f'''
+                SELECT id_reserva FROM reservas WHERE id_reserva IN ({placeholders_ids})
+                UNION SELECT id_reserva FROM reservas_historico WHERE id_reserva IN ({placeholders_ids})
+            ''', ids + ids)
+            ids_existentes = {row[0] for row in cursor.fetchall()}
+
+        # Carrega de uma vez as reservas do banco que podem conflitar com o lote
+        inicio = min(r[2] for r in reservas)
+        fim = max(r[3] for r in reservas)
+        cursor.execute(f'''
+            SELECT id_reserva, numero_quarto, data_checkin, data_checkout FROM reservas
+            WHERE numero_quarto IN ({placeholders})
+            AND data_checkout > ? AND data_checkin < ?
+            AND status_reserva NOT IN ('Cancelada')
+        ''', numeros + [inicio, fim])
+        ocupacao = IndiceDisponibilidade()
+        ocupacao.carregar(tuple(row) for row in cursor.fetchall())
+
+        aceitas, erros = [], []
+        for pos, reserva in enumerate(reservas):
+            numero_quarto, _, data_checkin, data_checkout, status, _, id_reserva, usuario_id = reserva
+            if id_reserva in ids_existentes:
+                erros.append((pos, f"Reserva {id_reserva} já existe ou foi excluída (ignorada)."))
+            elif numero_quarto not in quartos_existentes:
+                erros.append((pos, f"Quarto {numero_quarto} não existe."))
+            elif usuario_id is not None and usuario_id not in usuarios_existentes:
+                erros.append((pos, f"Usuário {usuario_id} não existe."))
+            elif status == 'Cancelada':
+                aceitas.append(reserva)
+            elif ocupacao.tem_conflito(numero_quarto, data_checkin, data_checkout):
+                erros.append((pos, f"Quarto {numero_quarto} já reservado entre {data_checkin} e {data_checkout}."))
+            else:
+                ocupacao.adicionar(('lote', pos), numero_quarto, data_checkin, data_checkout)
+                aceitas.append(reserva)
+            if id_reserva is not None:
+                ids_existentes.add(id_reserva) # Ids repetidos no próprio arquivo
+
+        # Os ids sem valor no arquivo são definidos aqui, seguindo a sequência
+        # da tabela (e depois dos ids explícitos do lote), para gravar reservas,
+        # histórico e resumo de ocupação com um executemany cada
+        cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'reservas'")
+        sequencia = cursor.fetchone()
+        proximo_id = max([sequencia[0] if sequencia else 0] + [r[6] for r in aceitas if r[6] is not None]) + 1
+        linhas = []
+        for numero_quarto, nome_hospede, data_checkin, data_checkout, status, valor_total, id_reserva, usuario_id in aceitas:
+            if id_reserva is None:
+                id_reserva, proximo_id = proximo_id, proximo_id + 1
+            linhas.append((id_reserva, numero_quarto, nome_hospede, data_checkin, data_checkout, status, valor_total, usuario_id))
+
+        cursor.executemany('''
+            INSERT INTO reservas
+            (id_reserva, numero_quarto, nome_hospede, data_checkin, data_checkout, status_reserva, valor_total, usuario_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', linhas)
+        cursor.executemany('''
+            INSERT INTO reservas_historico (id_reserva, status_anterior, status_novo, observacao)
+            VALUES (?, NULL, ?, 'Importada')
+        ''', [(linha[0], linha[5]) for linha in linhas])
+        cursor.executemany(SQL_SOMAR_OCUPACAO, [
+            ocupacao
+            for id_reserva, numero_quarto, _, data_checkin, data_checkout, status, valor_total, _ in linhas
+            if status != 'Cancelada'
+            for ocupacao in _linhas_ocupacao(numero_quarto, data_checkin, data_checkout, valor_total)
+        ])
+        if aceitas:
+            _registrar_evento(cursor, 'reserva', {'acao': 'importadas', 'quantidade': len(aceitas)})
+        return len(aceitas), erros
+
+    inseridas, erros = executar_transacao(importar)
+    if inseridas:
+        # Mais simples recarregar o índice em memória do que sincronizar item a item
+        _invalidar_indice_disponibilidade()
+    return inseridas, erros
+
 def get_reserva_by_id(reserva_id):
     """Retorna uma reserva específica pelo ID."""
-    conn = sqlite3.connect(DATABASE_NAME)
-    conn.row_factory = sqlite3.Row
+    conn = get_connection()
     cursor = conn.cursor()
     cursor.execute("SELECT * FROM reservas WHERE id_reserva = ?", (reserva_id,))
     reserva = cursor.fetchone()
-    conn.close()
     return dict(reserva) if reserva else None
 
+# --- Eventos em Tempo Real ---
+# As escritas em quartos e reservas registram um evento (tipo 'quarto' ou
+# 'reserva') na mesma transação; events.py os entrega aos clientes via SSE.
+
+def _registrar_evento(cursor, tipo, dados):
+    cursor.execute(
+        "INSERT INTO eventos (tipo, dados, criado_em) VALUES (?, ?, ?)",
+        (tipo, json.dumps(dados, ensure_ascii=False), time.time())
+    )
+
+def get_eventos_desde(evento_id, limite=500, database=None):
+    """Retorna [(id, tipo, dados em JSON)] dos eventos posteriores ao id informado."""
+    cursor = get_connection(database).execute(
+        "SELECT id, tipo, dados FROM eventos WHERE id > ? ORDER BY id LIMIT ?", (evento_id, limite)
+    )
+    return [tuple(row) for row in cursor.fetchall()]
+
+def get_ultimo_evento_id(database=None):
+    """Id do evento mais recente (0 se não houver)."""
+    return get_connection(database).execute("SELECT COALESCE(MAX(id), 0) FROM eventos").fetchone()[0]
+
+def limpar_eventos(retencao_segundos, database=None):
+    """Apaga os eventos mais antigos que a retenção informada."""
+    def limpar(cursor):
+        cursor.execute("DELETE FROM eventos WHERE criado_em < ?", (time.time() - retencao_segundos,))
+        return cursor.rowcount
+    return executar_transacao(limpar, database)
+
+# --- Versões das Tabelas ---
+
+def get_table_versions(tabelas=TABELAS_VERSIONADAS, database=None):
+    """Retorna {tabela: (versao, alterada_em)} para as tabelas informadas."""
+    placeholders = ', '.join('?' for _ in tabelas)
+    cursor = get_connection(database).execute(
+        f"SELECT tabela, versao, alterada_em FROM versoes_tabela WHERE tabela IN ({placeholders})",
+        tuple(tabelas)
+    )
+    return {row['tabela']: (row['versao'], row['alterada_em']) for row in cursor.fetchall()}
+
+# --- Catálogo de Quartos (cache) ---
+# Os dados da tabela quartos (capacidade, preço base, status de limpeza)
+# mudam poucas vezes por dia. O catálogo é mantido em cache por banco e
+# invalidado explicitamente a cada escrita em quartos; o TTL limita o
+# tempo em que um worker pode enxergar alterações feitas por outro processo.
+
+QUARTOS_CACHE_TTL = 30.0 # Segundos
+QUARTOS_CACHE_MAXSIZE = 32 # Bancos (propriedades) mantidos em cache
+
+_cache_quartos = CacheTTL(maxsize=QUARTOS_CACHE_MAXSIZE, ttl=QUARTOS_CACHE_TTL)
+
+def parse_atributos(texto):
+    """Converte 'a, b,c' em ('a', 'b', 'c'), sem vazios nem repetições."""
+    return tuple(dict.fromkeys(a.strip().lower() for a in (texto or '').split(',') if a.strip()))
+
+def _carregar_catalogo(database=None):
+    # Retorna (versao, catalogo, indice); o índice de busca é reconstruído
+    # sempre junto com o catálogo, então nunca fica defasado em relação a ele.
+    database = database or get_database()
+
+    def carregar():
+        conn = get_connection(database)
+        # A versão é lida antes dos dados: se mudar no meio, o catálogo será
+        # apenas recarregado mais uma vez na próxima sincronização.
+        versao = conn.execute("SELECT versao FROM versoes_tabela WHERE tabela = 'quartos'").fetchone()[0]
+        cursor = conn.execute("SELECT * FROM quartos ORDER BY numero_quarto ASC")
+        catalogo = {quarto['numero_quarto']: dict(quarto) for quarto in cursor.fetchall()}
+        indice = IndiceQuartos(
+            (q['numero_quarto'], q['capacidade_maxima'], q['preco_diaria_base'], parse_atributos(q['atributos']))
+            for q in catalogo.values()
+        )
+        return versao, catalogo, indice
+
+    return _cache_quartos.get_or_load(database, carregar)
+
+def _get_catalogo_quartos(database=None):
+    """Retorna {numero_quarto: dados do quarto}, ordenado por número."""
+    return _carregar_catalogo(database)[1]
+
+def get_indice_quartos(database=None):
+    """Retorna o IndiceQuartos (capacidade/preço/atributos) do catálogo atual."""
+    return _carregar_catalogo(database)[2]
+
+def invalidar_cache_quartos(database=None):
+    """Descarta o catálogo em cache; deve ser chamado após escrever em quartos."""
+    _cache_quartos.invalidate(database or get_database())
+
+def sincronizar_cache_quartos(versao, database=None):
+    """
+    Descarta o catálogo em cache se ele foi carregado antes da versão
+    informada da tabela quartos (ex.: alterada por outro processo).
+    """
+    database = database or get_database()
+    item = _cache_quartos.get(database)
+    if item is not None and item[0] != versao:
+        _cache_quartos.invalidate(database)
+
+def get_cache_stats():
+    """Retorna os contadores (hits, misses, ...) do cache de quartos."""
+    return _cache_quartos.stats()
+
+# --- Disponibilidade de Quartos ---
+
+# Quando ativo, a disponibilidade é calculada pelo índice em memória
+# (availability.py), mantido em sincronia por add_reserva/delete_reserva.
+# Indicado para um único processo; com vários workers, cada um mantém o seu
+# índice e só enxerga as próprias escritas, por isso o padrão é desativado.
+AVAILABILITY_INDEX_ENABLED = False
+
+_indices_disponibilidade = {} # arquivo do banco -> IndiceDisponibilidade
+
+def get_indice_disponibilidade(database=None):
+    """Retorna o índice em memória do banco, carregando-o no primeiro uso."""
+    database = database or get_database()
+    indice = _indices_disponibilidade.get(database)
+    if indice is None:
+        indice = _indices_disponibilidade.setdefault(database, IndiceDisponibilidade())
+    if not indice.carregado:
+        conn = get_connection(database)
+        cursor = conn.execute('''
+            SELECT id_reserva, numero_quarto, data_checkin, data_checkout FROM reservas
+            WHERE status_reserva NOT IN ('Cancelada')
+        ''')
+        indice.carregar(tuple(row) for row in cursor)
+    return indice
+
+def _invalidar_indice_disponibilidade():
+    """Força a recarga do índice em memória no próximo uso."""
+    indice = _indices_disponibilidade.get(get_database())
+    if indice is not None:
+        indice.invalidar()
+
+def _sync_indice_disponibilidade(adicionar=None, remover=None):
+    """Atualiza o índice em memória (se carregado) após uma escrita."""
+    indice = _indices_disponibilidade.get(get_database())
+    if indice is None or not indice.carregado:
+        return
+    if remover is not None:
+        indice.remover(remover)
+    if adicionar is not None:
+        indice.adicionar(*adicionar)
+
 def get_quartos_disponiveis(checkin_date_str, checkout_date_str):
     """
     Retorna a lista de todos os quartos que não têm reservas 
     conflitantes no período especificado.
     """
-    conn = sqlite3.connect(DATABASE_NAME)
-    conn.row_factory = sqlite3.Row
+    catalogo = _get_catalogo_quartos()
+
+    if AVAILABILITY_INDEX_ENABLED:
+        ocupados = get_indice_disponibilidade().quartos_ocupados(checkin_date_str, checkout_date_str)
+        return [dict(quarto) for numero, quarto in catalogo.items() if numero not in ocupados]
+
+    conn = get_connection()
     cursor = conn.cursor()
-    
-    # 1. Encontrar quartos reservados no período
+
+    # Anti-join: um quarto está livre se NÃO existe reserva conflitante.
     # Conflito acontece se:
     # (reserva.checkin < novo.checkout) AND (reserva.checkout > novo.checkin)
+    # Só os números são lidos do banco; os dados vêm do catálogo em cache.
     cursor.execute('''
+        SELECT q.numero_quarto FROM quartos q
+        WHERE NOT EXISTS (
+            SELECT 1 FROM reservas r
+            WHERE r.numero_quarto = q.numero_quarto
+            AND r.data_checkout > ?
+            AND r.data_checkin < ?
+            AND r.status_reserva NOT IN ('Cancelada')
+        )
+        ORDER BY q.numero_quarto ASC
+    ''', (checkin_date_str, checkout_date_str))
+
+    livres = [row['numero_quarto'] for row in cursor.fetchall()]
+    return [dict(catalogo[numero]) for numero in livres if numero in catalogo]
+
+
+def get_quartos_ocupados(checkin_date_str, checkout_date_str):
+    """Conjunto dos quartos com reserva ativa conflitante no período."""
+    if AVAILABILITY_INDEX_ENABLED:
+        return get_indice_disponibilidade().quartos_ocupados(checkin_date_str, checkout_date_str)
+    # Coberta pelo índice parcial idx_reservas_ativas_periodo
+    cursor = get_connection().execute('''
         SELECT DISTINCT numero_quarto FROM reservas
-        WHERE status_reserva NOT IN ('Cancelada') 
-        AND (
-            (data_checkin < ?) AND (data_checkout > ?)
+        WHERE data_checkout > ? AND data_checkin < ?
+        AND status_reserva NOT IN ('Cancelada')
+    ''', (checkin_date_str, checkout_date_str))
+    return {row[0] for row in cursor.fetchall()}
+
+def buscar_quartos_disponiveis(checkin_date_str, checkout_date_str, hospedes=1, preco_max=None, atributos=()):
+    """
+    Quartos livres no período que acomodam `hospedes`, com diária base até
+    preco_max e todos os atributos pedidos. Os filtros rodam no índice de
+    quartos em memória; do banco vem só o conjunto de quartos ocupados.
+    """
+    _, catalogo, indice = _carregar_catalogo()
+    numeros = indice.buscar(
+        hospedes, preco_max, atributos,
+        excluir=get_quartos_ocupados(checkin_date_str, checkout_date_str)
+    )
+    return [dict(catalogo[numero]) for numero in numeros]
+
+# --- Resumo de Ocupação (relatórios) ---
+
+SQL_SOMAR_OCUPACAO = '''
+    INSERT INTO ocupacao_diaria (data, numero_quarto, noites, receita) VALUES (?, ?, ?, ?)
+    ON CONFLICT (data, numero_quarto) DO UPDATE SET
+        noites = noites + excluded.noites,
+        receita = receita + excluded.receita
+'''
+
+def _linhas_ocupacao(numero_quarto, data_checkin, data_checkout, valor_total, sinal=1):
+    """Parâmetros de SQL_SOMAR_OCUPACAO para cada noite da reserva."""
+    checkin = datetime.strptime(data_checkin, '%Y-%m-%d').date()
+    checkout = datetime.strptime(data_checkout, '%Y-%m-%d').date()
+    noites = (checkout - checkin).days
+    if noites <= 0:
+        return []
+    diaria = valor_total / noites
+    return [((checkin + timedelta(days=i)).isoformat(), numero_quarto, sinal, sinal * diaria) for i in range(noites)]
+
+def _registrar_ocupacao(cursor, numero_quarto, data_checkin, data_checkout, valor_total, sinal=1):
+    """
+    Soma (sinal=1) ou subtrai (sinal=-1) as noites de uma reserva no resumo
+    diário. Deve ser chamada dentro da mesma transação que grava a reserva.
+    """
+    linhas = _linhas_ocupacao(numero_quarto, data_checkin, data_checkout, valor_total, sinal)
+    if not linhas:
+        return
+    cursor.executemany(SQL_SOMAR_OCUPACAO, linhas)
+    if sinal < 0:
+        cursor.execute(
+            "DELETE FROM ocupacao_diaria WHERE data >= ? AND data < ? AND numero_quarto = ? AND noites <= 0",
+            (data_checkin, data_checkout, numero_quarto)
         )
-    ''', (checkout_date_str, checkin_date_str))
-    
-    reserved_rooms = [row['numero_quarto'] for row in cursor.fetchall()]
-    
-    # 2. Selecionar todos os quartos E excluir os reservados
-    if reserved_rooms:
-        # Cria uma string de placeholders para a cláusula NOT IN
-        placeholders = ', '.join('?' for _ in reserved_rooms)
-        sql_query = f"SELECT * FROM quartos WHERE numero_quarto NOT IN ({placeholders})"
-        cursor.execute(sql_query, reserved_rooms)
-    else:
-        cursor.execute("SELECT * FROM quartos")
-
-    quartos = cursor.fetchall()
-    conn.close()
-    return [dict(quarto) for quarto in quartos]
-
-
-def add_reserva(numero_quarto, nome_hospede, data_checkin, data_checkout, valor_total):
-    """Cria uma nova reserva e a insere no DB."""
-    conn = sqlite3.connect(DATABASE_NAME)
-    cursor = conn.cursor()
+
+def rebuild_ocupacao_diaria():
+    """Recalcula todo o resumo diário a partir das reservas."""
+    def recalcular(cursor):
+        cursor.execute("DELETE FROM ocupacao_diaria")
+        cursor.execute(f"INSERT INTO ocupacao_diaria (data, numero_quarto, noites, receita) {SQL_OCUPACAO_DIARIA}")
+        return cursor.rowcount
+    return executar_transacao(recalcular)
+
+def get_ocupacao_por_data(data_inicio, data_fim):
+    """Retorna [(data, noites, receita)] agregados por dia, para data_inicio <= data < data_fim."""
+    cursor = get_connection().execute('''
+        SELECT data, SUM(noites), SUM(receita) FROM ocupacao_diaria
+        WHERE data >= ? AND data < ?
+        GROUP BY data ORDER BY data
+    ''', (data_inicio, data_fim))
+    return [tuple(row) for row in cursor.fetchall()]
+
+def get_ocupacao_por_quarto(data_inicio, data_fim):
+    """Retorna [(numero_quarto, noites, receita)] agregados por quarto no período."""
+    cursor = get_connection().execute('''
+        SELECT numero_quarto, SUM(noites), SUM(receita) FROM ocupacao_diaria
+        WHERE data >= ? AND data < ?
+        GROUP BY numero_quarto ORDER BY numero_quarto
+    ''', (data_inicio, data_fim))
+    return [tuple(row) for row in cursor.fetchall()]
+
+def get_reservas_periodo(data_inicio, data_fim):
+    """Retorna [(numero_quarto, data_checkin, data_checkout)] das reservas ativas no período."""
+    cursor = get_connection().execute('''
+        SELECT numero_quarto, data_checkin, data_checkout FROM reservas
+        WHERE data_checkout > ? AND data_checkin < ?
+        AND status_reserva NOT IN ('Cancelada')
+    ''', (data_inicio, data_fim))
+    return [tuple(row) for row in cursor.fetchall()]
+
+def add_reserva(numero_quarto, nome_hospede, data_checkin, data_checkout, valor_total, usuario_id=None):
+    """
+    Cria uma nova reserva e a insere no DB.
+    A verificação de conflito e o INSERT acontecem na mesma transação
+    (BEGIN IMMEDIATE), então duas reservas simultâneas do mesmo quarto
+    nunca são aceitas ao mesmo tempo. Sem usuario_id, a reserva não é
+    vinculada a nenhuma conta de hóspede.
+    """
     status = 'Confirmada' # Reserva é criada como confirmada
     
     # Validação de Datas
@@ -200,69 +1256,343 @@ def add_reserva(numero_quarto, nome_hospede, data_checkin, data_checkout, valor_
             pass 
     except ValueError:
         return False, "Formato de data inválido."
+    # Grava sempre AAAA-MM-DD: as buscas de conflito comparam as datas como texto
+    data_checkin, data_checkout = checkin.isoformat(), checkout.isoformat()
 
-    try:
+    def reservar(cursor):
+        # Mesma regra de conflito de get_quartos_disponiveis
+        cursor.execute('''
+            SELECT 1 FROM reservas
+            WHERE numero_quarto = ?
+            AND data_checkout > ?
+            AND data_checkin < ?
+            AND status_reserva NOT IN ('Cancelada')
+            LIMIT 1
+        ''', (numero_quarto, data_checkin, data_checkout))
+        if cursor.fetchone():
+            return None
         cursor.execute('''
             INSERT INTO reservas 
-            (numero_quarto, nome_hospede, data_checkin, data_checkout, status_reserva, valor_total) 
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (numero_quarto, nome_hospede, data_checkin, data_checkout, status, valor_total))
-        conn.commit()
-        conn.close()
-        return True, "Reserva realizada com sucesso!"
+            (numero_quarto, nome_hospede, data_checkin, data_checkout, status_reserva, valor_total, usuario_id) 
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (numero_quarto, nome_hospede, data_checkin, data_checkout, status, valor_total, usuario_id))
+        id_reserva = cursor.lastrowid
+        _registrar_historico(cursor, id_reserva, None, status)
+        _registrar_evento(cursor, 'reserva', {
+            'acao': 'criada', 'id_reserva': id_reserva, 'numero_quarto': numero_quarto,
+            'nome_hospede': nome_hospede, 'data_checkin': data_checkin, 'data_checkout': data_checkout,
+            'status_reserva': status, 'valor_total': valor_total,
+        })
+        _registrar_ocupacao(cursor, numero_quarto, data_checkin, data_checkout, valor_total)
+        return id_reserva
+
+    try:
+        id_reserva = executar_transacao(reservar)
     except sqlite3.IntegrityError as e:
-        conn.close()
         return False, f"Erro ao adicionar reserva: {e}"
+    except sqlite3.OperationalError as e:
+        if is_lock_error(e):
+            return False, "Sistema ocupado no momento. Tente novamente em instantes."
+        raise
 
+    if id_reserva is None:
+        return False, f"Quarto {numero_quarto} já está reservado no período selecionado."
 
-def delete_reserva(reserva_id):
-    """Deleta uma reserva específica pelo ID."""
-    conn = sqlite3.connect(DATABASE_NAME)
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM reservas WHERE id_reserva = ?", (reserva_id,))
-    conn.commit()
-    rows_deleted = cursor.rowcount
-    conn.close()
+    _sync_indice_disponibilidade(adicionar=(id_reserva, numero_quarto, data_checkin, data_checkout))
+    return True, "Reserva realizada com sucesso!"
+
+
+# Tipos de erro de uma reserva em bloco: dados inválidos, quartos indisponíveis
+# no período e banco ocupado (lock de escrita); a API os traduz em status HTTP.
+ERROS_BLOCO = ('invalido', 'conflito', 'ocupado')
+
+def add_reservas_bloco(candidatos, quantidade, nome_hospede, data_checkin, data_checkout, valores, usuario_id=None):
+    """
+    Reserva um bloco de quartos (grupos, eventos) em uma única transação:
+    os `quantidade` primeiros quartos livres entre os candidatos, na ordem
+    dada. valores: {numero_quarto: valor_total} já cotados. Tudo ou nada: se
+    não houver quartos livres suficientes, nada é gravado.
+    Retorna (sucesso, mensagem, [(id_reserva, numero_quarto, valor_total)], erro),
+    com erro em ERROS_BLOCO (None quando a reserva é feita).
+    """
+    status = 'Confirmada'
+
+    def reservar(cursor):
+        # Uma consulta para todo o bloco (índice parcial idx_reservas_ativas_periodo);
+        # dentro do BEGIN IMMEDIATE, nenhuma outra reserva entra até o commit
+        cursor.execute('''
+            SELECT DISTINCT numero_quarto FROM reservas
+            WHERE data_checkout > ? AND data_checkin < ?
+            AND status_reserva NOT IN ('Cancelada')
+        ''', (data_checkin, data_checkout))
+        ocupados = {row[0] for row in cursor.fetchall()}
+        escolhidos = [numero for numero in candidatos if numero not in ocupados][:quantidade]
+        if len(escolhidos) < quantidade:
+            return None, sorted(set(candidatos) & ocupados)
+
+        criadas = []
+        for numero_quarto in escolhidos:
+            cursor.execute('''
+                INSERT INTO reservas 
+                (numero_quarto, nome_hospede, data_checkin, data_checkout, status_reserva, valor_total, usuario_id) 
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (numero_quarto, nome_hospede, data_checkin, data_checkout, status, valores[numero_quarto], usuario_id))
+            criadas.append((cursor.lastrowid, numero_quarto, valores[numero_quarto]))
+        for id_reserva, numero_quarto, valor_total in criadas:
+            _registrar_historico(cursor, id_reserva, None, status)
+            _registrar_evento(cursor, 'reserva', {
+                'acao': 'criada', 'id_reserva': id_reserva, 'numero_quarto': numero_quarto,
+                'nome_hospede': nome_hospede, 'data_checkin': data_checkin, 'data_checkout': data_checkout,
+                'status_reserva': status, 'valor_total': valor_total,
+            })
+            _registrar_ocupacao(cursor, numero_quarto, data_checkin, data_checkout, valor_total)
+        return criadas, []
+
+    try:
+        criadas, indisponiveis = executar_transacao(reservar)
+    except sqlite3.IntegrityError as e:
+        return False, f"Erro ao reservar o bloco: {e}", [], 'invalido'
+    except sqlite3.OperationalError as e:
+        if is_lock_error(e):
+            return False, "Sistema ocupado no momento. Tente novamente em instantes.", [], 'ocupado'
+        raise
+
+    if criadas is None:
+        if indisponiveis and len(candidatos) == quantidade:
+            return False, f"Quarto(s) {', '.join(indisponiveis)} já reservado(s) no período. Nenhuma reserva do bloco foi feita.", [], 'conflito'
+        return False, f"Não há {quantidade} quartos livres que atendam aos critérios no período. Nenhuma reserva do bloco foi feita.", [], 'conflito'
+
+    for id_reserva, numero_quarto, _ in criadas:
+        _sync_indice_disponibilidade(adicionar=(id_reserva, numero_quarto, data_checkin, data_checkout))
+    return True, f"Bloco de {len(criadas)} quarto(s) reservado com sucesso!", criadas, None
+
+# --- Ciclo de Vida da Reserva ---
+# Confirmada -> Check-in -> Check-out; Confirmada -> Cancelada.
+# Cancelar é uma mudança de status (a linha permanece para o histórico);
+# só reservas não canceladas ocupam o quarto.
+
+STATUS_RESERVA = ('Confirmada', 'Check-in', 'Check-out', 'Cancelada')
+
+TRANSICOES_RESERVA = {
+    'Confirmada': ('Check-in', 'Cancelada'),
+    'Check-in': ('Check-out',),
+}
+
+def _registrar_historico(cursor, reserva_id, status_anterior, status_novo, alterado_por=None, observacao=''):
+    cursor.execute('''
+        INSERT INTO reservas_historico (id_reserva, status_anterior, status_novo, alterado_por, observacao)
+        VALUES (?, ?, ?, ?, ?)
+    ''', (reserva_id, status_anterior, status_novo, alterado_por, observacao))
+
+def alterar_status_reserva(reserva_id, novo_status, alterado_por=None, observacao=''):
+    """
+    Aplica uma transição de status à reserva e registra no histórico
+    (alterado_por: id do usuário que fez a mudança). Retorna (sucesso, mensagem).
+    """
+    def alterar(cursor):
+        cursor.execute("SELECT * FROM reservas WHERE id_reserva = ?", (reserva_id,))
+        reserva = cursor.fetchone()
+        if reserva is None:
+            return None
+        atual = reserva['status_reserva']
+        if novo_status not in TRANSICOES_RESERVA.get(atual, ()):
+            return atual
+        cursor.execute("UPDATE reservas SET status_reserva = ? WHERE id_reserva = ?", (novo_status, reserva_id))
+        _registrar_historico(cursor, reserva_id, atual, novo_status, alterado_por, observacao)
+        _registrar_evento(cursor, 'reserva', {'acao': 'status', 'id_reserva': reserva_id, 'status_reserva': novo_status})
+        if novo_status == 'Cancelada':
+            _registrar_ocupacao(
+                cursor, reserva['numero_quarto'], reserva['data_checkin'],
+                reserva['data_checkout'], reserva['valor_total'], sinal=-1
+            )
+        return True
+
+    try:
+        resultado = executar_transacao(alterar)
+    except sqlite3.OperationalError as e:
+        if is_lock_error(e):
+            return False, "Sistema ocupado no momento. Tente novamente em instantes."
+        raise
+
+    if resultado is None:
+        return False, "Reserva não encontrada."
+    if resultado is not True:
+        return False, f"Não é possível passar a reserva de '{resultado}' para '{novo_status}'."
+    if novo_status == 'Cancelada':
+        _sync_indice_disponibilidade(remover=reserva_id)
+    return True, f"Reserva #{reserva_id} atualizada para '{novo_status}'."
+
+def get_historico_reserva(reserva_id):
+    """Retorna as mudanças de status da reserva, da mais antiga para a mais recente."""
+    cursor = get_connection().execute('''
+        SELECT status_anterior, status_novo, observacao, alterado_em, alterado_por
+        FROM reservas_historico WHERE id_reserva = ? ORDER BY id
+    ''', (reserva_id,))
+    historico = [dict(row) for row in cursor.fetchall()]
+    # Os autores (usuarios) ficam no banco principal, não no da propriedade
+    ids = sorted({item['alterado_por'] for item in historico if item['alterado_por'] is not None})
+    nomes = {}
+    if ids:
+        placeholders = ', '.join('?' for _ in ids)
+        nomes = dict(get_connection(DATABASE_NAME).execute(
+            f"SELECT id, nome_completo FROM usuarios WHERE id IN ({placeholders})", ids
+        ).fetchall())
+    for item in historico:
+        item['alterado_por'] = nomes.get(item['alterado_por'])
+    return historico
+
+def delete_reserva(reserva_id, alterado_por=None):
+    """
+    Exclui fisicamente uma reserva (ex.: lançada por engano). Para o fluxo
+    normal use alterar_status_reserva(..., 'Cancelada'); a exclusão também
+    fica registrada no histórico. O id (AUTOINCREMENT) não é reaproveitado.
+    """
+    def deletar(cursor):
+        cursor.execute("SELECT * FROM reservas WHERE id_reserva = ?", (reserva_id,))
+        reserva = cursor.fetchone()
+        if reserva is None:
+            return 0
+        cursor.execute("DELETE FROM reservas WHERE id_reserva = ?", (reserva_id,))
+        rows_deleted = cursor.rowcount
+        _registrar_historico(cursor, reserva_id, reserva['status_reserva'], 'Excluída', alterado_por)
+        _registrar_evento(cursor, 'reserva', {'acao': 'excluida', 'id_reserva': reserva_id})
+        if reserva['status_reserva'] != 'Cancelada':
+            _registrar_ocupacao(
+                cursor, reserva['numero_quarto'], reserva['data_checkin'],
+                reserva['data_checkout'], reserva['valor_total'], sinal=-1
+            )
+        return rows_deleted
+
+    rows_deleted = executar_transacao(deletar)
+    if rows_deleted > 0:
+        _sync_indice_disponibilidade(remover=reserva_id)
     return rows_deleted > 0
 
-def get_room_price(numero_quarto):
-    """Obtém o preço base da diária de um quarto."""
-    conn = sqlite3.connect(DATABASE_NAME)
-    cursor = conn.cursor()
-    cursor.execute("SELECT preco_diaria_base FROM quartos WHERE numero_quarto = ?", (numero_quarto,))
-    price = cursor.fetchone()
-    conn.close()
-    return price[0] if price else None
+# --- Regras de Tarifa ---
+
+def get_regras_tarifa():
+    """Retorna todas as regras de tarifa."""
+    cursor = get_connection().execute("SELECT * FROM regras_tarifa ORDER BY tipo, data_inicio, id_regra")
+    return [dict(regra) for regra in cursor.fetchall()]
+
+def add_regra_tarifa(tipo, percentual, descricao='', numero_quarto=None, data_inicio=None, data_fim=None, min_noites=None):
+    """Cria uma regra de tarifa e retorna o seu id."""
+    def inserir(cursor):
+        cursor.execute('''
+            INSERT INTO regras_tarifa
+            (tipo, descricao, numero_quarto, data_inicio, data_fim, min_noites, percentual)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (tipo, descricao, numero_quarto, data_inicio, data_fim, min_noites, percentual))
+        return cursor.lastrowid
+    return executar_transacao(inserir)
+
+def delete_regra_tarifa(id_regra):
+    """Remove uma regra de tarifa."""
+    def deletar(cursor):
+        cursor.execute("DELETE FROM regras_tarifa WHERE id_regra = ?", (id_regra,))
+        return cursor.rowcount
+    return executar_transacao(deletar) > 0
 
 def get_all_quartos():
     """Retorna todos os quartos com seus status."""
-    conn = sqlite3.connect(DATABASE_NAME)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM quartos ORDER BY numero_quarto ASC")
-    quartos = cursor.fetchall()
-    conn.close()
-    return [dict(quarto) for quarto in quartos]
+    # Cópias, para que alterações feitas pelo chamador não afetem o cache
+    return [dict(quarto) for quarto in _get_catalogo_quartos().values()]
+
+def update_quarto_atributos(numero_quarto, atributos):
+    """Define os atributos de um quarto (lista de nomes)."""
+    def atualizar(cursor):
+        texto = ','.join(parse_atributos(','.join(atributos)))
+        cursor.execute("UPDATE quartos SET atributos = ? WHERE numero_quarto = ?", (texto, numero_quarto))
+        if cursor.rowcount:
+            _registrar_evento(cursor, 'quarto', {'numero_quarto': numero_quarto, 'atributos': texto})
+        return cursor.rowcount
+
+    rows_updated = executar_transacao(atualizar)
+    invalidar_cache_quartos()
+    return rows_updated > 0
 
 def update_quarto_status(numero_quarto, novo_status):
     """Atualiza o status de limpeza de um quarto."""
-    conn = sqlite3.connect(DATABASE_NAME)
-    cursor = conn.cursor()
-    cursor.execute("UPDATE quartos SET status_limpeza = ? WHERE numero_quarto = ?", (novo_status, numero_quarto))
-    conn.commit()
-    rows_updated = cursor.rowcount
-    conn.close()
+    def atualizar(cursor):
+        cursor.execute("UPDATE quartos SET status_limpeza = ? WHERE numero_quarto = ?", (novo_status, numero_quarto))
+        if cursor.rowcount:
+            _registrar_evento(cursor, 'quarto', {'numero_quarto': numero_quarto, 'status_limpeza': novo_status})
+        return cursor.rowcount
+
+    rows_updated = executar_transacao(atualizar)
+    invalidar_cache_quartos()
     return rows_updated > 0
 
-def get_reservas_by_hospede(nome_hospede):
-    """Retorna todas as reservas de um hóspede específico."""
-    conn = sqlite3.connect(DATABASE_NAME)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM reservas WHERE nome_hospede = ? ORDER BY data_checkin DESC", (nome_hospede,))
-    reservas = cursor.fetchall()
-    conn.close()
-    return [dict(reserva) for reserva in reservas]
+def update_quartos_status_lote(atualizacoes):
+    """
+    Atualiza o status de limpeza de vários quartos em uma única transação.
+    Recebe uma lista de (numero_quarto, novo_status) e retorna
+    {numero_quarto: True/False}, indicando se o quarto existe e foi atualizado.
+    """
+    if not atualizacoes:
+        return {}
+    numeros = sorted({numero for numero, _ in atualizacoes})
+
+    def atualizar(cursor):
+        placeholders = ', '.join('?' for _ in numeros)
+        cursor.execute(f"SELECT numero_quarto FROM quartos WHERE numero_quarto IN ({placeholders})", numeros)
+        existentes = {row[0] for row in cursor.fetchall()}
+        aplicadas = [(status, numero) for numero, status in atualizacoes if numero in existentes]
+        cursor.executemany("UPDATE quartos SET status_limpeza = ? WHERE numero_quarto = ?", aplicadas)
+        for status, numero in aplicadas:
+            _registrar_evento(cursor, 'quarto', {'numero_quarto': numero, 'status_limpeza': status})
+        return existentes
+
+    existentes = executar_transacao(atualizar)
+    invalidar_cache_quartos()
+    return {numero: numero in existentes for numero in numeros}
+
+def _decode_cursor_rede(cursor):
+    # Cursor do portal do hóspede: data_checkin_propriedade_id_reserva
+    try:
+        data_checkin, propriedade_id, id_reserva = cursor.split('_')
+        datetime.strptime(data_checkin, '%Y-%m-%d')
+        return data_checkin, int(propriedade_id), int(id_reserva)
+    except (AttributeError, ValueError):
+        return None
+
+def get_reservas_by_usuario(usuario_id, cursor=None, limite=RESERVAS_POR_PAGINA):
+    """
+    Retorna (reservas, proximo_cursor) vinculadas à conta de um hóspede, em
+    todas as propriedades: cada banco é consultado (pelo índice do usuário) e
+    as páginas são intercaladas por (data_checkin, propriedade, id_reserva)
+    decrescente. Cada reserva leva 'propriedade_id' e 'propriedade' (nome).
+    """
+    posicao = _decode_cursor_rede(cursor) if cursor else None
+    reservas, ha_mais = [], False
+    for propriedade in get_propriedades().values():
+        condicoes, params = ["usuario_id = ?"], [usuario_id]
+        if posicao:
+            data_checkin, propriedade_id, id_reserva = posicao
+            if propriedade['id'] < propriedade_id:
+                condicoes.append("data_checkin <= ?")
+                params.append(data_checkin)
+            elif propriedade['id'] > propriedade_id:
+                condicoes.append("data_checkin < ?")
+                params.append(data_checkin)
+            else:
+                condicoes.append("(data_checkin, id_reserva) < (?, ?)")
+                params += [data_checkin, id_reserva]
+        pagina, proximo = _get_pagina_reservas(condicoes, params, None, limite, propriedade['database'])
+        ha_mais = ha_mais or proximo is not None
+        for reserva in pagina:
+            reserva['propriedade_id'] = propriedade['id']
+            reserva['propriedade'] = propriedade['nome']
+        reservas += pagina
+
+    reservas.sort(key=lambda r: (r['data_checkin'], r['propriedade_id'], r['id_reserva']), reverse=True)
+    proximo_cursor = None
+    if len(reservas) > limite or ha_mais:
+        reservas = reservas[:limite]
+        ultima = reservas[-1]
+        proximo_cursor = f"{ultima['data_checkin']}_{ultima['propriedade_id']}_{ultima['id_reserva']}"
+    return reservas, proximo_cursor
 
-# Inicializa o DB na primeira execução do módulo
-init_db()
\ No newline at end of file
+# Permite criar/atualizar o banco diretamente: python model.py
+if __name__ == '__main__':
+    print(f"Migrações aplicadas: {init_db() or 'nenhuma (esquema atual)'}")
\ No newline at end of file
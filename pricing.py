@@ -0,0 +1,166 @@
+from array import array
+from datetime import date, timedelta
+import model
+from cache import CacheTTL
+
+# --- Motor de Tarifas ---
+# As regras de tarifa (tabela regras_tarifa) são compiladas uma única vez em
+# tabelas de diárias por data: para cada quarto, um array com o valor de cada
+# noite dentro do horizonte. Cotar uma estadia passa a ser somar uma fatia
+# desse array (O(noites)), sem avaliar regra nenhuma por requisição.
+#
+#   temporada     -> diária * (1 + percentual/100) nas noites do período
+#   fim_de_semana -> idem, apenas nas noites de sexta e sábado
+#   permanencia   -> desconto de percentual% no total da estadia com
+#                    pelo menos min_noites (vale o maior desconto aplicável)
+#
+# Regras com numero_quarto NULL valem para todos os quartos. Quartos com o
+# mesmo preço base e sem regras próprias compartilham o mesmo array.
+#
+# A tabela guarda as versões de quartos e regras_tarifa (versoes_tabela) com
+# que foi compilada; cada cotação confere as versões atuais e recompila a
+# tabela se outro processo alterou preços ou regras.
+
+TARIFAS_DIAS_PASSADOS = 30 # Noites anteriores a hoje mantidas na tabela
+TARIFAS_HORIZONTE = 730 # Noites a partir de hoje mantidas na tabela
+TARIFAS_CACHE_TTL = 60.0 # Segundos; renova o início da tabela com a data de hoje
+TARIFAS_TABELAS_FONTE = ('quartos', 'regras_tarifa')
+TARIFAS_CACHE_MAXSIZE = 32 # Bancos (propriedades) mantidos em cache
+
+NOITES_FIM_DE_SEMANA = (4, 5) # Sexta e sábado (date.weekday())
+
+def _aplicar_regra(multiplicadores, regra, inicio):
+    """Multiplica, no array, as noites cobertas pela regra (temporada ou fim de semana)."""
+    dias = len(multiplicadores)
+    a, b = 0, dias
+    if regra['data_inicio']:
+        a = max((date.fromisoformat(regra['data_inicio']) - inicio).days, 0)
+    if regra['data_fim']:
+        b = min((date.fromisoformat(regra['data_fim']) - inicio).days, dias)
+    if a >= b:
+        return
+    fator = 1 + regra['percentual'] / 100
+    if regra['tipo'] == 'fim_de_semana':
+        base = inicio.weekday()
+        posicoes = (i for i in range(a, b) if (base + i) % 7 in NOITES_FIM_DE_SEMANA)
+    else:
+        posicoes = range(a, b)
+    for i in posicoes:
+        multiplicadores[i] *= fator
+
+
+class TabelaTarifas:
+    """Diárias pré-calculadas por quarto e por noite, para inicio <= noite < inicio + dias."""
+
+    def __init__(self, precos_base, regras, inicio, dias, versoes=None):
+        self.inicio = inicio
+        self.dias = dias
+        self.versoes = versoes # {tabela: versão} dos dados usados na compilação
+        self.precos_base = precos_base
+        self.regras = regras
+        self._descontos = sorted(
+            (r for r in regras if r['tipo'] == 'permanencia'),
+            key=lambda r: r['percentual'], reverse=True
+        )
+        self._diarias = self._compilar()
+
+    def _compilar(self):
+        por_noite = [r for r in self.regras if r['tipo'] != 'permanencia']
+        globais = array('d', [1.0]) * self.dias
+        for regra in por_noite:
+            if regra['numero_quarto'] is None:
+                _aplicar_regra(globais, regra, self.inicio)
+
+        especificas = {}
+        for regra in por_noite:
+            if regra['numero_quarto'] is not None:
+                especificas.setdefault(regra['numero_quarto'], []).append(regra)
+
+        diarias = {}
+        compartilhadas = {} # preço base -> array (quartos sem regras próprias)
+        for numero_quarto, preco in self.precos_base.items():
+            regras_quarto = especificas.get(numero_quarto)
+            if not regras_quarto and preco in compartilhadas:
+                diarias[numero_quarto] = compartilhadas[preco]
+                continue
+            multiplicadores = array('d', globais)
+            for regra in regras_quarto or ():
+                _aplicar_regra(multiplicadores, regra, self.inicio)
+            tabela = array('d', (round(preco * m, 2) for m in multiplicadores))
+            if not regras_quarto:
+                compartilhadas[preco] = tabela
+            diarias[numero_quarto] = tabela
+        return diarias
+
+    def cobre(self, checkin, checkout):
+        """Indica se o período está inteiramente dentro do horizonte da tabela."""
+        return checkin >= self.inicio and (checkout - self.inicio).days <= self.dias
+
+    def _desconto(self, numero_quarto, noites):
+        for regra in self._descontos:
+            if (regra['numero_quarto'] in (None, numero_quarto)
+                    and noites >= (regra['min_noites'] or 0)):
+                return regra['percentual']
+        return 0.0
+
+    def valor_estadia(self, numero_quarto, checkin, checkout):
+        """Soma as diárias do período (datas) e aplica o desconto por permanência."""
+        diarias = self._diarias.get(numero_quarto)
+        if diarias is None:
+            return None
+        a = (checkin - self.inicio).days
+        b = (checkout - self.inicio).days
+        total = sum(diarias[a:b])
+        desconto = self._desconto(numero_quarto, b - a)
+        return round(total * (1 - desconto / 100), 2)
+
+
+_cache_tarifas = CacheTTL(maxsize=TARIFAS_CACHE_MAXSIZE, ttl=TARIFAS_CACHE_TTL)
+
+def _carregar_dados():
+    precos_base = {
+        numero: quarto['preco_diaria_base']
+        for numero, quarto in model._get_catalogo_quartos().items()
+    }
+    return precos_base, model.get_regras_tarifa()
+
+def get_tabela_tarifas():
+    """
+    Retorna a tabela de tarifas do banco atual, compilando-a se necessário
+    ou se quartos/regras_tarifa mudaram desde a compilação.
+    """
+    database = model.get_database()
+    # Lidas antes dos dados: uma alteração no meio só causa mais uma recompilação
+    versoes = {tabela: versao for tabela, (versao, _) in model.get_table_versions(TARIFAS_TABELAS_FONTE).items()}
+    tabela = _cache_tarifas.get(database)
+    if tabela is not None and tabela.versoes == versoes:
+        return tabela
+    # Os preços base vêm do catálogo de quartos, que também precisa estar atual
+    model.sincronizar_cache_quartos(versoes['quartos'])
+    precos_base, regras = _carregar_dados()
+    inicio = date.today() - timedelta(days=TARIFAS_DIAS_PASSADOS)
+    tabela = TabelaTarifas(precos_base, regras, inicio, TARIFAS_DIAS_PASSADOS + TARIFAS_HORIZONTE, versoes)
+    _cache_tarifas.set(database, tabela)
+    return tabela
+
+def invalidar_tarifas():
+    """Descarta as tabelas compiladas; deve ser chamado após alterar regras ou preços."""
+    _cache_tarifas.invalidate(model.get_database())
+
+def _tabela_para(checkin, checkout):
+    tabela = get_tabela_tarifas()
+    if tabela.cobre(checkin, checkout):
+        return tabela
+    # Fora do horizonte (reservas muito antigas ou muito distantes): compila
+    # uma tabela só para o período, sem guardá-la em cache.
+    precos_base, regras = _carregar_dados()
+    return TabelaTarifas(precos_base, regras, checkin, (checkout - checkin).days)
+
+def calcular_valor_estadia(numero_quarto, checkin, checkout):
+    """Valor total da estadia (datas); None se o quarto não existir."""
+    return _tabela_para(checkin, checkout).valor_estadia(numero_quarto, checkin, checkout)
+
+def cotar_quartos(numeros_quartos, checkin, checkout):
+    """Cota de uma só vez a estadia em vários quartos: {numero_quarto: valor}."""
+    tabela = _tabela_para(checkin, checkout)
+    return {numero: tabela.valor_estadia(numero, checkin, checkout) for numero in numeros_quartos}
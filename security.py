@@ -0,0 +1,87 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# --- Limite de Tentativas (Token Bucket) ---
+
+class TokenBucket:
+    """Balde de fichas: permite rajadas de até `capacidade` e repõe `taxa` fichas por segundo."""
+
+    def __init__(self, capacidade, taxa):
+        self.capacidade = capacidade
+        self.taxa = taxa
+        self.fichas = float(capacidade)
+        self.atualizado_em = time.monotonic()
+
+    def _repor(self, agora):
+        self.fichas = min(self.capacidade, self.fichas + (agora - self.atualizado_em) * self.taxa)
+        self.atualizado_em = agora
+
+    def consumir(self, agora=None):
+        """Consome uma ficha; retorna False se o balde estiver vazio."""
+        self._repor(agora if agora is not None else time.monotonic())
+        if self.fichas >= 1:
+            self.fichas -= 1
+            return True
+        return False
+
+
+class RateLimiter:
+    """
+    Um TokenBucket por chave (ex.: IP ou e-mail), seguro entre threads. Guarda
+    no máximo `max_chaves` chaves: acima disso, descarta a usada há mais tempo (LRU).
+    """
+
+    def __init__(self, capacidade, taxa, max_chaves=10000):
+        self.capacidade = capacidade
+        self.taxa = taxa
+        self.max_chaves = max_chaves
+        self._lock = threading.Lock()
+        self._baldes = OrderedDict() # chave -> TokenBucket, da menos à mais recente
+
+    def permitir(self, chave):
+        """Registra uma tentativa da chave; retorna False se o limite foi excedido."""
+        agora = time.monotonic()
+        with self._lock:
+            balde = self._baldes.get(chave)
+            if balde is None:
+                balde = self._baldes[chave] = TokenBucket(self.capacidade, self.taxa)
+                if len(self._baldes) > self.max_chaves:
+                    self._baldes.popitem(last=False)
+            else:
+                self._baldes.move_to_end(chave)
+            return balde.consumir(agora)
+
+
+# --- Verificação de Senhas em Pool Limitado ---
+
+class VerificacaoIndisponivel(Exception):
+    """O pool de verificação de senhas está saturado."""
+
+
+class PasswordVerifier:
+    """
+    Executa verificações bcrypt (propositalmente caras) em um pool de threads
+    de tamanho fixo, com fila limitada. Uma rajada de logins ocupa no máximo
+    `max_workers` núcleos; o excedente é recusado em vez de enfileirar sem fim
+    e travar as threads que atendem as demais requisições.
+    """
+
+    def __init__(self, verificar, max_workers=2, max_fila=8, timeout=10.0):
+        self._verificar = verificar
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='bcrypt')
+        self._vagas = threading.BoundedSemaphore(max_workers + max_fila)
+        self.timeout = timeout
+
+    def verificar(self, *args):
+        """Executa verificar(*args) no pool; levanta VerificacaoIndisponivel se saturado."""
+        if not self._vagas.acquire(blocking=False):
+            raise VerificacaoIndisponivel()
+        try:
+            futuro = self._executor.submit(self._verificar, *args)
+        except BaseException:
+            self._vagas.release()
+            raise
+        futuro.add_done_callback(lambda _: self._vagas.release())
+        return futuro.result(timeout=self.timeout)
@@ -0,0 +1,182 @@
+import secrets
+import threading
+import time
+from flask import current_app
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin, SecureCookieSessionInterface
+from itsdangerous import BadSignature, Signer
+from werkzeug.datastructures import CallbackDict
+from model import get_connection, executar_transacao
+
+# --- Sessões no Servidor ---
+# Backends disponíveis (config SESSION_BACKEND):
+#   'sqlite'     -> sessões em um banco SQLite (WAL) próprio, compartilhável
+#                   entre workers/hosts que acessem o mesmo arquivo;
+#   'cookie'     -> cookie assinado sem estado no servidor (padrão do Flask),
+#                   suficiente para os poucos dados guardados no login;
+#   'filesystem' -> Flask-Session com um arquivo por sessão (comportamento antigo).
+
+SESSION_SQLITE_PATH = 'sessoes.db'
+SESSION_LIMPEZA_INTERVALO = 300 # Segundos entre limpezas de sessões expiradas
+
+class SqliteSession(CallbackDict, SessionMixin):
+    """Sessão cujos dados ficam no banco; o cookie guarda apenas o id assinado."""
+
+    def __init__(self, initial=None, sid=None, new=False, expira_em=None):
+        def on_update(self):
+            self.modified = True
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.expira_em = expira_em
+        self.modified = False
+        self.sid_anterior = None
+
+    def regenerar(self):
+        """Passa a usar um novo id; o registro do id anterior é apagado ao salvar."""
+        if not self.new and self.sid_anterior is None:
+            self.sid_anterior = self.sid
+        self.sid = secrets.token_urlsafe(32)
+        self.modified = True
+
+
+class SqliteSessionInterface(SessionInterface):
+    """Armazena as sessões na tabela sessoes de um banco SQLite."""
+
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, database=SESSION_SQLITE_PATH, limpeza_intervalo=SESSION_LIMPEZA_INTERVALO):
+        self.database = database
+        self.limpeza_intervalo = limpeza_intervalo
+        self._proxima_limpeza = 0.0
+        self._lock = threading.Lock()
+        self._criar_tabela()
+
+    def _criar_tabela(self):
+        def criar(cursor):
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS sessoes (
+                    sid TEXT PRIMARY KEY,
+                    dados TEXT NOT NULL,
+                    expira_em REAL NOT NULL
+                )
+            ''')
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessoes_expira_em ON sessoes (expira_em)")
+        executar_transacao(criar, self.database)
+
+    def _get_signer(self, app):
+        return Signer(app.secret_key, salt='sessao-sqlite')
+
+    def _get_lifetime(self, app):
+        return app.permanent_session_lifetime.total_seconds()
+
+    def limpar_expiradas(self):
+        """Remove de uma só vez todas as sessões expiradas."""
+        def limpar(cursor):
+            cursor.execute("DELETE FROM sessoes WHERE expira_em <= ?", (time.time(),))
+            return cursor.rowcount
+        return executar_transacao(limpar, self.database)
+
+    def _limpar_se_necessario(self):
+        # Apenas uma thread por processo faz a limpeza a cada intervalo
+        agora = time.monotonic()
+        with self._lock:
+            if agora < self._proxima_limpeza:
+                return
+            self._proxima_limpeza = agora + self.limpeza_intervalo
+        self.limpar_expiradas()
+
+    def open_session(self, app, request):
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if cookie:
+            try:
+                sid = self._get_signer(app).unsign(cookie).decode('utf-8')
+            except BadSignature:
+                sid = None
+            if sid:
+                row = get_connection(self.database).execute(
+                    "SELECT dados, expira_em FROM sessoes WHERE sid = ? AND expira_em > ?",
+                    (sid, time.time())
+                ).fetchone()
+                if row:
+                    return SqliteSession(self.serializer.loads(row['dados']), sid=sid, expira_em=row['expira_em'])
+        return SqliteSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def save_session(self, app, session, response):
+        self._limpar_se_necessario()
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        if not session:
+            if session.modified and not session.new:
+                executar_transacao(
+                    lambda cursor: cursor.executemany(
+                        "DELETE FROM sessoes WHERE sid = ?", [(session.sid,), (session.sid_anterior,)]
+                    ),
+                    self.database
+                )
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        # Sem alterações, a sessão só é regravada quando já passou da metade
+        # do tempo de vida: mantém a expiração deslizante sem uma escrita por requisição.
+        lifetime = self._get_lifetime(app)
+        agora = time.time()
+        renovar = session.expira_em is None or session.expira_em - agora < lifetime / 2
+        if not (session.modified or session.new or renovar):
+            return
+
+        expira_em = agora + lifetime
+        dados = self.serializer.dumps(dict(session))
+
+        def gravar(cursor):
+            if session.sid_anterior is not None:
+                # Id regenerado (login): o id antigo deixa de valer
+                cursor.execute("DELETE FROM sessoes WHERE sid = ?", (session.sid_anterior,))
+            cursor.execute(
+                "INSERT OR REPLACE INTO sessoes (sid, dados, expira_em) VALUES (?, ?, ?)",
+                (session.sid, dados, expira_em)
+            )
+        executar_transacao(gravar, self.database)
+        response.set_cookie(
+            name,
+            self._get_signer(app).sign(session.sid).decode('utf-8'),
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
+
+
+def regenerar_sessao(sessao):
+    """
+    Troca o id da sessão no servidor (contra fixação de sessão), mantendo os
+    dados. Chamada no login e na troca de propriedade; no backend 'cookie'
+    não há id no servidor e nada precisa ser feito.
+    """
+    regenerar = getattr(sessao, 'regenerar', None)
+    if regenerar is not None:
+        regenerar()
+    elif hasattr(current_app.session_interface, 'regenerate'):
+        current_app.session_interface.regenerate(sessao) # Flask-Session ('filesystem')
+
+
+def init_session(app):
+    """Configura o backend de sessão escolhido em app.config['SESSION_BACKEND']."""
+    backend = app.config.get('SESSION_BACKEND', 'sqlite')
+    if backend == 'sqlite':
+        app.session_interface = SqliteSessionInterface(app.config.get('SESSION_SQLITE_PATH', SESSION_SQLITE_PATH))
+    elif backend == 'cookie':
+        app.session_interface = SecureCookieSessionInterface()
+    elif backend == 'filesystem':
+        from flask_session import Session
+        app.config.setdefault('SESSION_TYPE', 'filesystem')
+        Session(app)
+    else:
+        raise ValueError(f"SESSION_BACKEND desconhecido: {backend}")
@@ -0,0 +1,64 @@
+// Atualizações em tempo real (Server-Sent Events) das páginas de quartos e reservas.
+// Aplica cada mudança recebida de /eventos na linha correspondente, sem recarregar a página.
+(() => {
+    if (!window.EventSource) return;
+
+    const CORES_STATUS = { 'Confirmada': 'var(--color-secondary)', 'Cancelada': 'var(--color-danger)' };
+
+    function destacar(linha) {
+        linha.style.transition = 'background-color 1s';
+        linha.style.backgroundColor = 'rgba(243, 156, 18, 0.25)';
+        setTimeout(() => { linha.style.backgroundColor = ''; }, 1500);
+    }
+
+    function mostrarAviso() {
+        const aviso = document.getElementById('avisos-eventos');
+        if (aviso) aviso.hidden = false;
+    }
+
+    function atualizarQuarto(dados) {
+        if (dados.status_limpeza === undefined) return; // Mudança só de atributos
+        const linha = document.querySelector(`tr[data-quarto="${CSS.escape(dados.numero_quarto)}"]`);
+        if (!linha) return;
+        const atual = linha.querySelector('input[name="status_atual"]');
+        const select = linha.querySelector('select[name="status_limpeza"]');
+        // Não sobrescreve uma alteração que o usuário ainda não salvou
+        if (select && select.value === atual.value) select.value = dados.status_limpeza;
+        atual.value = dados.status_limpeza;
+        linha.querySelector('.status-limpeza').textContent = dados.status_limpeza;
+        destacar(linha);
+    }
+
+    function atualizarReserva(dados) {
+        if (dados.acao === 'criada' || dados.acao === 'importadas') {
+            mostrarAviso();
+            return;
+        }
+        const linha = document.querySelector(`tr[data-reserva="${dados.id_reserva}"]`);
+        if (!linha) return;
+        if (dados.acao === 'excluida') {
+            linha.remove();
+            return;
+        }
+        const status = linha.querySelector('.status-reserva');
+        status.textContent = dados.status_reserva;
+        status.style.color = CORES_STATUS[dados.status_reserva] || '#f39c12';
+        // Mantém só os botões das transições válidas a partir do novo status
+        const tabela = linha.closest('table');
+        const transicoes = JSON.parse(tabela.dataset.transicoes || '{}')[dados.status_reserva] || [];
+        const formularios = [...linha.querySelectorAll('form[data-status]')];
+        formularios.forEach((form) => {
+            if (!transicoes.includes(form.dataset.status)) form.remove();
+        });
+        // Transição nova (ex.: Check-out após o Check-in) só aparece recarregando
+        const existentes = formularios.map((form) => form.dataset.status);
+        if (transicoes.some((t) => !existentes.includes(t))) {
+            mostrarAviso();
+        }
+        destacar(linha);
+    }
+
+    const fonte = new EventSource('/eventos');
+    fonte.addEventListener('quarto', (e) => atualizarQuarto(JSON.parse(e.data)));
+    fonte.addEventListener('reserva', (e) => atualizarReserva(JSON.parse(e.data)));
+})();
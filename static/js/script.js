@@ -3,4 +3,13 @@
             const theme = document.cookie.split(';').find(item => item.trim().startsWith('theme='));
             const themeValue = theme ? theme.split('=')[1] : 'light';
             document.body.className = themeValue;
-        });
\ No newline at end of file
+
+            // Troca de tema sem recarregar a página: o servidor só grava o cookie (204)
+            document.querySelectorAll('.theme-switcher a[data-theme]').forEach((link) => {
+                link.addEventListener('click', (event) => {
+                    event.preventDefault();
+                    document.body.className = link.dataset.theme;
+                    fetch(link.href, { headers: { 'X-Requested-With': 'fetch' }, credentials: 'same-origin' });
+                });
+            });
+        });
@@ -0,0 +1,56 @@
+import os
+import sqlite3
+import sys
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import model
+import controller
+from security import RateLimiter
+
+
+@pytest.fixture(scope='session')
+def banco_modelo(tmp_path_factory):
+    """Banco migrado, com os dados de exemplo, criado uma vez por sessão de testes."""
+    diretorio = tmp_path_factory.mktemp('hotel')
+    cwd = os.getcwd()
+    os.chdir(diretorio) # sessoes.db do app
+    model.DATABASE_NAME = str(diretorio / 'hotel_estada_feliz.db')
+    import app # Cria e migra o banco na importação
+    yield model.DATABASE_NAME
+    os.chdir(cwd)
+
+
+@pytest.fixture
+def banco(banco_modelo, tmp_path, monkeypatch):
+    """Cópia própria do banco para cada teste (caches e conexões são por arquivo)."""
+    database = str(tmp_path / 'hotel_estada_feliz.db')
+    destino = sqlite3.connect(database)
+    model.get_connection(banco_modelo).backup(destino)
+    destino.close()
+    monkeypatch.setattr(model, 'DATABASE_NAME', database)
+    yield database
+    model.close_connection()
+
+
+@pytest.fixture
+def app_hotel(banco):
+    from app import app
+    return app
+
+
+@pytest.fixture
+def entrar(app_hotel, monkeypatch):
+    """entrar(email, senha) -> cliente de teste já autenticado."""
+    # Os limites de login são globais do processo; cada teste começa zerado
+    monkeypatch.setattr(controller, '_limite_login_ip', RateLimiter(*controller.LOGIN_LIMITE_IP))
+    monkeypatch.setattr(controller, '_limite_login_email', RateLimiter(*controller.LOGIN_LIMITE_EMAIL))
+
+    def entrar(email, senha):
+        cliente = app_hotel.test_client()
+        resposta = cliente.post('/login', data={'email': email, 'password': senha})
+        assert resposta.status_code == 302
+        return cliente
+    return entrar
@@ -0,0 +1,74 @@
+import pytest
+
+
+@pytest.fixture
+def recepcao(entrar):
+    return entrar('recepcionista@hotel.com', 'recepcionista123')
+
+
+def bloco(cliente, **dados):
+    base = {'nome_hospede': 'Congresso', 'data_checkin': '2032-06-01', 'data_checkout': '2032-06-03'}
+    return cliente.post('/api/v1/reservas/bloco', json={**base, **dados})
+
+
+def test_bloco_reserva_tudo_ou_nada(recepcao):
+    resposta = bloco(recepcao, quantidade=2, hospedes=2)
+    assert resposta.status_code == 201
+    assert len(resposta.get_json()['reservas']) == 2
+    # Só 3 quartos acomodam 2 hóspedes: sobra um, o bloco de 2 não cabe
+    assert bloco(recepcao, quantidade=2, hospedes=2).status_code == 409
+    assert bloco(recepcao, quartos=['305', '999']).status_code == 400
+
+
+@pytest.mark.parametrize('dados', [
+    {'data_checkin': None},
+    {'data_checkout': 20320603},
+    {'nome_hospede': 7, 'quantidade': 1},
+    {'quantidade': 2.9},
+    {'quantidade': '2.9'},
+    {'quantidade': True},
+])
+def test_bloco_com_tipos_invalidos_responde_400(recepcao, dados):
+    resposta = bloco(recepcao, **{'quantidade': 1, **dados})
+    assert resposta.status_code == 400
+    assert resposta.get_json()['erro']
+
+
+def test_calendario(recepcao):
+    assert bloco(recepcao, quartos=['101']).status_code == 201
+    resposta = recepcao.get('/api/v1/calendario?inicio=2032-05-31&fim=2032-06-04')
+    assert resposta.status_code == 200
+    assert resposta.get_json()['quartos']['101'] == '0110'
+
+
+def test_calendario_longo_demais_responde_400_sem_etag(recepcao):
+    resposta = recepcao.get('/api/v1/calendario?inicio=2032-01-01&fim=2034-01-01')
+    assert resposta.status_code == 400
+    assert 'ETag' not in resposta.headers
+
+
+def test_historico_revalidado_sem_ler_o_historico(recepcao, monkeypatch):
+    import controller
+    reserva_id = bloco(recepcao, quartos=['102']).get_json()['reservas'][0]['id_reserva']
+    url = f'/api/v1/reservas/{reserva_id}/historico'
+    resposta = recepcao.get(url)
+    assert resposta.status_code == 200
+    assert [h['status_novo'] for h in resposta.get_json()['historico']] == ['Confirmada']
+
+    def nao_deve_ler(reserva_id):
+        raise AssertionError('histórico lido em uma resposta 304')
+    monkeypatch.setattr(controller, 'get_historico_reserva', nao_deve_ler)
+    assert recepcao.get(url, headers={'If-None-Match': resposta.headers['ETag']}).status_code == 304
+    assert recepcao.get('/api/v1/reservas/999999/historico').status_code == 404
+
+
+def test_etag_muda_apenas_quando_a_tabela_muda(recepcao):
+    import model
+    resposta = recepcao.get('/api/v1/quartos')
+    etag = resposta.headers['ETag']
+    assert recepcao.get('/api/v1/quartos', headers={'If-None-Match': etag}).status_code == 304
+    assert recepcao.get('/api/v1/quartos', headers={'If-Modified-Since': resposta.headers['Last-Modified']}).status_code == 304
+    model.update_quarto_status('101', 'Sujo')
+    nova = recepcao.get('/api/v1/quartos', headers={'If-None-Match': etag})
+    assert nova.status_code == 200
+    assert {q['numero_quarto']: q['status_limpeza'] for q in nova.get_json()['quartos']}['101'] == 'Sujo'
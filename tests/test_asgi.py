@@ -0,0 +1,94 @@
+import asyncio
+import pytest
+from flask import Flask, Response, request, stream_with_context, g
+
+
+@pytest.fixture(scope='module')
+def asgi(banco_modelo):
+    # asgi.py importa o app, que cria/migra o banco: só depois do banco temporário
+    import asgi as modulo
+    return modulo
+
+
+@pytest.fixture(scope='module')
+def app_teste():
+    app = Flask(__name__)
+
+    @app.route('/eco', methods=['POST'])
+    def eco():
+        return {'corpo': request.get_data(as_text=True), 'form': request.form.to_dict()}
+
+    @app.route('/stream')
+    def stream():
+        g.valor = 'contexto'
+        def gerar():
+            for i in range(200):
+                # Só funciona se o contexto da requisição acompanhar a leitura entre threads
+                yield f"{g.valor}-{i:04d}-" + 'x' * 1000 + '\n'
+        return Response(stream_with_context(gerar()), mimetype='text/plain')
+
+    return app
+
+
+def chamar(aplicacao, metodo, caminho, partes=(b'',), cabecalhos=()):
+    """Executa uma requisição ASGI; retorna as mensagens enviadas pelo app."""
+    async def executar():
+        entrada = [
+            {'type': 'http.request', 'body': parte, 'more_body': i < len(partes) - 1}
+            for i, parte in enumerate(partes)
+        ]
+        enviadas = []
+
+        async def receive():
+            if entrada:
+                return entrada.pop(0)
+            await asyncio.Event().wait() # O cliente não desconecta
+
+        async def send(mensagem):
+            enviadas.append(mensagem)
+
+        scope = {
+            'type': 'http', 'method': metodo, 'path': caminho, 'query_string': b'',
+            'headers': list(cabecalhos), 'server': ('teste', 80),
+        }
+        await aplicacao(scope, receive, send)
+        return enviadas
+    return asyncio.run(executar())
+
+def corpo_resposta(enviadas):
+    return b''.join(m.get('body', b'') for m in enviadas if m['type'] == 'http.response.body')
+
+
+def test_corpo_sem_content_length(asgi, app_teste):
+    aplicacao = asgi.AplicacaoASGI(app_teste)
+    enviadas = chamar(
+        aplicacao, 'POST', '/eco', partes=(b'email=a%40b.com', b'&senha=123'),
+        cabecalhos=[(b'content-type', b'application/x-www-form-urlencoded')]
+    )
+    assert enviadas[0]['status'] == 200
+    assert b'"email":"a@b.com"' in corpo_resposta(enviadas).replace(b' ', b'')
+
+def test_corpo_com_content_length(asgi, app_teste):
+    aplicacao = asgi.AplicacaoASGI(app_teste)
+    enviadas = chamar(
+        aplicacao, 'POST', '/eco', partes=(b'abc',),
+        cabecalhos=[(b'content-type', b'text/plain'), (b'content-length', b'3')]
+    )
+    assert enviadas[0]['status'] == 200
+    assert b'"corpo":"abc"' in corpo_resposta(enviadas).replace(b' ', b'')
+
+def test_corpo_acima_do_limite(asgi, app_teste):
+    aplicacao = asgi.AplicacaoASGI(app_teste, max_corpo=10)
+    enviadas = chamar(aplicacao, 'POST', '/eco', partes=(b'x' * 8, b'x' * 8))
+    assert enviadas[0]['status'] == 413
+
+def test_streaming_em_lotes(asgi, app_teste):
+    aplicacao = asgi.AplicacaoASGI(app_teste, threads=4)
+    enviadas = chamar(aplicacao, 'GET', '/stream')
+    assert enviadas[0]['status'] == 200
+    corpos = [m for m in enviadas if m['type'] == 'http.response.body']
+    assert len(corpos) > 2 # Enviado em partes, não de uma vez
+    assert corpos[-1]['more_body'] is False
+    linhas = corpo_resposta(enviadas).decode().splitlines()
+    assert len(linhas) == 200
+    assert linhas[-1].startswith('contexto-0199-')
@@ -0,0 +1,24 @@
+import model
+from benchmarks import bench
+
+
+def test_percentil_e_regressoes():
+    assert bench.percentil([], 99) == 0.0
+    assert bench.percentil([0.3, 0.1, 0.2], 50) == 0.2
+    baseline = {'x': {'p50_ms': 1.0, 'p99_ms': 2.0}}
+    atual = {'x': {'n': 10, 'p50_ms': 1.2, 'p99_ms': 3.0, 'ops_s': 100.0}}
+    _, regressoes = bench.comparar(atual, baseline, tolerancia=0.25)
+    assert regressoes == ['x: p99_ms 2.00 -> 3.00 ms']
+    assert bench.comparar(atual, None, tolerancia=0.25)[1] == []
+
+
+def test_hotel_sintetico_sem_sobreposicao(banco):
+    numeros, total = bench.popular_banco(model, quartos=5, anos=1, semente=1)
+    assert len(numeros) == 5 and total > 0
+    conflitos = model.get_connection().execute('''
+        SELECT COUNT(*) FROM reservas a JOIN reservas b
+        ON a.numero_quarto = b.numero_quarto AND a.id_reserva < b.id_reserva
+        AND a.data_checkout > b.data_checkin AND a.data_checkin < b.data_checkout
+    ''').fetchone()[0]
+    assert conflitos == 0
+    assert {q['numero_quarto'] for q in model.get_all_quartos()} >= set(numeros)
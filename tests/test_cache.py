@@ -0,0 +1,43 @@
+import time
+from cache import CacheTTL
+
+
+def test_ttl_e_descarte_lru():
+    cache = CacheTTL(maxsize=2, ttl=0.05)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1 # 'a' passa a ser o mais recente
+    cache.set('c', 3)
+    assert cache.get('b') is None and cache.get('a') == 1
+    time.sleep(0.06)
+    assert cache.get('a') is None
+    assert cache.stats()['evictions'] == 1
+
+
+def test_get_or_load_carrega_uma_vez():
+    cache = CacheTTL()
+    chamadas = []
+    carregar = lambda: chamadas.append(1) or len(chamadas)
+    assert cache.get_or_load('k', carregar) == 1
+    assert cache.get_or_load('k', carregar) == 1
+    cache.invalidate('k')
+    assert cache.get_or_load('k', carregar) == 2
+
+
+def test_invalidacao_durante_o_carregamento_nao_fica_em_cache():
+    cache = CacheTTL()
+
+    def carregar_e_invalidar(chave):
+        def carregar():
+            # Valor lido do banco; uma escrita invalida a chave antes do set
+            cache.invalidate(chave)
+            return 'antigo'
+        return carregar
+
+    assert cache.get_or_load('k', carregar_e_invalidar('k')) == 'antigo'
+    assert cache.get('k') is None
+    assert cache.get_or_load('k', carregar_e_invalidar(None)) == 'antigo'
+    assert cache.get('k') is None
+    # Invalidar outra chave não impede o cache desta
+    assert cache.get_or_load('k', carregar_e_invalidar('outra')) == 'antigo'
+    assert cache.get('k') == 'antigo'
@@ -0,0 +1,79 @@
+import sqlite3
+import model
+
+
+def ultima_reserva():
+    return model.get_connection().execute("SELECT MAX(id_reserva) FROM reservas").fetchone()[0]
+
+
+def test_transicoes_de_status(banco):
+    assert model.add_reserva('101', 'Ana', '2031-01-10', '2031-01-12', 300.0)[0]
+    reserva_id = ultima_reserva()
+    assert not model.alterar_status_reserva(reserva_id, 'Check-out')[0]
+    assert model.alterar_status_reserva(reserva_id, 'Check-in')[0]
+    assert not model.alterar_status_reserva(reserva_id, 'Cancelada')[0]
+    assert model.alterar_status_reserva(reserva_id, 'Check-out')[0]
+    assert [h['status_novo'] for h in model.get_historico_reserva(reserva_id)] == ['Confirmada', 'Check-in', 'Check-out']
+
+
+def test_cancelada_libera_o_quarto(banco):
+    assert model.add_reserva('102', 'Ana', '2031-02-01', '2031-02-05', 600.0)[0]
+    assert model.alterar_status_reserva(ultima_reserva(), 'Cancelada')[0]
+    assert '102' not in model.get_quartos_ocupados('2031-02-01', '2031-02-05')
+    assert model.add_reserva('102', 'Bia', '2031-02-02', '2031-02-04', 300.0)[0]
+
+
+def test_id_de_reserva_excluida_nao_e_reaproveitado(banco):
+    assert model.add_reserva('101', 'Ana', '2031-03-01', '2031-03-03', 300.0)[0]
+    excluida = ultima_reserva()
+    model.alterar_status_reserva(excluida, 'Check-in')
+    assert model.delete_reserva(excluida)
+
+    assert model.add_reserva('101', 'Bia', '2031-03-01', '2031-03-03', 300.0)[0]
+    nova = ultima_reserva()
+    assert nova > excluida
+    assert [h['status_novo'] for h in model.get_historico_reserva(nova)] == ['Confirmada']
+
+
+def test_importacao_nao_reutiliza_id_excluido(banco):
+    assert model.add_reserva('101', 'Ana', '2031-04-01', '2031-04-03', 300.0)[0]
+    excluida = ultima_reserva()
+    assert model.delete_reserva(excluida)
+    inseridas, erros = model.import_reservas_lote([
+        ('102', 'Bia', '2031-04-01', '2031-04-03', 'Confirmada', 300.0, excluida, None),
+    ])
+    assert inseridas == 0 and len(erros) == 1
+
+
+def test_migracao_preserva_reservas_indices_e_triggers(tmp_path):
+    # Banco no esquema anterior (versão 12), com uma reserva já excluída
+    database = str(tmp_path / 'legado.db')
+    conn = model.get_connection(database)
+    cursor = conn.cursor()
+    cursor.execute("CREATE TABLE schema_version (versao INTEGER PRIMARY KEY, descricao TEXT NOT NULL, aplicada_em TEXT NOT NULL)")
+    for versao, descricao, migracao in model.MIGRACOES[:-1]:
+        migracao(cursor)
+        cursor.execute("INSERT INTO schema_version VALUES (?, ?, '')", (versao, descricao))
+    conn.commit()
+    conn.execute("INSERT INTO quartos (numero_quarto, capacidade_maxima, preco_diaria_base) VALUES ('A', 1, 10.0)")
+    for i in (1, 2, 3):
+        conn.execute("INSERT INTO reservas (numero_quarto, nome_hospede, data_checkin, data_checkout, status_reserva, valor_total) "
+                     "VALUES ('A', 'x', '2031-01-0' || ?, '2031-01-0' || (? + 1), 'Confirmada', 10.0)", (i, i))
+        conn.execute("INSERT INTO reservas_historico (id_reserva, status_novo) VALUES (?, 'Confirmada')", (i,))
+    conn.execute("DELETE FROM reservas WHERE id_reserva = 3")
+    conn.commit()
+    indices = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE tbl_name = 'reservas' AND sql IS NOT NULL")}
+
+    try:
+        assert model.init_db(database) == [model.SCHEMA_VERSION]
+        depois = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE tbl_name = 'reservas' AND sql IS NOT NULL")}
+        assert depois == indices # Índices (inclusive os parciais) e triggers de versão recriados
+        assert [row[0] for row in conn.execute("SELECT id_reserva FROM reservas ORDER BY 1")] == [1, 2]
+        versao = conn.execute("SELECT versao FROM versoes_tabela WHERE tabela = 'reservas'").fetchone()[0]
+        conn.execute("INSERT INTO reservas (numero_quarto, nome_hospede, data_checkin, data_checkout, status_reserva, valor_total) "
+                     "VALUES ('A', 'y', '2031-02-01', '2031-02-02', 'Confirmada', 10.0)")
+        assert conn.execute("SELECT MAX(id_reserva) FROM reservas").fetchone()[0] == 4
+        assert conn.execute("SELECT versao FROM versoes_tabela WHERE tabela = 'reservas'").fetchone()[0] == versao + 1
+        conn.rollback()
+    finally:
+        model.close_connection()
@@ -0,0 +1,46 @@
+import subprocess
+import sys
+import threading
+import model
+from conftest import RAIZ
+
+
+def test_conexao_reutilizada_por_thread(banco):
+    conn = model.get_connection()
+    assert model.get_connection() is conn
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+
+    outras = []
+    thread = threading.Thread(target=lambda: (outras.append(model.get_connection()), model.close_connection()))
+    thread.start()
+    thread.join()
+    assert outras[0] is not conn
+
+
+def test_release_desfaz_transacao_aberta_e_mantem_a_conexao(banco):
+    conn = model.get_connection()
+    conn.execute("UPDATE quartos SET status_limpeza = 'Em limpeza' WHERE numero_quarto = '101'")
+    assert conn.in_transaction
+    model.release_connection()
+    assert not conn.in_transaction and model.get_connection() is conn
+    status = conn.execute("SELECT status_limpeza FROM quartos WHERE numero_quarto = '101'").fetchone()[0]
+    assert status == 'Limpo'
+
+
+def test_importar_o_model_nao_cria_o_banco(tmp_path):
+    subprocess.run([sys.executable, '-c', 'import model'], cwd=tmp_path, check=True,
+                   env={'PYTHONPATH': RAIZ, 'PATH': ''})
+    assert not (tmp_path / 'hotel_estada_feliz.db').exists()
+
+
+def test_migracoes_aplicadas_uma_unica_vez(tmp_path, monkeypatch):
+    database = str(tmp_path / 'novo.db')
+    monkeypatch.setattr(model, 'DATABASE_NAME', database) # Os dados iniciais só vão para o banco principal
+    try:
+        assert model.init_db(database) == list(range(1, model.SCHEMA_VERSION + 1))
+        assert model.get_schema_version(database) == model.SCHEMA_VERSION
+        assert model.init_db(database) == []
+        usuarios = model.get_connection(database).execute("SELECT COUNT(*) FROM usuarios").fetchone()[0]
+        assert usuarios == 4
+    finally:
+        model.close_connection()
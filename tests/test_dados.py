@@ -0,0 +1,88 @@
+import io
+import json
+import model
+from data_transfer import exportar, importar_reservas
+
+
+def importar(texto, formato='csv'):
+    return importar_reservas(io.StringIO(texto), formato)
+
+
+def test_importacao_normaliza_as_datas(banco):
+    resumo = importar(
+        "numero_quarto,nome_hospede,data_checkin,data_checkout,valor_total\n"
+        "101,Ana,2030-1-5,2030-1-9,600\n"
+    )
+    assert resumo['inseridas'] == 1
+    datas = model.get_connection().execute("SELECT data_checkin, data_checkout FROM reservas WHERE nome_hospede = 'Ana'").fetchone()
+    assert tuple(datas) == ('2030-01-05', '2030-01-09')
+    # A estadia importada bloqueia o quarto
+    assert not model.add_reserva('101', 'Bia', '2030-01-06', '2030-01-07', 150.0)[0]
+
+
+def test_linhas_jsonl_invalidas_viram_erros_sem_interromper(banco):
+    linhas = [
+        json.dumps({'numero_quarto': '101', 'nome_hospede': 'Ana', 'data_checkin': '2030-02-01', 'data_checkout': '2030-02-03', 'valor_total': 300}),
+        '{"numero_quarto": "102", ',
+        '',
+        '["102", "Bia"]',
+        json.dumps({'numero_quarto': '102', 'nome_hospede': 'Caio', 'data_checkin': '2030-02-01', 'data_checkout': '2030-02-03', 'valor_total': 300}),
+    ]
+    resumo = importar('\n'.join(linhas) + '\n', 'jsonl')
+    assert resumo['inseridas'] == 2
+    assert [numero_linha for numero_linha, _ in resumo['erros']] == [2, 4]
+    assert resumo['erros'][0][1].startswith('JSON inválido')
+    assert resumo['erros'][1][1] == 'Cada linha deve ser um objeto JSON.'
+
+
+def test_erros_do_csv_apontam_a_linha_do_arquivo(banco):
+    resumo = importar(
+        "numero_quarto,nome_hospede,data_checkin,data_checkout,valor_total\n"
+        "101,Ana,2030-03-01,2030-03-03,300\n"
+        "999,Bia,2030-03-01,2030-03-03,300\n"
+        "101,Caio,2030-03-05,2030-03-03,300\n"
+    )
+    assert resumo['inseridas'] == 1
+    assert sorted(numero_linha for numero_linha, _ in resumo['erros']) == [3, 4]
+
+
+def test_exportacao_e_reimportacao(banco, tmp_path):
+    model.add_reserva('101', 'Ana', '2030-04-01', '2030-04-03', 300.0)
+    model.add_reserva('102', 'Bia', '2030-04-01', '2030-04-04', 450.0)
+    exportado = ''.join(exportar('reservas', 'csv', banco))
+
+    # Reimportar no mesmo banco não duplica nada
+    resumo = importar(exportado)
+    assert resumo['inseridas'] == 0
+    assert all('já existe' in mensagem for _, mensagem in resumo['erros'])
+
+    # Em um banco vazio, as reservas mantêm os ids, ganham histórico e entram no resumo
+    model.criar_propriedade('Hotel Vazio', 'vazio.db')
+    vazio = str(tmp_path / 'vazio.db')
+    model.usar_banco(vazio)
+    try:
+        model.get_connection().executemany(
+            "INSERT INTO quartos (numero_quarto, capacidade_maxima, preco_diaria_base) VALUES (?, 2, 150.0)", [('101',), ('102',)]
+        )
+        model.get_connection().commit()
+        assert importar(exportado)['inseridas'] == resumo['lidas']
+        assert ''.join(exportar('reservas', 'csv', vazio)) == exportado
+        ids = [row[0] for row in model.get_connection().execute("SELECT id_reserva FROM reservas")]
+        assert all(model.get_historico_reserva(i)[0]['observacao'] == 'Importada' for i in ids)
+        assert model.get_ocupacao_por_data('2030-04-03', '2030-04-04') == [('2030-04-03', 1, 150.0)]
+    finally:
+        model.usar_banco(None)
+
+
+def test_lote_sem_ids_segue_a_sequencia(banco):
+    model.add_reserva('101', 'Ana', '2030-05-01', '2030-05-02', 150.0)
+    ultimo = model.get_connection().execute("SELECT MAX(id_reserva) FROM reservas").fetchone()[0]
+    inseridas, erros = model.import_reservas_lote([
+        ('101', 'Bia', '2030-05-02', '2030-05-03', 'Confirmada', 150.0, None, None),
+        ('102', 'Caio', '2030-05-02', '2030-05-03', 'Confirmada', 150.0, ultimo + 5, None),
+        ('102', 'Duda', '2030-05-03', '2030-05-04', 'Cancelada', 150.0, None, None),
+        ('102', 'Eva', '2030-05-02', '2030-05-04', 'Confirmada', 300.0, None, None),
+    ])
+    assert inseridas == 3 and [pos for pos, _ in erros] == [3]
+    ids = dict(model.get_connection().execute("SELECT nome_hospede, id_reserva FROM reservas WHERE id_reserva > ?", (ultimo,)).fetchall())
+    assert ids == {'Bia': ultimo + 6, 'Caio': ultimo + 5, 'Duda': ultimo + 7}
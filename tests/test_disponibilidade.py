@@ -0,0 +1,62 @@
+import pytest
+import model
+
+
+@pytest.fixture(params=[False, True], ids=['anti_join', 'indice'])
+def modo(request, banco, monkeypatch):
+    monkeypatch.setattr(model, 'AVAILABILITY_INDEX_ENABLED', request.param)
+    return request.param
+
+
+def livres(checkin, checkout):
+    return [q['numero_quarto'] for q in model.get_quartos_disponiveis(checkin, checkout)]
+
+
+def test_quartos_disponiveis_no_periodo(modo):
+    assert model.add_reserva('101', 'Ana', '2031-05-10', '2031-05-15', 750.0)[0]
+    assert model.add_reserva('201', 'Bia', '2031-05-01', '2031-05-11', 2500.0)[0]
+
+    assert livres('2031-05-12', '2031-05-14') == ['102', '201', '305']
+    assert livres('2031-05-05', '2031-05-12') == ['102', '305']
+    # Check-out e check-in no mesmo dia não conflitam
+    assert livres('2031-05-15', '2031-05-16') == ['101', '102', '201', '305']
+
+
+def id_da_reserva(nome_hospede):
+    return model.get_connection().execute(
+        "SELECT id_reserva FROM reservas WHERE nome_hospede = ?", (nome_hospede,)
+    ).fetchone()[0]
+
+
+def test_cancelamento_e_exclusao_liberam_o_quarto(modo):
+    assert model.add_reserva('102', 'Ana', '2031-06-01', '2031-06-03', 300.0)[0]
+    assert '102' not in livres('2031-06-02', '2031-06-04')
+    assert model.alterar_status_reserva(id_da_reserva('Ana'), 'Cancelada')[0]
+    assert '102' in livres('2031-06-02', '2031-06-04')
+
+    assert model.add_reserva('305', 'Bia', '2031-06-01', '2031-06-03', 200.0)[0]
+    assert '305' not in livres('2031-06-01', '2031-06-02')
+    assert model.delete_reserva(id_da_reserva('Bia'))
+    assert '305' in livres('2031-06-01', '2031-06-02')
+
+
+def buscar(**filtros):
+    return [q['numero_quarto'] for q in model.buscar_quartos_disponiveis('2031-07-01', '2031-07-03', **filtros)]
+
+
+def test_busca_por_hospedes_preco_e_atributos(banco):
+    assert buscar(hospedes=2) == ['101', '102', '201']
+    assert buscar(hospedes=3) == ['201']
+    assert buscar(preco_max=150) == ['305', '101', '102']
+    assert buscar(hospedes=2, preco_max=149.99) == []
+    assert buscar(atributos=('varanda',)) == ['101', '201']
+    assert buscar(atributos=('varanda', 'vista_mar')) == ['201']
+    assert buscar(atributos=('sauna',)) == []
+
+    # O índice de quartos acompanha a alteração dos atributos
+    assert model.update_quarto_atributos('102', ['Sauna', 'varanda'])
+    assert buscar(atributos=('sauna',)) == ['102']
+    assert buscar(hospedes=2, preco_max=150, atributos=('varanda',)) == ['101', '102']
+
+    assert model.add_reserva('101', 'Ana', '2031-07-02', '2031-07-04', 300.0)[0]
+    assert buscar(atributos=('varanda',)) == ['102', '201']
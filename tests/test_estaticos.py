@@ -0,0 +1,35 @@
+import gzip
+import os
+import re
+
+
+def test_estatico_versionado_e_comprimido(entrar):
+    admin = entrar('admin@hotel.com', 'admin123')
+    pagina = admin.get('/calendario', headers={'Accept-Encoding': 'gzip'})
+    assert pagina.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in pagina.headers['Vary']
+    html = gzip.decompress(pagina.data).decode()
+    url = re.search(r'href="(/static/css/style\.css\?v=\w{12})"', html).group(1)
+
+    resposta = admin.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert resposta.status_code == 200
+    assert 'immutable' in resposta.headers['Cache-Control']
+    assert resposta.headers['Content-Encoding'] == 'gzip'
+    with open(os.path.join(admin.application.static_folder, 'css', 'style.css'), 'rb') as f:
+        assert gzip.decompress(resposta.data) == f.read()
+    revalidacao = admin.get(url, headers={'Accept-Encoding': 'gzip', 'If-None-Match': resposta.headers['ETag']})
+    assert revalidacao.status_code == 304
+
+    # Sem o hash (ou com um hash antigo) não há cache de longo prazo
+    for antiga in ('/static/css/style.css', '/static/css/style.css?v=000000000000'):
+        resposta = admin.get(antiga)
+        assert 'immutable' not in (resposta.headers.get('Cache-Control') or '')
+        resposta.close()
+
+
+def test_fragmento_de_quartos_acompanha_as_escritas(entrar):
+    camareira = entrar('camareira@hotel.com', 'camareira123')
+    padrao = r'data-quarto="305">.*?status-limpeza">([\w ]+)<'
+    assert re.search(padrao, camareira.get('/quartos').get_data(as_text=True), re.S).group(1) == 'Sujo'
+    camareira.post('/quartos/lote', json={'atualizacoes': [{'numero_quarto': '305', 'status_limpeza': 'Limpo'}]})
+    assert re.search(padrao, camareira.get('/quartos').get_data(as_text=True), re.S).group(1) == 'Limpo'
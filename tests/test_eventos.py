@@ -0,0 +1,47 @@
+import json
+import model
+from events import DifusorEventos
+
+
+def eventos(mensagens, quantidade):
+    """Lê `quantidade` eventos (ignorando pings) e retorna [(id, tipo, dados)]."""
+    lidos = []
+    while len(lidos) < quantidade:
+        mensagem = next(mensagens)
+        if mensagem.startswith('id:'):
+            campos = dict(linha.split(': ', 1) for linha in mensagem.strip().splitlines())
+            lidos.append((int(campos['id']), campos['event'], json.loads(campos['data'])))
+    return lidos
+
+
+def test_assinante_recebe_so_os_eventos_novos(banco):
+    model.update_quarto_status('101', 'Sujo') # Anterior à assinatura: não é enviado
+    difusor = DifusorEventos(banco, intervalo=0.01)
+    mensagens = difusor.assinar({'quarto'}, keepalive=0.05)
+    try:
+        assert next(mensagens).startswith('retry:')
+        model.add_reserva('102', 'Ana', '2038-01-01', '2038-01-02', 150.0) # Tipo não assinado
+        model.update_quarto_status('305', 'Limpo')
+        (_, tipo, dados), = eventos(mensagens, 1)
+        assert (tipo, dados) == ('quarto', {'numero_quarto': '305', 'status_limpeza': 'Limpo'})
+    finally:
+        mensagens.close()
+    assert difusor._assinantes == 0
+
+
+def test_reconexao_reenvia_o_que_foi_perdido(banco):
+    difusor = DifusorEventos(banco, intervalo=0.01)
+    primeira = difusor.assinar({'quarto'}, keepalive=0.05)
+    next(primeira)
+    model.update_quarto_status('101', 'Sujo')
+    (ultimo_id, _, _), = eventos(primeira, 1)
+    primeira.close()
+
+    model.update_quarto_status('102', 'Sujo') # Enquanto desconectado
+    model.update_quarto_status('201', 'Sujo')
+    segunda = difusor.assinar({'quarto'}, desde_id=ultimo_id, keepalive=0.05)
+    try:
+        next(segunda)
+        assert [dados['numero_quarto'] for _, _, dados in eventos(segunda, 2)] == ['102', '201']
+    finally:
+        segunda.close()
@@ -0,0 +1,35 @@
+import model
+
+
+def reservar(cliente, nome_hospede, data_checkin, email_hospede=''):
+    return cliente.post('/reservar', data={
+        'numero_quarto': '101', 'nome_hospede': nome_hospede, 'data_checkin': data_checkin,
+        'data_checkout': data_checkin[:-2] + '28', 'email_hospede': email_hospede,
+    })
+
+
+def test_reserva_vinculada_pelo_email_e_nao_pelo_nome(entrar):
+    recepcao = entrar('recepcionista@hotel.com', 'recepcionista123')
+    reservar(recepcao, 'Outro Nome', '2036-01-20', 'hospede@hotel.com')
+    # Mesmo nome da conta, sem e-mail: não aparece no portal
+    reservar(recepcao, 'Hóspede', '2036-02-20')
+    reservar(recepcao, 'Hóspede', '2036-03-20', 'camareira@hotel.com')
+    quantidade = model.get_connection().execute("SELECT COUNT(*) FROM reservas WHERE data_checkin >= '2036-01-01'").fetchone()[0]
+    assert quantidade == 2 # O e-mail de quem não é hóspede é recusado
+
+    reservas = entrar('hospede@hotel.com', 'hospede123').get('/api/v1/minhas_reservas').get_json()['reservas']
+    assert [(r['nome_hospede'], r['data_checkin']) for r in reservas] == [('Outro Nome', '2036-01-20')]
+
+
+def test_portal_paginado_por_usuario(banco):
+    hospede_id = model.get_user_by_email('hospede@hotel.com')['id']
+    for mes in range(1, 8):
+        assert model.add_reserva('201', 'Hóspede', f'2037-{mes:02d}-01', f'2037-{mes:02d}-03', 500.0, hospede_id)[0]
+
+    datas, cursor = [], None
+    while True:
+        pagina, cursor = model.get_reservas_by_usuario(hospede_id, cursor=cursor, limite=3)
+        datas += [r['data_checkin'] for r in pagina]
+        if not cursor:
+            break
+    assert datas == [f'2037-{mes:02d}-01' for mes in range(7, 0, -1)]
@@ -0,0 +1,37 @@
+import model
+
+
+def paginas(filtros=None, limite=7):
+    reservas, cursor = model.get_reservas_pagina(filtros, limite=limite)
+    todas = list(reservas)
+    while cursor:
+        reservas, cursor = model.get_reservas_pagina(filtros, cursor=cursor, limite=limite)
+        assert reservas
+        todas += reservas
+    return todas
+
+
+def test_paginas_cobrem_tudo_sem_repetir(banco):
+    for i in range(30):
+        model.get_connection().execute('''
+            INSERT INTO reservas (numero_quarto, nome_hospede, data_checkin, data_checkout, status_reserva, valor_total)
+            VALUES (?, ?, ?, '2034-01-01', 'Confirmada', 100.0)
+        ''', (('101', '102')[i % 2], f'Hóspede {i:02d}', f'2033-01-{1 + i % 4:02d}'))
+    model.get_connection().commit()
+
+    esperado = model.get_all_reservas()
+    esperado.sort(key=lambda r: (r['data_checkin'], r['id_reserva']), reverse=True)
+    todas = paginas()
+    assert [r['id_reserva'] for r in todas] == [r['id_reserva'] for r in esperado]
+
+    so_101 = paginas({'numero_quarto': '101', 'data_inicio': '2033-01-02'}, limite=4)
+    assert so_101 and all(r['numero_quarto'] == '101' and r['data_checkin'] >= '2033-01-02' for r in so_101)
+    assert len(so_101) == sum(1 for r in esperado if r['numero_quarto'] == '101' and r['data_checkin'] >= '2033-01-02')
+    assert {r['nome_hospede'] for r in paginas({'nome_hospede': 'Hóspede 1'})} == {f'Hóspede {i}' for i in range(10, 20)}
+
+
+def test_cursor_invalido_volta_ao_inicio(banco):
+    primeira, _ = model.get_reservas_pagina(limite=3)
+    assert model.get_reservas_pagina(cursor='lixo', limite=3)[0] == primeira
+    assert model.decode_cursor('2033-01-01_12') == ('2033-01-01', 12)
+    assert model.decode_cursor('2033-13-01_12') is None
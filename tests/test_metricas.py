@@ -0,0 +1,35 @@
+from metrics import Histograma
+
+
+def test_histograma_cumulativo():
+    histograma = Histograma((0.1, 1.0))
+    for valor in (0.05, 0.5, 0.5, 3.0):
+        histograma.observar(valor)
+    assert list(histograma.linhas('x', (('route', '/a'),))) == [
+        'x_bucket{route="/a",le="0.1"} 1',
+        'x_bucket{route="/a",le="1.0"} 3',
+        'x_bucket{route="/a",le="+Inf"} 4',
+        'x_sum{route="/a"} 4.05',
+        'x_count{route="/a"} 4',
+    ]
+
+
+def test_metrics_exige_token(app_hotel, monkeypatch):
+    cliente = app_hotel.test_client()
+    monkeypatch.setitem(app_hotel.config, 'METRICS_TOKEN', None)
+    assert cliente.get('/metrics').status_code == 404
+
+    monkeypatch.setitem(app_hotel.config, 'METRICS_TOKEN', 'segredo')
+    assert cliente.get('/metrics').status_code == 401
+    assert cliente.get('/metrics', headers={'Authorization': 'Bearer outro'}).status_code == 401
+    resposta = cliente.get('/metrics', headers={'Authorization': 'Bearer segredo'})
+    assert resposta.status_code == 200
+    assert 'hotel_http_requests_total{method="GET",route="/metrics",status="401"}' in resposta.get_data(as_text=True)
+
+
+def test_cabecalho_de_depuracao_conta_o_sql(entrar, app_hotel, monkeypatch):
+    monkeypatch.setitem(app_hotel.config, 'METRICS_DEBUG_HEADER', True)
+    resposta = entrar('recepcionista@hotel.com', 'recepcionista123').get('/api/v1/quartos')
+    assert resposta.status_code == 200
+    consultas = dict(parte.split('=') for parte in resposta.headers['X-Debug-Timing'].split('; '))['sql']
+    assert int(consultas) > 0
@@ -0,0 +1,47 @@
+import csv
+import io
+import model
+
+
+def criar_serra():
+    propriedade_id = model.criar_propriedade('Hotel Serra', 'serra.db')
+    serra = model.get_database_propriedade(propriedade_id)
+    conn = model.get_connection(serra)
+    conn.execute("INSERT INTO quartos (numero_quarto, capacidade_maxima, preco_diaria_base) VALUES ('S1', 2, 300.0)")
+    conn.commit()
+    return propriedade_id, serra
+
+
+def test_exportacao_usa_o_banco_da_propriedade_selecionada(entrar):
+    propriedade_id, _ = criar_serra()
+    admin = entrar('admin@hotel.com', 'admin123')
+    assert admin.post('/propriedade', data={'propriedade_id': str(propriedade_id)}).status_code == 302
+
+    resposta = admin.get('/exportar/quartos.csv')
+    assert resposta.status_code == 200
+    linhas = list(csv.reader(io.StringIO(resposta.get_data(as_text=True))))
+    assert [linha[0] for linha in linhas[1:]] == ['S1']
+
+
+def test_criar_propriedade_com_banco_invalido_nao_cadastra(banco):
+    antes = set(model.get_propriedades())
+    try:
+        model.criar_propriedade('Hotel Mar', 'pasta_inexistente/mar.db')
+    except model.sqlite3.Error:
+        pass
+    assert set(model.get_propriedades()) == antes
+
+
+def test_portal_do_hospede_lista_todas_as_propriedades(entrar):
+    _, serra = criar_serra()
+    hospede_id = model.get_user_by_email('hospede@hotel.com')['id']
+    model.add_reserva('101', 'Hóspede', '2040-04-05', '2040-04-07', 300.0, hospede_id)
+    model.usar_banco(serra)
+    try:
+        model.add_reserva('S1', 'Hóspede', '2040-05-05', '2040-05-07', 600.0, hospede_id)
+    finally:
+        model.usar_banco(None)
+
+    resposta = entrar('hospede@hotel.com', 'hospede123').get('/api/v1/minhas_reservas')
+    reservas = resposta.get_json()['reservas']
+    assert [(r['propriedade'], r['numero_quarto']) for r in reservas] == [('Hotel Serra', 'S1'), ('Hotel Estada Feliz', '101')]
@@ -0,0 +1,42 @@
+import model
+
+
+def status_dos_quartos():
+    return {q['numero_quarto']: q['status_limpeza'] for q in model.get_all_quartos()}
+
+
+def test_atualizacao_em_lote_por_json(entrar):
+    camareira = entrar('camareira@hotel.com', 'camareira123')
+    antes = status_dos_quartos()
+    resposta = camareira.post('/quartos/lote', json={'atualizacoes': [
+        {'numero_quarto': '101', 'status_limpeza': 'Sujo'},
+        {'numero_quarto': '201', 'status_limpeza': 'Em limpeza'},
+        {'numero_quarto': '999', 'status_limpeza': 'Sujo'},
+        {'numero_quarto': '305', 'status_limpeza': 'Brilhando'},
+    ]})
+    assert resposta.status_code == 200
+    resultados = {r['numero_quarto']: r for r in resposta.get_json()['resultados']}
+    assert resultados['101']['success'] and resultados['201']['success']
+    assert resultados['999']['message'] == 'Quarto não encontrado.'
+    assert resultados['305']['message'] == 'Status de limpeza inválido.'
+
+    assert status_dos_quartos() == {**antes, '101': 'Sujo', '201': 'Em limpeza'}
+    assert camareira.post('/quartos/lote', json={'atualizacoes': 'Sujo'}).status_code == 400
+
+
+def test_formulario_envia_so_as_linhas_alteradas(entrar):
+    camareira = entrar('camareira@hotel.com', 'camareira123')
+    antes = status_dos_quartos()
+    resposta = camareira.post('/quartos/lote', data={
+        'numero_quarto': ['101', '102'],
+        'status_limpeza': ['Sujo', antes['102']],
+        'status_atual': [antes['101'], antes['102']],
+    })
+    assert resposta.status_code == 302
+    assert status_dos_quartos() == {**antes, '101': 'Sujo'}
+
+
+def test_lote_so_para_camareira(entrar):
+    recepcao = entrar('recepcionista@hotel.com', 'recepcionista123')
+    recepcao.post('/quartos/lote', json={'atualizacoes': [{'numero_quarto': '101', 'status_limpeza': 'Sujo'}]})
+    assert status_dos_quartos()['101'] != 'Sujo'
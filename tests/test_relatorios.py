@@ -0,0 +1,36 @@
+import pytest
+import model
+from controller import get_relatorio_ocupacao
+
+
+def test_relatorio_de_ocupacao_entre_meses(banco):
+    # 4 noites a R$ 100, duas em janeiro e duas em fevereiro
+    assert model.add_reserva('305', 'Ana', '2035-01-30', '2035-02-03', 400.0)[0]
+    assert model.add_reserva('101', 'Bia', '2035-01-31', '2035-02-01', 150.0)[0]
+
+    relatorio, erro = get_relatorio_ocupacao('2035-01-30', '2035-02-02')
+    assert not erro
+    total = relatorio['total']
+    assert (total['noites_vendidas'], total['receita'], total['noites_disponiveis']) == (4, 450.0, 12)
+    assert total['ocupacao'] == pytest.approx(4 / 12)
+    assert total['adr'] == pytest.approx(450.0 / 4)
+    assert total['revpar'] == pytest.approx(450.0 / 12)
+    assert [(m['mes'], m['noites_vendidas'], m['receita']) for m in relatorio['por_mes']] == [
+        ('2035-01', 3, 350.0), ('2035-02', 1, 100.0)
+    ]
+    assert [(d['data'], d['noites_vendidas']) for d in relatorio['por_dia']] == [
+        ('2035-01-30', 1), ('2035-01-31', 2), ('2035-02-01', 1)
+    ]
+    assert [(q['numero_quarto'], q['noites_vendidas']) for q in relatorio['por_quarto']] == [('101', 1), ('305', 3)]
+
+
+def test_resumo_diario_acompanha_cancelamentos(banco):
+    assert model.add_reserva('201', 'Ana', '2035-03-01', '2035-03-04', 750.0)[0]
+    assert model.add_reserva('102', 'Bia', '2035-03-02', '2035-03-03', 150.0)[0]
+    reserva_id = model.get_connection().execute("SELECT id_reserva FROM reservas WHERE nome_hospede = 'Ana'").fetchone()[0]
+    assert model.alterar_status_reserva(reserva_id, 'Cancelada')[0]
+
+    incremental = model.get_ocupacao_por_data('2035-03-01', '2035-03-05')
+    assert incremental == [('2035-03-02', 1, 150.0)]
+    model.rebuild_ocupacao_diaria()
+    assert model.get_ocupacao_por_data('2035-03-01', '2035-03-05') == incremental
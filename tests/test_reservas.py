@@ -0,0 +1,79 @@
+import sqlite3
+import threading
+import pytest
+import model
+
+
+def contar_reservas(numero_quarto):
+    return model.get_connection().execute(
+        "SELECT COUNT(*) FROM reservas WHERE numero_quarto = ? AND status_reserva NOT IN ('Cancelada')", (numero_quarto,)
+    ).fetchone()[0]
+
+
+def test_reserva_sobreposta_e_rejeitada(banco):
+    assert model.add_reserva('101', 'Ana', '2030-01-10', '2030-01-15', 750.0)[0]
+    ok, mensagem = model.add_reserva('101', 'Bia', '2030-01-12', '2030-01-18', 900.0)
+    assert not ok and 'já está reservado' in mensagem
+    # Check-out no dia do check-in da próxima não é conflito
+    assert model.add_reserva('101', 'Caio', '2030-01-15', '2030-01-20', 750.0)[0]
+    assert model.add_reserva('102', 'Bia', '2030-01-12', '2030-01-18', 900.0)[0]
+    assert contar_reservas('101') == 2
+
+
+def test_datas_sem_zero_a_esquerda_ainda_conflitam(banco):
+    assert model.add_reserva('101', 'Ana', '2030-2-1', '2030-2-5', 600.0)[0]
+    assert not model.add_reserva('101', 'Bia', '2030-02-03', '2030-02-04', 150.0)[0]
+    datas = model.get_connection().execute("SELECT data_checkin, data_checkout FROM reservas WHERE nome_hospede = 'Ana'").fetchone()
+    assert tuple(datas) == ('2030-02-01', '2030-02-05')
+
+
+def test_reservas_simultaneas_do_mesmo_quarto(banco):
+    threads = 8
+    barreira = threading.Barrier(threads)
+    resultados = []
+
+    def reservar(i):
+        try:
+            barreira.wait()
+            resultados.append(model.add_reserva('201', f'Hóspede {i}', '2030-03-01', '2030-03-04', 750.0)[0])
+        finally:
+            model.close_connection()
+
+    trabalhadores = [threading.Thread(target=reservar, args=(i,)) for i in range(threads)]
+    for t in trabalhadores:
+        t.start()
+    for t in trabalhadores:
+        t.join()
+    assert len(resultados) == threads
+    assert resultados.count(True) == 1
+    assert contar_reservas('201') == 1
+
+
+def segurar_lock(database):
+    conn = sqlite3.connect(database, isolation_level=None, check_same_thread=False)
+    conn.execute("BEGIN IMMEDIATE")
+    return conn
+
+
+def test_transacao_tenta_de_novo_enquanto_o_banco_esta_ocupado(banco):
+    bloqueio = segurar_lock(banco)
+    liberar = threading.Timer(0.1, lambda: bloqueio.execute("ROLLBACK"))
+    liberar.start()
+    try:
+        assert model.executar_transacao(lambda cursor: cursor.execute("SELECT 1").fetchone()[0]) == 1
+    finally:
+        liberar.join()
+        bloqueio.close()
+
+
+def test_transacao_desiste_apos_as_tentativas(banco):
+    bloqueio = segurar_lock(banco)
+    try:
+        with pytest.raises(sqlite3.OperationalError) as erro:
+            model.executar_transacao(lambda cursor: None)
+        assert model.is_lock_error(erro.value)
+        ok, mensagem = model.add_reserva('305', 'Ana', '2030-04-01', '2030-04-02', 100.0)
+        assert not ok and 'ocupado' in mensagem
+    finally:
+        bloqueio.execute("ROLLBACK")
+        bloqueio.close()
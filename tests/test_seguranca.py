@@ -0,0 +1,53 @@
+import threading
+import time
+import pytest
+from security import TokenBucket, RateLimiter, PasswordVerifier, VerificacaoIndisponivel
+
+
+def test_balde_permite_rajada_e_repoe_com_o_tempo():
+    balde = TokenBucket(3, 0.5)
+    inicio = balde.atualizado_em
+    assert [balde.consumir(inicio) for _ in range(4)] == [True, True, True, False]
+    assert not balde.consumir(inicio + 1) # Meia ficha
+    assert balde.consumir(inicio + 2)
+    # Nunca acumula mais que a capacidade
+    assert [balde.consumir(inicio + 100) for _ in range(4)] == [True, True, True, False]
+
+
+def test_limitador_separa_chaves_e_descarta_a_mais_antiga():
+    limitador = RateLimiter(1, 0.0, max_chaves=2)
+    assert limitador.permitir('a') and limitador.permitir('b')
+    assert not limitador.permitir('a')
+    assert limitador.permitir('c') # Descarta 'b', usada há mais tempo
+    assert list(limitador._baldes) == ['a', 'c']
+    assert limitador.permitir('b')
+
+
+def test_verificador_recusa_quando_o_pool_esta_cheio():
+    liberar = threading.Event()
+    verificador = PasswordVerifier(lambda: liberar.wait(5), max_workers=1, max_fila=1)
+    ocupadas = [threading.Thread(target=verificador.verificar) for _ in range(2)]
+    for t in ocupadas:
+        t.start()
+    try:
+        while verificador._vagas._value: # Espera as duas vagas serem tomadas
+            time.sleep(0.01)
+        with pytest.raises(VerificacaoIndisponivel):
+            verificador.verificar()
+    finally:
+        liberar.set()
+        for t in ocupadas:
+            t.join()
+    assert verificador.verificar() is True
+
+
+def test_login_limitado_por_email(app_hotel, entrar):
+    cliente = app_hotel.test_client()
+    for _ in range(5):
+        resposta = cliente.post('/login', data={'email': 'admin@hotel.com', 'password': 'errada'})
+        assert 'Login falhou' in resposta.get_data(as_text=True)
+    resposta = cliente.post('/login', data={'email': 'ADMIN@hotel.com', 'password': 'admin123'})
+    assert resposta.status_code == 200
+    assert 'Muitas tentativas de login' in resposta.get_data(as_text=True)
+    # Outro e-mail, mesmo IP, ainda entra
+    entrar('hospede@hotel.com', 'hospede123')
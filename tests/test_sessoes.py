@@ -0,0 +1,43 @@
+import model
+
+
+def linhas_sessao(app_hotel):
+    conn = model.get_connection(app_hotel.session_interface.database)
+    return {row[0] for row in conn.execute("SELECT sid FROM sessoes")}
+
+
+def cookie_sessao(cliente, app_hotel):
+    cookie = cliente.get_cookie(app_hotel.config['SESSION_COOKIE_NAME'])
+    return cookie.value if cookie else None
+
+
+def test_login_troca_o_id_da_sessao(app_hotel, entrar):
+    cliente = app_hotel.test_client()
+    cliente.get('/') # Sem login: guarda a mensagem (flash) em uma sessão anônima
+    anterior = cookie_sessao(cliente, app_hotel)
+    assert anterior
+    sessoes_antes = linhas_sessao(app_hotel)
+
+    resposta = cliente.post('/login', data={'email': 'admin@hotel.com', 'password': 'admin123'})
+    assert resposta.status_code == 302
+    atual = cookie_sessao(cliente, app_hotel)
+    assert atual and atual != anterior
+    # O registro do id anterior foi apagado
+    assert len(linhas_sessao(app_hotel) - sessoes_antes) == 1
+    assert not sessoes_antes <= linhas_sessao(app_hotel)
+
+    # Quem guardou o cookie anterior não entra na conta
+    intruso = app_hotel.test_client()
+    intruso.set_cookie(app_hotel.config['SESSION_COOKIE_NAME'], anterior)
+    assert intruso.get('/').status_code == 302
+    assert cliente.get('/').status_code == 200
+
+
+def test_logout_invalida_o_id_da_sessao(app_hotel, entrar):
+    cliente = entrar('camareira@hotel.com', 'camareira123')
+    assert cliente.get('/quartos').status_code == 200
+    logado = cookie_sessao(cliente, app_hotel)
+    sid = app_hotel.session_interface._get_signer(app_hotel).unsign(logado).decode('utf-8')
+    assert sid in linhas_sessao(app_hotel)
+    cliente.get('/logout')
+    assert sid not in linhas_sessao(app_hotel)
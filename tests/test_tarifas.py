@@ -0,0 +1,67 @@
+from datetime import date, timedelta
+import model
+from pricing import TabelaTarifas, calcular_valor_estadia
+
+
+def proxima_segunda(dias=60):
+    dia = date.today() + timedelta(days=dias)
+    return dia + timedelta(days=-dia.weekday() % 7)
+
+
+def regra(tipo, percentual, numero_quarto=None, data_inicio=None, data_fim=None, min_noites=None):
+    return {
+        'tipo': tipo, 'percentual': percentual, 'numero_quarto': numero_quarto,
+        'data_inicio': data_inicio, 'data_fim': data_fim, 'min_noites': min_noites,
+    }
+
+
+def test_compilacao_das_regras():
+    segunda = date(2030, 1, 7)
+    regras = [
+        regra('fim_de_semana', 20),
+        regra('temporada', 50, numero_quarto='A', data_inicio='2030-01-08', data_fim='2030-01-10'),
+        regra('permanencia', 10, min_noites=7),
+        regra('permanencia', 5, min_noites=3),
+    ]
+    tabela = TabelaTarifas({'A': 100.0, 'B': 100.0, 'C': 200.0}, regras, segunda, 28)
+    # Segunda a quarta: terça e quarta em temporada só no quarto A
+    assert tabela.valor_estadia('A', segunda, segunda + timedelta(days=2)) == 250.0
+    assert tabela.valor_estadia('B', segunda, segunda + timedelta(days=2)) == 200.0
+    # Sexta e sábado +20%, domingo normal; 3 noites: 5% de desconto
+    sexta = segunda + timedelta(days=4)
+    assert tabela.valor_estadia('C', sexta, sexta + timedelta(days=3)) == round((240 + 240 + 200) * 0.95, 2)
+    # 7 noites: vale o maior desconto aplicável
+    assert tabela.valor_estadia('B', segunda + timedelta(days=14), segunda + timedelta(days=21)) == round((500 + 240) * 0.9, 2)
+    assert tabela.valor_estadia('X', segunda, segunda + timedelta(days=1)) is None
+
+
+def test_tarifas_acompanham_alteracoes_de_outro_processo(banco):
+    checkin = proxima_segunda()
+    checkout = checkin + timedelta(days=2)
+    assert calcular_valor_estadia('101', checkin, checkout) == 300.0
+
+    # Gravado direto no banco, como por outro worker: nenhuma invalidação local
+    conn = model.get_connection()
+    conn.execute("INSERT INTO regras_tarifa (tipo, percentual) VALUES ('temporada', 50)")
+    conn.commit()
+    assert calcular_valor_estadia('101', checkin, checkout) == 450.0
+
+    conn.execute("UPDATE quartos SET preco_diaria_base = 200 WHERE numero_quarto = '101'")
+    conn.commit()
+    assert calcular_valor_estadia('101', checkin, checkout) == 600.0
+
+
+def test_disponibilidade_nao_revalida_preco_antigo(entrar):
+    checkin = proxima_segunda()
+    url = f'/api/v1/disponibilidade?checkin={checkin}&checkout={checkin + timedelta(days=2)}'
+    cliente = entrar('recepcionista@hotel.com', 'recepcionista123')
+    primeira = cliente.get(url)
+    assert {q['numero_quarto']: q['valor_estadia'] for q in primeira.get_json()['quartos']}['101'] == 300.0
+
+    conn = model.get_connection()
+    conn.execute("INSERT INTO regras_tarifa (tipo, percentual) VALUES ('temporada', 50)")
+    conn.commit()
+    segunda = cliente.get(url, headers={'If-None-Match': primeira.headers['ETag']})
+    assert segunda.status_code == 200
+    assert {q['numero_quarto']: q['valor_estadia'] for q in segunda.get_json()['quartos']}['101'] == 450.0
+    assert cliente.get(url, headers={'If-None-Match': segunda.headers['ETag']}).status_code == 304